@@ -1,7 +1,24 @@
+import bisect
+import functools
+import hashlib
+import heapq
 import ipaddress
+import json
 import os
 import random
+import socket
+import sqlite3
+import struct
+import sys
+import time
+from array import array
 from collections import deque
+from collections.abc import Mapping
+
+try:
+    import numpy as np
+except ImportError:  # NumPy es opcional: sin él las matrices de topología se calculan con BFS en Python
+    np = None
 
 # Funciones de validación
 def validar_numero_positivo(mensaje):
@@ -71,6 +88,26 @@ def validar_ip(mensaje):
             print("❌ Error: Introduce una dirección IP válida (ej: 192.168.1.0).")
             continue
 
+def validar_red_ipv6(mensaje):
+    """
+    Valida que la entrada sea un bloque IPv6 con prefijo (máximo /63 para que quepan /64)
+    Retorna (red, prefijo)
+    """
+    while True:
+        entrada = input(mensaje).strip()
+        if not entrada:
+            print("❌ Error: No puedes dejar este campo vacío. Por favor, introduce un valor.")
+            continue
+        try:
+            red = ipaddress.IPv6Network(entrada if '/' in entrada else f"{entrada}/48", strict=False)
+        except ValueError:
+            print("❌ Error: Introduce un bloque IPv6 válido (ej: 2001:db8:acad::/48).")
+            continue
+        if red.prefixlen > 63:
+            print("❌ Error: El bloque IPv6 debe ser /63 o más grande para contener redes /64.")
+            continue
+        return str(red.network_address), red.prefixlen
+
 def validar_mascara(mensaje):
     """
     Valida que la entrada sea una máscara válida
@@ -120,6 +157,23 @@ def validar_texto(mensaje):
             continue
         return entrada
 
+def validar_semilla(mensaje):
+    """
+    Valida la semilla de la asignación aleatoria
+    Si se deja vacía se genera una nueva y se muestra para poder regenerar el plan
+    """
+    while True:
+        entrada = input(mensaje).strip()
+        if not entrada:
+            semilla = random.SystemRandom().randrange(2 ** 32)
+            print(f"🎲 Semilla generada: {semilla} (úsala para regenerar exactamente este plan)")
+            return semilla
+        try:
+            return int(entrada)
+        except ValueError:
+            print("❌ Error: La semilla debe ser un número entero.")
+            continue
+
 def validar_nombre_archivo(mensaje):
     """
     Valida el nombre del archivo
@@ -199,6 +253,14 @@ def validar_router_destino(mensaje, router_actual, num_routers, conexiones_regis
             print(f"❌ Error: {str(e)}")
             continue
 
+# Nombre legible de cada tipo de ruteo (encabezado del archivo y resúmenes)
+NOMBRES_TIPO_RUTEO = {
+    "ospf": "OSPF",
+    "estatico": "Ruteo Estático",
+    "eigrp": "EIGRP 100",
+    "rip": "RIP v2"
+}
+
 def validar_tipo_ruteo():
     """
     Valida el tipo de ruteo elegido por el usuario
@@ -208,15 +270,21 @@ def validar_tipo_ruteo():
         print("="*40)
         print("1. 🌐 OSPF (Open Shortest Path First)")
         print("2. 📍 Ruteo Estático")
+        print("3. ⚡ EIGRP 100")
+        print("4. 📡 RIP v2")
         
-        opcion = validar_numero("Selecciona el tipo de ruteo (1-2): ")
+        opcion = validar_numero("Selecciona el tipo de ruteo (1-4): ")
         
         if opcion == 1:
             return "ospf"
         elif opcion == 2:
             return "estatico"
+        elif opcion == 3:
+            return "eigrp"
+        elif opcion == 4:
+            return "rip"
         else:
-            print("❌ Error: Selecciona 1 para OSPF o 2 para Ruteo Estático.")
+            print("❌ Error: Selecciona 1 para OSPF, 2 para Ruteo Estático, 3 para EIGRP o 4 para RIP v2.")
             continue
 
 # Función para convertir una dirección IP en un entero
@@ -228,53 +296,476 @@ def ip_to_int(ip):
 def int_to_ip(ip_int):
     return f'{(ip_int >> 24) & 255}.{(ip_int >> 16) & 255}.{(ip_int >> 8) & 255}.{ip_int & 255}'
 
+# Función para convertir una dirección IPv6 en un entero de 128 bits
+def ip6_to_int(ip):
+    if '::' in ip:
+        izquierda, derecha = ip.split('::')
+        grupos_izquierda = izquierda.split(':') if izquierda else []
+        grupos_derecha = derecha.split(':') if derecha else []
+        grupos = grupos_izquierda + ['0'] * (8 - len(grupos_izquierda) - len(grupos_derecha)) + grupos_derecha
+    else:
+        grupos = ip.split(':')
+    
+    valor = 0
+    for grupo in grupos:
+        valor = (valor << 16) | int(grupo, 16)
+    return valor
+
+# Función para convertir un entero de 128 bits en una dirección IPv6 (forma comprimida)
+def int_to_ip6(ip_int):
+    grupos = [(ip_int >> (112 - 16 * i)) & 0xFFFF for i in range(8)]
+    
+    # Buscar la racha de ceros más larga (mínimo 2 grupos) para comprimirla con '::'
+    mejor_inicio, mejor_largo = -1, 1
+    inicio_racha = None
+    for i, grupo in enumerate(grupos + [1]):
+        if grupo == 0 and inicio_racha is None:
+            inicio_racha = i
+        elif grupo != 0 and inicio_racha is not None:
+            if i - inicio_racha > mejor_largo:
+                mejor_inicio, mejor_largo = inicio_racha, i - inicio_racha
+            inicio_racha = None
+    
+    texto = [f'{grupo:x}' for grupo in grupos]
+    if mejor_inicio < 0:
+        return ':'.join(texto)
+    return ':'.join(texto[:mejor_inicio]) + '::' + ':'.join(texto[mejor_inicio + mejor_largo:])
+
+def alinear_inicio_subred(base_ip_int, direccion, tamano):
+    """
+    Devuelve el primer inicio de subred alineado respecto a la IP base que sea >= direccion
+    """
+    desplazamiento = direccion - base_ip_int
+    return base_ip_int + -(-desplazamiento // tamano) * tamano
+
+# Bloques privados (RFC 1918) que contienen a la IP base: la asignación no sale de ellos
+BLOQUES_PRIVADOS_IPV4 = ((ip_to_int("10.0.0.0"), 8), (ip_to_int("172.16.0.0"), 12), (ip_to_int("192.168.0.0"), 16))
+
+def fin_bloque_base(base_ip_int):
+    """
+    Primera dirección fuera del bloque de la IP base: el bloque privado que la contiene o,
+    si es pública, su red con clase (A /8, B /16, C /24)
+    """
+    for red, prefijo in BLOQUES_PRIVADOS_IPV4:
+        if base_ip_int >> (32 - prefijo) == red >> (32 - prefijo):
+            return red + 2 ** (32 - prefijo)
+    primer_octeto = base_ip_int >> 24
+    prefijo = 8 if primer_octeto < 128 else 16 if primer_octeto < 192 else 24
+    return (base_ip_int >> (32 - prefijo) << (32 - prefijo)) + 2 ** (32 - prefijo)
+
+def buscar_subred_libre(base_ip_int, mask, bloque_ocupado, desde=None, bits=32, limite=None):
+    """
+    Busca la primera subred /mask libre a partir de 'desde' (por defecto la segunda subred de la base).
+    'bloque_ocupado(inicio, fin)' retorna el bloque que se solapa con el rango o None;
+    cuando hay solape se salta directamente al final de ese bloque en vez de probar subred por subred.
+    bits=32 para IPv4 y bits=128 para IPv6; 'limite' es la primera dirección fuera del espacio a explorar
+    (en IPv4, por defecto el final del bloque de la IP base, ver fin_bloque_base).
+    Retorna (inicio, fin) como enteros o None si no hay espacio
+    """
+    tamano = 2 ** (bits - mask)
+    if limite is None:
+        limite = fin_bloque_base(base_ip_int) if bits == 32 else 2 ** bits
+    if desde is None:
+        inicio = base_ip_int + tamano
+    else:
+        inicio = alinear_inicio_subred(base_ip_int, desde, tamano)
+    
+    while inicio + tamano <= limite:
+        fin = inicio + tamano - 1
+        ocupado = bloque_ocupado(inicio, fin)
+        if ocupado is None:
+            return (inicio, fin)
+        inicio = alinear_inicio_subred(base_ip_int, ocupado[1] + 1, tamano)
+    
+    return None
+
+def elegir_subred_libre(base_ip_int, mask, bloque_ocupado, salto=1, bits=32, limite=None, desde=None):
+    """
+    Elige la subred a asignar saltando directamente por el espacio libre indexado:
+    salto=1 es la primera libre; salto=k es la k-ésima libre (o la última disponible
+    si no hay tantas), sin construir una lista de candidatas
+    """
+    red_elegida = None
+    for _ in range(salto):
+        rango = buscar_subred_libre(base_ip_int, mask, bloque_ocupado, desde, bits, limite)
+        if rango is None:
+            break
+        red_elegida = rango
+        desde = rango[1] + 1
+    
+    return red_elegida
+
+def calcular_salto(aleatorio, rng=None):
+    """
+    Salto de 1 a 5 subredes libres en modo aleatorio (1 en modo secuencial)
+    'rng' es el generador sembrado de la ejecución; sin él se usa el módulo random global
+    """
+    if not aleatorio:
+        return 1
+    return (rng or random).randint(1, 5)
+
+def bloque_ocupado_en_lista(subredes_ocupadas, inicio, fin):
+    """
+    Busca en la lista ordenada de subredes ocupadas el bloque que se solapa con [inicio, fin]
+    Búsqueda binaria: O(log n) aunque haya decenas de miles de bloques
+    """
+    idx = bisect.bisect_left(subredes_ocupadas, (fin + 1,)) - 1
+    if idx >= 0 and subredes_ocupadas[idx][1] >= inicio:
+        return subredes_ocupadas[idx]
+    return None
+
+def marcar_ocupada_en_lista(subredes_ocupadas, inicio, fin):
+    """
+    Inserta el bloque en la lista ordenada fusionándolo con los bloques contiguos,
+    así una racha de subredes consecutivas se salta en un solo paso
+    """
+    idx = bisect.bisect_left(subredes_ocupadas, (inicio,))
+    if idx > 0 and subredes_ocupadas[idx - 1][1] + 1 == inicio:
+        idx -= 1
+        inicio = subredes_ocupadas.pop(idx)[0]
+    if idx < len(subredes_ocupadas) and subredes_ocupadas[idx][0] == fin + 1:
+        fin = subredes_ocupadas.pop(idx)[1]
+    subredes_ocupadas.insert(idx, (inicio, fin))
+
 # Función para calcular el rango de una subred dado un IP base y una máscara
 # con saltos aleatorios de 1 a 5 subredes
-def calcular_rango_subred(base_ip, mask, subredes_ocupadas, aleatorio=True):
+# 'subredes_ocupadas' puede ser la lista en memoria (ordenada) o un LibroIPAM persistente
+# 'rng' es el generador sembrado de la ejecución para poder reproducir el plan
+def calcular_rango_subred(base_ip, mask, subredes_ocupadas, aleatorio=True, rng=None):
     base_ip_int = ip_to_int(base_ip)
-    mask_bits = (2 ** (32 - mask))  # Cantidad de direcciones en la subred
-    
-    # Redes candidatas para asignar
-    redes_candidatas = []
-    
-    # Buscar subredes disponibles
-    for i in range(1, 1000):  # Intentamos hasta un límite (por ejemplo 1000 redes)
-        subnet_start = base_ip_int + i * mask_bits
-        subnet_end = subnet_start + mask_bits - 1
-
-        # Verificar si esta subred se solapa con las ocupadas
-        rango_ocupado = False
-        for ocupada in subredes_ocupadas:
-            ocupada_inicio, ocupada_fin = ocupada
-            if not (subnet_end < ocupada_inicio or subnet_start > ocupada_fin):
-                rango_ocupado = True
-                break
-        
-        if not rango_ocupado:
-            # En modo aleatorio, almacenamos la red como candidata
-            if aleatorio:
-                redes_candidatas.append((subnet_start, subnet_end))
-                # Buscamos hasta 10 redes candidatas (suficientes para saltar 1-5)
-                if len(redes_candidatas) >= 10:
-                    break
-            else:
-                # En modo no aleatorio, devolvemos la primera red disponible
-                subredes_ocupadas.append((subnet_start, subnet_end))
-                return (int_to_ip(subnet_start), int_to_ip(subnet_end))
+    salto = calcular_salto(aleatorio, rng)
+    
+    if isinstance(subredes_ocupadas, list):
+        red_elegida = elegir_subred_libre(
+            base_ip_int, mask,
+            lambda inicio, fin: bloque_ocupado_en_lista(subredes_ocupadas, inicio, fin),
+            salto
+        )
+        if red_elegida:
+            # Marcar la red como ocupada
+            marcar_ocupada_en_lista(subredes_ocupadas, *red_elegida)
+    else:
+        # El libro IPAM busca y registra la subred en una sola transacción
+        red_elegida = subredes_ocupadas.asignar(base_ip_int, mask, salto)
+    
+    if not red_elegida:
+        return None
+    
+    return (int_to_ip(red_elegida[0]), int_to_ip(red_elegida[1]))
+
+# Función para calcular una subred IPv6 dentro del bloque base (ej: /64 para VLANs, /127 para enlaces)
+# Misma búsqueda indexada que en IPv4 pero con enteros de 128 bits; el espacio ocupado
+# se lleva en una lista ordenada propia de IPv6
+def calcular_rango_subred6(base_ipv6, prefijo_base, prefijo, subredes_ocupadas6, aleatorio=False, rng=None):
+    base_int = ip6_to_int(base_ipv6)
+    limite = base_int + 2 ** (128 - prefijo_base)
     
-    # Si no encontramos candidatas o no estamos en modo aleatorio
-    if not redes_candidatas:
+    red_elegida = elegir_subred_libre(
+        base_int, prefijo,
+        lambda inicio, fin: bloque_ocupado_en_lista(subredes_ocupadas6, inicio, fin),
+        calcular_salto(aleatorio, rng), bits=128, limite=limite, desde=base_int
+    )
+    if not red_elegida:
         return None
     
-    # Seleccionar una red aleatoria con un salto de 1-5 desde el principio
-    # (o la última disponible si no hay suficientes)
-    salto = random.randint(1, min(5, len(redes_candidatas)))
-    red_elegida = redes_candidatas[salto - 1]  # -1 porque los índices empiezan en 0
+    marcar_ocupada_en_lista(subredes_ocupadas6, *red_elegida)
+    return (int_to_ip6(red_elegida[0]), prefijo)
+
+# ============================================================================
+# LIBRO IPAM PERSISTENTE (SQLite)
+# ============================================================================
+
+class LibroIPAM:
+    """
+    Libro de asignaciones persistente en SQLite para que las subredes entregadas
+    sobrevivan entre ejecuciones. Guarda cada bloque con su propietario y proyecto,
+    y mantiene una tabla de rachas (bloques contiguos fusionados) indexada por inicio
+    para que cada búsqueda de solape sea logarítmica.
+    """
+    
+    def __init__(self, ruta, proyecto="default", propietario="desconocido"):
+        self.ruta = ruta
+        self.proyecto = proyecto
+        self.propietario = propietario
+        # isolation_level=None: las transacciones se controlan a mano con BEGIN IMMEDIATE
+        self.conexion = sqlite3.connect(ruta, timeout=30, isolation_level=None)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.executescript("""
+            CREATE TABLE IF NOT EXISTS bloques (
+                inicio INTEGER PRIMARY KEY,
+                fin INTEGER NOT NULL,
+                mascara INTEGER NOT NULL,
+                propietario TEXT NOT NULL,
+                proyecto TEXT NOT NULL,
+                estado TEXT NOT NULL,
+                creado REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_bloques_propietario ON bloques (propietario, proyecto);
+            CREATE TABLE IF NOT EXISTS rachas (
+                inicio INTEGER PRIMARY KEY,
+                fin INTEGER NOT NULL
+            );
+        """)
     
-    # Marcar la red como ocupada
-    subredes_ocupadas.append(red_elegida)
+    def cerrar(self):
+        self.conexion.close()
     
-    return (int_to_ip(red_elegida[0]), int_to_ip(red_elegida[1]))
+    def _bloque_ocupado(self, inicio, fin):
+        # Racha con el mayor inicio <= fin; al no solaparse entre sí, es la única candidata
+        fila = self.conexion.execute(
+            "SELECT inicio, fin FROM rachas WHERE inicio <= ? ORDER BY inicio DESC LIMIT 1", (fin,)
+        ).fetchone()
+        if fila and fila[1] >= inicio:
+            return fila
+        return None
+    
+    def _registrar(self, inicio, fin, mask, estado, propietario, proyecto):
+        self.conexion.execute(
+            "INSERT INTO bloques (inicio, fin, mascara, propietario, proyecto, estado, creado) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (inicio, fin, mask, propietario, proyecto, estado, time.time())
+        )
+        # Fusionar con las rachas contiguas (la anterior es la predecesora por inicio, búsqueda por la clave primaria)
+        anterior = self.conexion.execute(
+            "SELECT inicio, fin FROM rachas WHERE inicio <= ? ORDER BY inicio DESC LIMIT 1", (inicio - 1,)
+        ).fetchone()
+        if anterior and anterior[1] == inicio - 1:
+            self.conexion.execute("DELETE FROM rachas WHERE inicio = ?", (anterior[0],))
+            inicio = anterior[0]
+        siguiente = self.conexion.execute("SELECT fin FROM rachas WHERE inicio = ?", (fin + 1,)).fetchone()
+        if siguiente:
+            self.conexion.execute("DELETE FROM rachas WHERE inicio = ?", (fin + 1,))
+            fin = siguiente[0]
+        self.conexion.execute("INSERT INTO rachas (inicio, fin) VALUES (?, ?)", (inicio, fin))
+    
+    def _transaccion(self, operacion):
+        # BEGIN IMMEDIATE bloquea escrituras de otros procesos mientras se busca y registra
+        self.conexion.execute("BEGIN IMMEDIATE")
+        try:
+            resultado = operacion()
+        except Exception:
+            self.conexion.execute("ROLLBACK")
+            raise
+        self.conexion.execute("COMMIT")
+        return resultado
+    
+    def asignar(self, base_ip_int, mask, salto=1, propietario=None, proyecto=None):
+        """
+        Busca la subred libre número 'salto' y la registra como asignada (por defecto al propietario del libro)
+        Retorna (inicio, fin) como enteros o None si no hay espacio
+        """
+        def operacion():
+            rango = elegir_subred_libre(base_ip_int, mask, self._bloque_ocupado, salto)
+            if rango:
+                self._registrar(rango[0], rango[1], mask, "asignado",
+                                propietario or self.propietario, proyecto or self.proyecto)
+            return rango
+        return self._transaccion(operacion)
+    
+    def reservar(self, network, mask, propietario=None, proyecto=None):
+        """
+        Reserva un bloque concreto (ej: el bloque base de un proyecto) para que nadie más lo reciba
+        Retorna True si se reservó, False si se solapa con algo ya registrado
+        """
+        inicio = ip_to_int(network) & ~(2 ** (32 - mask) - 1) & 0xFFFFFFFF
+        fin = inicio + 2 ** (32 - mask) - 1
+        
+        def operacion():
+            ocupado = self._bloque_ocupado(inicio, fin)
+            if ocupado:
+                print(f"❌ Error: {network}/{mask} se solapa con {int_to_ip(ocupado[0])} - {int_to_ip(ocupado[1])}")
+                return False
+            self._registrar(inicio, fin, mask, "reservado", propietario or self.propietario, proyecto or self.proyecto)
+            return True
+        return self._transaccion(operacion)
+    
+    def liberar(self, network, mask):
+        """
+        Libera un bloque asignado o reservado. Retorna True si existía
+        """
+        inicio = ip_to_int(network)
+        
+        def operacion():
+            fila = self.conexion.execute(
+                "SELECT fin FROM bloques WHERE inicio = ? AND mascara = ?", (inicio, mask)
+            ).fetchone()
+            if not fila:
+                return False
+            fin = fila[0]
+            self.conexion.execute("DELETE FROM bloques WHERE inicio = ?", (inicio,))
+            # Partir la racha que contenía el bloque
+            racha = self._bloque_ocupado(inicio, fin)
+            self.conexion.execute("DELETE FROM rachas WHERE inicio = ?", (racha[0],))
+            if racha[0] < inicio:
+                self.conexion.execute("INSERT INTO rachas (inicio, fin) VALUES (?, ?)", (racha[0], inicio - 1))
+            if racha[1] > fin:
+                self.conexion.execute("INSERT INTO rachas (inicio, fin) VALUES (?, ?)", (fin + 1, racha[1]))
+            return True
+        return self._transaccion(operacion)
+    
+    def consultar_propietario(self, propietario, proyecto=None):
+        """
+        Lista los bloques de un propietario (opcionalmente filtrados por proyecto)
+        """
+        consulta = "SELECT inicio, fin, mascara, proyecto, estado, creado FROM bloques WHERE propietario = ?"
+        parametros = [propietario]
+        if proyecto is not None:
+            consulta += " AND proyecto = ?"
+            parametros.append(proyecto)
+        consulta += " ORDER BY inicio"
+        
+        return [
+            {
+                'red': int_to_ip(inicio),
+                'mascara': mascara,
+                'ultima': int_to_ip(fin),
+                'proyecto': proyecto_bloque,
+                'estado': estado,
+                'creado': creado
+            }
+            for inicio, fin, mascara, proyecto_bloque, estado, creado
+            in self.conexion.execute(consulta, parametros)
+        ]
+
+class ClienteIPAM:
+    """
+    Cliente del servicio IPAM compartido (servicio_ipam.py). Ofrece la misma interfaz
+    que LibroIPAM, así calcular_rango_subred lo usa en lugar de la lista en memoria
+    y la búsqueda y el registro ocurren de forma atómica en el servicio.
+    """
+    
+    def __init__(self, direccion, proyecto="default", propietario="desconocido"):
+        self.ruta = direccion
+        self.proyecto = proyecto
+        self.propietario = propietario
+        
+        # 'host:puerto' para TCP local o ruta de un socket Unix
+        if os.path.exists(direccion) or ':' not in direccion:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.connect(direccion)
+        else:
+            host, puerto = direccion.rsplit(':', 1)
+            self.socket = socket.create_connection((host, int(puerto)))
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.archivo = self.socket.makefile('rb')
+    
+    def cerrar(self):
+        self.archivo.close()
+        self.socket.close()
+    
+    def _peticion(self, datos):
+        datos.setdefault('propietario', self.propietario)
+        datos.setdefault('proyecto', self.proyecto)
+        self.socket.sendall(json.dumps(datos).encode() + b'\n')
+        linea = self.archivo.readline()
+        if not linea:
+            raise ConnectionError("El servicio IPAM cerró la conexión")
+        return json.loads(linea)
+    
+    def asignar(self, base_ip_int, mask, salto=1):
+        # El salto se sortea en el cliente con su propio generador sembrado
+        respuesta = self._peticion({
+            'op': 'asignar',
+            'base': int_to_ip(base_ip_int),
+            'mascara': mask,
+            'salto': salto
+        })
+        if not respuesta['ok']:
+            return None
+        return (ip_to_int(respuesta['red']), ip_to_int(respuesta['ultima']))
+    
+    def reservar(self, network, mask, propietario=None, proyecto=None):
+        respuesta = self._peticion({
+            'op': 'reservar',
+            'red': network,
+            'mascara': mask,
+            'propietario': propietario or self.propietario,
+            'proyecto': proyecto or self.proyecto
+        })
+        if not respuesta['ok']:
+            print(f"❌ Error: {respuesta['error']}")
+        return respuesta['ok']
+    
+    def liberar(self, network, mask):
+        return self._peticion({'op': 'liberar', 'red': network, 'mascara': mask})['ok']
+    
+    def consultar_propietario(self, propietario, proyecto=None):
+        return self._peticion({'op': 'consultar', 'propietario': propietario, 'proyecto': proyecto})['bloques']
+
+def seleccionar_registro_subredes():
+    """
+    Pregunta dónde se lleva el control de las subredes ocupadas:
+    en memoria, en un libro IPAM local o en el servicio IPAM compartido
+    """
+    while True:
+        print(f"\n🗄️ CONTROL DE SUBREDES OCUPADAS")
+        print("="*40)
+        print("1. 🧠 En memoria (solo esta ejecución)")
+        print("2. 🗄️ Libro IPAM persistente (SQLite local)")
+        print("3. 🌐 Servicio IPAM compartido (varios generadores a la vez)")
+        
+        opcion = validar_numero("Selecciona una opción (1-3): ")
+        
+        if opcion == 1:
+            return []
+        elif opcion in (2, 3):
+            if opcion == 2:
+                direccion = validar_texto("📁 Ruta del libro IPAM (ej: ipam.db): ")
+            else:
+                direccion = validar_texto("🌐 Dirección del servicio (host:puerto o ruta de socket Unix): ")
+            proyecto = validar_texto("📂 Nombre del proyecto: ")
+            propietario = validar_texto("👤 Propietario de las asignaciones: ")
+            try:
+                if opcion == 2:
+                    registro = LibroIPAM(direccion, proyecto, propietario)
+                else:
+                    registro = ClienteIPAM(direccion, proyecto, propietario)
+            except (OSError, sqlite3.Error) as e:
+                print(f"❌ Error: No se pudo abrir {direccion}: {e}")
+                continue
+            menu_libro_ipam(registro)
+            return registro
+        else:
+            print("❌ Error: Selecciona 1, 2 o 3.")
+
+def menu_libro_ipam(libro):
+    """
+    Menú para gestionar reservas, liberaciones y consultas del libro IPAM
+    """
+    while True:
+        print(f"\n🗄️ LIBRO IPAM: {libro.ruta} (proyecto {libro.proyecto}, propietario {libro.propietario})")
+        print("="*50)
+        print("1. 📌 Reservar bloque")
+        print("2. ♻️ Liberar bloque")
+        print("3. 👁️ Consultar bloques por propietario")
+        print("4. ✅ Continuar con la generación")
+        
+        opcion = validar_numero("Selecciona una opción (1-4): ")
+        
+        if opcion == 1:
+            network = validar_ip("Red a reservar (ej: 10.0.0.0): ")
+            mask = validar_mascara("Máscara del bloque (1-30): ")
+            if libro.reservar(network, mask):
+                print(f"✅ Bloque {network}/{mask} reservado para {libro.propietario}")
+        elif opcion == 2:
+            network = validar_ip("Red a liberar: ")
+            mask = validar_mascara("Máscara del bloque (1-30): ")
+            if libro.liberar(network, mask):
+                print(f"✅ Bloque {network}/{mask} liberado")
+            else:
+                print(f"❌ El bloque {network}/{mask} no está registrado en el libro.")
+        elif opcion == 3:
+            propietario = validar_texto("Propietario a consultar: ")
+            bloques = libro.consultar_propietario(propietario)
+            if bloques:
+                for bloque in bloques:
+                    print(f"   {bloque['red']}/{bloque['mascara']} [{bloque['estado']}] proyecto {bloque['proyecto']}")
+            else:
+                print(f"🗄️ {propietario} no tiene bloques registrados.")
+        elif opcion == 4:
+            break
+        else:
+            print("❌ Opción no válida. Selecciona 1, 2, 3 o 4.")
 
 # Función para validar si una IP y máscara son correctas
 def validar_ip_y_mascara(network, mask):
@@ -284,19 +775,28 @@ def validar_ip_y_mascara(network, mask):
     except ValueError:
         return False
 
-# Función para obtener IP usable según el offset
+# Función para obtener IP usable según el offset (negativo cuenta desde la última usable)
+# Se calcula con enteros en lugar de listar todos los hosts de la red
 def obtener_ip_usable(network, mask, offset):
-    network_obj = ipaddress.IPv4Network(f"{network}/{mask}", strict=False)
-    ips = list(network_obj.hosts())
+    tamano = 2 ** (32 - mask)
+    red_int = ip_to_int(network) & ~(tamano - 1)
     
-    if offset == -1:  # Última IP usable
-        return str(ips[-1])
+    if mask >= 31:  # /31 y /32 no reservan red ni broadcast
+        primera, num_hosts = red_int, tamano
     else:
-        return str(ips[offset])
+        primera, num_hosts = red_int + 1, tamano - 2
+    
+    indice = offset + num_hosts if offset < 0 else offset
+    if not 0 <= indice < num_hosts:
+        raise IndexError(f"La red {network}/{mask} no tiene IP usable en la posición {offset}")
+    return int_to_ip(primera + indice)
+
+# Máscaras en decimal punteado por longitud de prefijo (0-32), calculadas una sola vez
+MASCARAS_DECIMALES = tuple(int_to_ip((0xFFFFFFFF << (32 - prefijo)) & 0xFFFFFFFF) for prefijo in range(33))
 
 # Función para convertir máscara de prefijo a su representación decimal
 def convertir_mascara(mask):
-    return str(ipaddress.IPv4Network(f"0.0.0.0/{mask}").netmask)
+    return MASCARAS_DECIMALES[int(mask)]
 
 # Función para convertir máscara decimal a wildcard
 def convertir_a_wildcard(mascara_decimal):
@@ -307,23 +807,9 @@ def convertir_a_wildcard(mascara_decimal):
         wildcard_octetos.append(str(wildcard_octeto))
     return '.'.join(wildcard_octetos)
 
-# Función para configurar las redes entre routers (/30)
-def configurar_redes_entre_routers(num_redes, base_ip, subredes_ocupadas, aleatorio=False):
-    print(f"\nConfigurando {num_redes} redes entre routers (máscara /30):")
-    redes_routers = []
-    for _ in range(num_redes):
-        combo = calcular_rango_subred(base_ip, 30, subredes_ocupadas, aleatorio)
-        if combo:
-            ip_inicio = combo[0]
-            network = ipaddress.IPv4Network(f"{ip_inicio}/30", strict=False)
-            redes_routers.append((str(network.network_address), 30))
-        else:
-            print("No hay más espacio para redes entre routers.")
-            break
-    return redes_routers
-
 # Función para configurar combos de VLANs con asignación aleatoria
-def configurar_vlans(num_vlans, base_ip, subredes_ocupadas):
+# 'pcs_por_vlan' agranda la máscara de cada VLAN hasta que quepan sus PCs más los dos gateways
+def configurar_vlans(num_vlans, base_ip, subredes_ocupadas, rng=None, pcs_por_vlan=0):
     vlans = []
     
     # Tomamos por defecto que SÍ se usa asignación aleatoria para VLANs
@@ -333,12 +819,15 @@ def configurar_vlans(num_vlans, base_ip, subredes_ocupadas):
     for i in range(num_vlans):
         print(f"\n--- Configurando VLAN {i+2} ---")
         mask_vlan = validar_mascara(f'Introduce la máscara para la VLAN {i+2} (ej: 22, 23, etc.): ')
+        if pcs_por_vlan and mascara_para_hosts(pcs_por_vlan + 2) < mask_vlan:
+            print(f"📈 VLAN {i+2}: máscara /{mask_vlan} → /{mascara_para_hosts(pcs_por_vlan + 2)} para {pcs_por_vlan} PCs")
+            mask_vlan = mascara_para_hosts(pcs_por_vlan + 2)
         num_combos = validar_numero_positivo(f'¿Cuántos combos necesitas para la VLAN {i+2}?: ')
         
         # Crear más combos para elegir si se usa modo aleatorio
         combos = []
         for _ in range(num_combos):
-            combo = calcular_rango_subred(base_ip, mask_vlan, subredes_ocupadas, usar_aleatorio)
+            combo = calcular_rango_subred(base_ip, mask_vlan, subredes_ocupadas, usar_aleatorio, rng)
             if combo:
                 ip_inicio = combo[0]
                 network = ipaddress.IPv4Network(f"{ip_inicio}/{mask_vlan}", strict=False)
@@ -351,6 +840,108 @@ def configurar_vlans(num_vlans, base_ip, subredes_ocupadas):
     
     return vlans
 
+# ============================================================================
+# REGISTRO DE CONEXIONES ENTRE ROUTERS
+# ============================================================================
+
+class RegistroConexiones:
+    """
+    Registro de los enlaces entre routers con un índice de adyacencia por router y la
+    posición de cada router en el orden de configuración, para que buscar los vecinos de un
+    router o saber quién se configuró antes no obligue a recorrer todo el mapa de conexiones.
+    Las redes /30 se piden al asignador de subredes en el momento de crear cada enlace
+    (o la conexión Router ↔ SWC3), así no se reserva espacio que luego no se usa.
+    """
+    
+    def __init__(self, base_ip=None, subredes_ocupadas=None, aleatorio=False, rng=None, limite=None):
+        self.base_ip = base_ip
+        self.subredes_ocupadas = subredes_ocupadas
+        self.aleatorio = aleatorio
+        self.rng = rng
+        self.limite = limite  # Máximo de /30 a pedir al asignador (None = sin límite)
+        self.conexiones_mapa = {}  # {(r1, r2): (network, mask)} con r1 < r2
+        self.adyacencia = {}  # {router: {vecino: (r1, r2)}}
+        self.posiciones = {}  # {router: posición en el orden de configuración}
+        self.redes_30 = []  # /30 pedidas al asignador, en orden de asignación
+        self.redes_libres = []  # /30 devueltas al quitar una conexión; se reutilizan primero
+    
+    def __contains__(self, conexion_key):
+        return conexion_key in self.conexiones_mapa
+    
+    def registrar_router(self, router):
+        """
+        Registra el router en el orden de configuración (solo la primera vez)
+        """
+        self.posiciones.setdefault(router, len(self.posiciones))
+    
+    def configurado(self, router):
+        return router in self.posiciones
+    
+    def configurado_antes(self, router, otro_router):
+        """
+        True si router ya estaba configurado cuando se configuró otro_router
+        """
+        return self.configurado(router) and self.posiciones[router] < self.posiciones.get(otro_router, len(self.posiciones))
+    
+    def vecinos(self, router):
+        """
+        {vecino: clave de la conexión} de un router
+        """
+        return self.adyacencia.get(router, {})
+    
+    def conexiones_de(self, router):
+        """
+        Claves de las conexiones de un router, en el formato que espera validar_conexiones_nm4e
+        """
+        return list(self.vecinos(router).values())
+    
+    def tomar_red_30(self):
+        """
+        Siguiente red /30: una devuelta si la hay, si no una nueva del asignador
+        Retorna (network, 30) o None si no queda espacio o se alcanzó el límite
+        """
+        if self.redes_libres:
+            return self.redes_libres.pop(0)
+        if self.limite is not None and len(self.redes_30) >= self.limite:
+            return None
+        combo = calcular_rango_subred(self.base_ip, 30, self.subredes_ocupadas, self.aleatorio, self.rng)
+        if not combo:
+            return None
+        red = (combo[0], 30)
+        self.redes_30.append(red)
+        return red
+    
+    def conectar(self, router, otro_router, red=None):
+        """
+        Crea la conexión entre dos routers; sin red explícita toma una /30 en este momento
+        Retorna la red de la conexión o None si no hay redes disponibles
+        """
+        conexion_key = tuple(sorted([router, otro_router]))
+        if conexion_key in self.conexiones_mapa:
+            return self.conexiones_mapa[conexion_key]
+        if red is None:
+            red = self.tomar_red_30()
+            if red is None:
+                return None
+        self.conexiones_mapa[conexion_key] = red
+        self.adyacencia.setdefault(router, {})[otro_router] = conexion_key
+        self.adyacencia.setdefault(otro_router, {})[router] = conexion_key
+        return red
+    
+    def desconectar(self, router, otro_router):
+        """
+        Quita la conexión y deja su red disponible para la siguiente
+        Retorna la red liberada o None si la conexión no existía
+        """
+        conexion_key = tuple(sorted([router, otro_router]))
+        red = self.conexiones_mapa.pop(conexion_key, None)
+        if red is None:
+            return None
+        del self.adyacencia[router][otro_router]
+        del self.adyacencia[otro_router][router]
+        self.redes_libres.append(red)
+        return red
+
 # ============================================================================
 # FUNCIONES PARA RUTEO ESTÁTICO
 # ============================================================================
@@ -391,6 +982,256 @@ def encontrar_camino_mas_corto(grafo, origen, destino):
     
     return None  # No hay camino
 
+def calcular_matrices_topologia(grafo):
+    """
+    Matrices de todos los pares de routers de la topología (índice i = router i+1):
+      - saltos[i][j]: número de saltos de i a j (-1 si no es alcanzable)
+      - alcanzable[i][j]: True si hay camino
+      - primer_salto[i][j]: router vecino de i por el que se sale hacia j (0 si no hay camino o i == j)
+    El primer salto es el primer vecino (en el orden del grafo) que está un salto más cerca del destino,
+    que es exactamente el que elige encontrar_camino_mas_corto.
+    Con NumPy se calcula por lotes (arreglos); sin NumPy con un BFS por router (listas de listas)
+    """
+    nodos = sorted(grafo)
+    n = len(nodos)
+    
+    if np is None:
+        saltos = []
+        for origen in nodos:
+            fila = [-1] * n
+            fila[origen - 1] = 0
+            cola = deque([origen])
+            while cola:
+                actual = cola.popleft()
+                for vecino in grafo[actual]:
+                    if fila[vecino - 1] < 0:
+                        fila[vecino - 1] = fila[actual - 1] + 1
+                        cola.append(vecino)
+            saltos.append(fila)
+        
+        primer_salto = []
+        for origen in nodos:
+            fila = [0] * n
+            for destino in range(n):
+                distancia = saltos[origen - 1][destino]
+                if distancia > 0:
+                    fila[destino] = next(v for v in grafo[origen] if saltos[v - 1][destino] == distancia - 1)
+            primer_salto.append(fila)
+        
+        alcanzable = [[distancia >= 0 for distancia in fila] for fila in saltos]
+        return {'nodos': nodos, 'saltos': saltos, 'alcanzable': alcanzable, 'primer_salto': primer_salto}
+    
+    # Vecinos de cada router como matriz rellenada con el índice n (una fila ficticia siempre vacía).
+    # Los routers tienen pocas interfaces, así que el producto booleano frontera × adyacencia
+    # se hace como OR de las filas de los vecinos en lugar de multiplicar la matriz densa.
+    # El grafo no es dirigido, así que saltos y alcanzable son simétricas y da igual
+    # leer cada fila como origen o como destino
+    grado_max = max((len(grafo[r]) for r in nodos), default=0)
+    vecinos = np.full((n, max(grado_max, 1)), n, dtype=np.int64)
+    for r in nodos:
+        vecinos[r - 1, :len(grafo[r])] = [v - 1 for v in grafo[r]]
+    
+    saltos = np.full((n, n), -1, dtype=np.int32)
+    np.fill_diagonal(saltos, 0)
+    alcanzable = np.eye(n, dtype=bool)
+    frontera = np.zeros((n + 1, n), dtype=bool)
+    frontera[:n] = alcanzable
+    nivel = 0
+    while frontera.any():
+        nivel += 1
+        nueva = frontera[vecinos[:, 0]]
+        for columna in range(1, vecinos.shape[1]):
+            nueva |= frontera[vecinos[:, columna]]
+        nueva &= ~alcanzable
+        saltos[nueva] = nivel
+        alcanzable |= nueva
+        frontera[:n] = nueva
+    
+    # Primer salto: primer vecino v del origen con saltos[v][destino] == saltos[origen][destino] - 1
+    saltos_ext = np.vstack([saltos, np.full((1, n), -3, dtype=np.int32)])
+    candidatos = saltos_ext[vecinos] == (saltos - 1)[:, None, :]
+    primero = candidatos.argmax(axis=1)
+    primer_salto = np.where((saltos > 0) & candidatos.any(axis=1),
+                            np.take_along_axis(vecinos, primero, axis=1) + 1, 0)
+    
+    return {'nodos': nodos, 'saltos': saltos, 'alcanzable': alcanzable, 'primer_salto': primer_salto}
+
+def resumir_topologia(matrices):
+    """
+    Diámetro, saltos promedio entre pares alcanzables y particiones (componentes conexas)
+    a partir de calcular_matrices_topologia
+    """
+    nodos = matrices['nodos']
+    if np is not None:
+        saltos = matrices['saltos']
+        fuera_diagonal = saltos > 0
+        diametro = int(saltos.max()) if len(nodos) else 0
+        promedio = float(saltos[fuera_diagonal].mean()) if fuera_diagonal.any() else 0.0
+        # Cada partición se identifica por el primer router alcanzable de la fila
+        etiquetas = matrices['alcanzable'].argmax(axis=1).tolist()
+    else:
+        distancias = [d for fila in matrices['saltos'] for d in fila if d > 0]
+        diametro = max(distancias, default=0)
+        promedio = sum(distancias) / len(distancias) if distancias else 0.0
+        etiquetas = [fila.index(True) for fila in matrices['alcanzable']]
+    
+    particiones = {}
+    for nodo, etiqueta in zip(nodos, etiquetas):
+        particiones.setdefault(etiqueta, []).append(nodo)
+    
+    return {
+        'diametro': diametro,
+        'saltos_promedio': promedio,
+        'particiones': sorted(particiones.values())
+    }
+
+def particionar_areas_ospf(grafo, max_routers_area):
+    """
+    Reparte los routers en áreas OSPF conexas de como máximo max_routers_area routers,
+    todas colgando del área 0. Retorna {router: area} con las áreas como texto.
+    Heurística por cada componente conexa de la topología:
+      1. El área 0 crece por BFS desde el router más central (menor excentricidad)
+      2. El resto forma un bosque BFS cuyas raíces tocan el área 0; si un árbol no cabe
+         en un área, su raíz pasa al área 0 y sus hijos se convierten en raíces
+      3. Los árboles vecinos se fusionan (de menor a mayor) mientras quepan en un área
+      4. Si quedan enlaces entre dos áreas no troncales, el extremo más cercano al área 0 pasa
+         al área 0 con su camino hasta ella y se repiten los pasos 2 y 3; ningún router queda
+         en dos áreas no troncales (todo enlace entre áreas toca el área 0)
+    El área 0 puede pasar del límite cuando hay ramas demasiado largas o áreas entrelazadas
+    """
+    matrices = calcular_matrices_topologia(grafo)
+    saltos = matrices['saltos']
+    if np is not None:
+        saltos = saltos.tolist()
+    
+    areas = {}
+    siguiente_area = 1
+    for componente in resumir_topologia(matrices)['particiones']:
+        centro = min(componente, key=lambda r: (max(saltos[r - 1][o - 1] for o in componente), r))
+        
+        # 1. Área 0 inicial: los routers más cercanos al centro
+        troncal = []
+        cola = deque([centro])
+        vistos = {centro}
+        while cola and len(troncal) < max_routers_area:
+            actual = cola.popleft()
+            troncal.append(actual)
+            for vecino in sorted(grafo[actual]):
+                if vecino not in vistos:
+                    vistos.add(vecino)
+                    cola.append(vecino)
+        troncal = set(troncal)
+        
+        while True:
+            # 2. Bosque BFS desde el área 0 hasta que todos los árboles quepan en un área
+            while True:
+                raiz_de, padre, profundidad = {}, {}, {}
+                cola = deque(sorted(troncal))
+                while cola:
+                    actual = cola.popleft()
+                    for vecino in sorted(grafo[actual]):
+                        if vecino not in troncal and vecino not in raiz_de:
+                            raiz_de[vecino] = vecino if actual in troncal else raiz_de[actual]
+                            padre[vecino] = actual
+                            profundidad[vecino] = profundidad.get(actual, 0) + 1
+                            cola.append(vecino)
+                
+                arboles = {}
+                for router, raiz in raiz_de.items():
+                    arboles.setdefault(raiz, set()).add(router)
+                demasiado_grandes = [raiz for raiz, miembros in arboles.items() if len(miembros) > max_routers_area]
+                if not demasiado_grandes:
+                    break
+                troncal.update(demasiado_grandes)
+            
+            # 3. Fusionar árboles vecinos pequeños
+            grupos = {raiz: set(miembros) for raiz, miembros in arboles.items()}
+            grupo_de = dict(raiz_de)
+            for raiz in sorted(arboles, key=lambda raiz: (len(arboles[raiz]), raiz)):
+                grupo = grupo_de[raiz]
+                vecinos = sorted({grupo_de[v] for miembro in grupos[grupo] for v in grafo[miembro]
+                                  if v in grupo_de and grupo_de[v] != grupo},
+                                 key=lambda otro: (len(grupos[otro]), otro))
+                for otro in vecinos:
+                    if len(grupos[grupo]) + len(grupos[otro]) <= max_routers_area:
+                        for miembro in grupos[otro]:
+                            grupo_de[miembro] = grupo
+                        grupos[grupo] |= grupos.pop(otro)
+            
+            # 4. Un enlace entre dos áreas no troncales que no caben juntas: su extremo más cercano
+            #    al área 0 pasa al área 0 junto con su camino hasta ella (el área 0 sigue siendo contigua)
+            #    y se vuelve a armar el bosque; así todo enlace entre áreas toca el área 0
+            cruce = min(((a, b) for a in grupo_de for b in grafo[a]
+                         if b in grupo_de and grupo_de[a] != grupo_de[b]),
+                        key=lambda enlace: min((profundidad[enlace[0]], enlace[0]), (profundidad[enlace[1]], enlace[1])),
+                        default=None)
+            if cruce is None:
+                break
+            router = min(cruce, key=lambda r: (profundidad[r], r))
+            while router not in troncal:
+                troncal.add(router)
+                router = padre[router]
+        
+        for router in troncal:
+            areas[router] = "0"
+        for miembros in sorted(grupos.values(), key=min):
+            for router in miembros:
+                areas[router] = str(siguiente_area)
+            siguiente_area += 1
+    
+    return areas
+
+# Tipos de ruta estática: la descripción de cada ruta se arma al renderizar a partir
+# del tipo y de los ids de router / VLAN, en lugar de guardar un texto por ruta
+RUTA_VLAN_PROPIA, RUTA_ADMIN_SWC3, RUTA_ADMIN_ROUTER, RUTA_VLAN, RUTA_ENLACE_SWC3, RUTA_ENLACE = range(6)
+PLANTILLAS_DESCRIPCION_RUTA = (
+    "VLAN {1} propia via SWC3_R{0}",
+    "Red administrativa SWC3_R{0}",
+    "Red administrativa Router {0}",
+    "VLAN {1} de Router {0}",
+    "Red /30 entre Router {0} y SWC3_R{0}",
+    "Red /30 entre Router {0} y Router {1}",
+)
+
+class RutaEstatica:
+    """
+    Ruta estática compacta: red, longitud de prefijo y siguiente salto como enteros,
+    y la descripción como (tipo, id_a, id_b). Los textos se generan solo al renderizar
+    """
+    __slots__ = ('red', 'prefijo', 'next_hop', 'tipo', 'id_a', 'id_b', 'ipv6')
+    
+    def __init__(self, red, prefijo, next_hop, tipo, id_a, id_b=0, ipv6=False):
+        self.red = red
+        self.prefijo = prefijo
+        self.next_hop = next_hop
+        self.tipo = tipo
+        self.id_a = id_a
+        self.id_b = id_b
+        self.ipv6 = ipv6
+    
+    @property
+    def descripcion(self):
+        return descripcion_ruta(self.tipo, self.id_a, self.id_b, self.ipv6)
+    
+    def comando(self):
+        if self.ipv6:
+            return f"ipv6 route {texto_ip(self.red, True)}/{self.prefijo} {texto_ip(self.next_hop, True)}"
+        if self.tipo in (RUTA_ADMIN_ROUTER, RUTA_ADMIN_SWC3):
+            # La red administrativa se escribe como en las interfaces (192.168.X.0 con el número de router)
+            return f"ip route 192.168.{self.id_a}.0 255.255.255.0 {texto_ip(self.next_hop)}"
+        return f"ip route {texto_ip(self.red)} {MASCARAS_DECIMALES[self.prefijo]} {texto_ip(self.next_hop)}"
+
+# Las mismas redes, siguientes saltos y descripciones se repiten en las rutas de todos los
+# routers: sus textos se cachean al renderizar en lugar de guardarse en cada ruta
+@functools.lru_cache(maxsize=1 << 16)
+def texto_ip(entero, ipv6=False):
+    return int_to_ip6(entero) if ipv6 else int_to_ip(entero)
+
+@functools.lru_cache(maxsize=1 << 16)
+def descripcion_ruta(tipo, id_a, id_b, ipv6=False):
+    descripcion = PLANTILLAS_DESCRIPCION_RUTA[tipo].format(id_a, id_b)
+    return f"{descripcion} (IPv6)" if ipv6 else descripcion
+
 def obtener_ip_conexion_entre_routers(router1, router2, conexiones_mapa, es_primer_router_dict):
     """
     Obtiene la IP de la interfaz de router1 hacia router2
@@ -410,164 +1251,157 @@ def obtener_ip_conexion_entre_routers(router1, router2, conexiones_mapa, es_prim
     
     return ip_router1
 
-def calcular_rutas_estaticas(conexiones_mapa, router_vlans_asignadas, num_routers, routers_con_swc3, swc3_configuraciones):
+def redes_destino_de_router(router_destino, router_vlans_asignadas, swc3_configuraciones):
+    """
+    Redes de un router que los demás alcanzan por el mismo siguiente salto:
+    administrativa, VLANs y administrativa del SWC3. Retorna (red_int, prefijo, tipo, id_a, id_b)
+    """
+    redes = [(ip_to_int(f"192.168.{router_destino}.0"), 24, RUTA_ADMIN_ROUTER, router_destino, 0)]
+    for vlan_id, (network, mask) in router_vlans_asignadas.get(router_destino, {}).items():
+        redes.append((ip_to_int(network), mask, RUTA_VLAN, router_destino, vlan_id))
+    if router_destino in swc3_configuraciones:
+        redes.append((ip_to_int(f"192.168.{router_destino}.0"), 24, RUTA_ADMIN_SWC3, router_destino, 0))
+    return redes
+
+def calcular_rutas_estaticas(conexiones_mapa, router_vlans_asignadas, num_routers, routers_con_swc3, swc3_configuraciones, primer_salto_destinos=None, cache=True):
     """
     Calcula automáticamente todas las rutas estáticas necesarias para cada router
+    primer_salto_destinos: matriz de primeros saltos hacia las redes de cada router (ver
+    planificar_rutas_por_carga); las redes /30 entre routers siguen los caminos de menos saltos
+    Si la topología ya se calculó antes, las tablas salen de CACHE_RUTAS sin recalcular;
+    cache=False no la consulta ni la llena (tablas que no son las rutas de ningún plan)
+    Retorna ({router: [RutaEstatica]}, {router_con_swc3: [RutaEstatica]})
     """
     print(f"\n🔄 CALCULANDO RUTAS ESTÁTICAS AUTOMÁTICAMENTE...")
     print("="*50)
     
-    # Construir grafo de topología
+    # Misma topología que una ejecución anterior: se reutilizan las tablas de la caché en disco
+    huella = None
+    if cache and CACHE_RUTAS is not None:
+        huella = huella_topologia(conexiones_mapa, router_vlans_asignadas, num_routers,
+                                  routers_con_swc3, swc3_configuraciones, primer_salto_destinos)
+        rutas_en_cache = CACHE_RUTAS.obtener(huella)
+        if rutas_en_cache is not None:
+            print(f"♻️ Topología sin cambios (huella {huella[:12]}): rutas estáticas recuperadas de la caché\n")
+            return rutas_en_cache
+    
+    # Construir grafo de topología y las matrices de saltos / primer salto de todos los pares
     grafo = construir_grafo_topologia(conexiones_mapa, num_routers)
+    matrices = calcular_matrices_topologia(grafo)
+    saltos, primer_salto = matrices['saltos'], matrices['primer_salto']
+    if np is not None:
+        # El recorrido por pares es en Python: se consulta más rápido sobre listas
+        saltos, primer_salto = saltos.tolist(), primer_salto.tolist()
+    if primer_salto_destinos is None:
+        primer_salto_destinos = primer_salto
     
     # Diccionario para guardar si un router es el "primer router" en cada conexión
-    es_primer_router_dict = {}
-    for router_num in range(1, num_routers + 1):
-        es_primer_router_dict[router_num] = {}
-        for (r1, r2), _ in conexiones_mapa.items():
-            if router_num in (r1, r2):
-                otro_router = r2 if r1 == router_num else r1
-                es_primer_router_dict[router_num][otro_router] = (r1, r2)[0] == router_num
+    # (una sola pasada por el mapa: cada conexión se anota en sus dos extremos)
+    es_primer_router_dict = {router_num: {} for router_num in range(1, num_routers + 1)}
+    for r1, r2 in conexiones_mapa:
+        es_primer_router_dict.setdefault(r1, {})[r2] = True
+        es_primer_router_dict.setdefault(r2, {})[r1] = False
+    
+    # Las redes de destino son las mismas para todos los orígenes (solo cambia el siguiente salto):
+    # se convierten a enteros una sola vez y todas las rutas comparten esos valores
+    redes_destino = {r: redes_destino_de_router(r, router_vlans_asignadas, swc3_configuraciones)
+                     for r in range(1, num_routers + 1)}
+    redes_swc3 = {r: (ip_to_int(config['red_conexion'][0]), config['red_conexion'][1])
+                  for r, config in swc3_configuraciones.items()}
+    redes_enlace = [(r1, r2, ip_to_int(network_30), mask_30) for (r1, r2), (network_30, mask_30) in conexiones_mapa.items()]
     
     rutas_estaticas = {}
     
     for router_origen in range(1, num_routers + 1):
-        rutas_estaticas[router_origen] = []
+        rutas = rutas_estaticas[router_origen] = []
         
         print(f"🖥️ Calculando rutas para Router {router_origen}...")
         
+        # IP (entera) de cada vecino usado como siguiente salto desde este router
+        ips_salto = {}
+        
+        def ip_siguiente_salto(next_hop_router):
+            if next_hop_router not in ips_salto:
+                ip = obtener_ip_conexion_entre_routers(next_hop_router, router_origen, conexiones_mapa, es_primer_router_dict)
+                ips_salto[next_hop_router] = ip_to_int(ip) if ip is not None else None
+            return ips_salto[next_hop_router]
+        
         # CORRECCIÓN: Agregar rutas hacia las propias VLANs si el router tiene SWC3
         if router_origen in swc3_configuraciones:
             swc3_config = swc3_configuraciones[router_origen]
             swc3_ip = swc3_config['ip_hacia_router']  # IP del SWC3
+            swc3_ip_int = ip_to_int(swc3_ip)
             
             print(f"   📡 Router {router_origen} tiene SWC3 - agregando rutas hacia VLANs propias")
             
             # Agregar rutas hacia las VLANs propias del router
             if router_origen in router_vlans_asignadas:
                 for vlan_id, (network, mask) in router_vlans_asignadas[router_origen].items():
-                    mascara_decimal = convertir_mascara(mask)
-                    rutas_estaticas[router_origen].append({
-                        'red': network,
-                        'mascara': mascara_decimal,
-                        'next_hop': swc3_ip,
-                        'descripcion': f"VLAN {vlan_id} propia via SWC3_R{router_origen}"
-                    })
+                    rutas.append(RutaEstatica(ip_to_int(network), mask, swc3_ip_int, RUTA_VLAN_PROPIA, router_origen, vlan_id))
                     print(f"      ✓ Ruta agregada: {network}/{mask} via {swc3_ip}")
+            
+            # La red administrativa también vive en el SWC3 (int vlan 1)
+            rutas.append(RutaEstatica(ip_to_int(f"192.168.{router_origen}.0"), 24, swc3_ip_int, RUTA_ADMIN_SWC3, router_origen))
         
         # Para cada otro router, calcular rutas a sus redes
         for router_destino in range(1, num_routers + 1):
             if router_origen == router_destino:
                 continue
             
-            # Encontrar camino más corto
-            camino = encontrar_camino_mas_corto(grafo, router_origen, router_destino)
+            # El next-hop es el segundo router del camino más corto (o del planificado por carga)
+            next_hop_router = primer_salto_destinos[router_origen - 1][router_destino - 1]
             
-            if camino is None or len(camino) < 2:
+            if not next_hop_router:
                 print(f"   ⚠️ No hay camino al Router {router_destino}")
                 continue
             
-            # El next-hop es el segundo router en el camino
-            next_hop_router = camino[1]
-            
             # Obtener IP del next-hop
-            next_hop_ip = obtener_ip_conexion_entre_routers(
-                next_hop_router, router_origen, conexiones_mapa, es_primer_router_dict
-            )
+            next_hop_ip = ip_siguiente_salto(next_hop_router)
             
             if next_hop_ip is None:
                 print(f"   ❌ No se pudo obtener IP del next-hop hacia Router {router_destino}")
                 continue
             
-            # Agregar ruta a la red administrativa del router destino
-            red_admin = f"192.168.{router_destino}.0"
-            mascara_admin = "255.255.255.0"
-            rutas_estaticas[router_origen].append({
-                'red': red_admin,
-                'mascara': mascara_admin,
-                'next_hop': next_hop_ip,
-                'descripcion': f"Red administrativa Router {router_destino}"
-            })
-            
-            # Agregar rutas a las VLANs del router destino
-            if router_destino in router_vlans_asignadas:
-                for vlan_id, (network, mask) in router_vlans_asignadas[router_destino].items():
-                    mascara_decimal = convertir_mascara(mask)
-                    rutas_estaticas[router_origen].append({
-                        'red': network,
-                        'mascara': mascara_decimal,
-                        'next_hop': next_hop_ip,
-                        'descripcion': f"VLAN {vlan_id} de Router {router_destino}"
-                    })
-            
-            # Agregar rutas hacia redes de SWC3 del router destino
-            if router_destino in swc3_configuraciones:
-                swc3_config = swc3_configuraciones[router_destino]
-                # Ruta hacia la red administrativa del SWC3
-                rutas_estaticas[router_origen].append({
-                    'red': f"192.168.{router_destino}.0",
-                    'mascara': "255.255.255.0", 
-                    'next_hop': next_hop_ip,
-                    'descripcion': f"Red administrativa SWC3_R{router_destino}"
-                })
+            # Red administrativa, VLANs y red administrativa del SWC3 del router destino
+            for red, prefijo, tipo, id_a, id_b in redes_destino[router_destino]:
+                rutas.append(RutaEstatica(red, prefijo, next_hop_ip, tipo, id_a, id_b))
         
         # Agregar rutas hacia redes /30 Router-SWC3 (solo si no es directamente conectado)
-        for router_swc3, swc3_config in swc3_configuraciones.items():
+        for router_swc3, (red_swc3, mask_swc3) in redes_swc3.items():
             if router_origen != router_swc3:
-                # Encontrar camino hacia el router que tiene el SWC3
-                camino = encontrar_camino_mas_corto(grafo, router_origen, router_swc3)
+                # Primer salto del camino hacia el router que tiene el SWC3
+                next_hop_router = primer_salto_destinos[router_origen - 1][router_swc3 - 1]
                 
-                if camino and len(camino) >= 2:
-                    next_hop_router = camino[1]
-                    next_hop_ip = obtener_ip_conexion_entre_routers(
-                        next_hop_router, router_origen, conexiones_mapa, es_primer_router_dict
-                    )
+                if next_hop_router:
+                    next_hop_ip = ip_siguiente_salto(next_hop_router)
                     
                     if next_hop_ip:
                         # Ruta hacia la red /30 entre Router y SWC3
-                        network_router_swc3, mask_router_swc3 = swc3_config['red_conexion']
-                        mascara_decimal = convertir_mascara(mask_router_swc3)
-                        rutas_estaticas[router_origen].append({
-                            'red': network_router_swc3,
-                            'mascara': mascara_decimal,
-                            'next_hop': next_hop_ip,
-                            'descripcion': f"Red /30 entre Router {router_swc3} y SWC3_R{router_swc3}"
-                        })
+                        rutas.append(RutaEstatica(red_swc3, mask_swc3, next_hop_ip, RUTA_ENLACE_SWC3, router_swc3))
         
         # Agregar rutas a redes /30 entre routers (solo las que no están directamente conectadas)
-        for (r1, r2), (network_30, mask_30) in conexiones_mapa.items():
+        for r1, r2, red_30, mask_30 in redes_enlace:
             # Si este router no está en la conexión /30, necesita una ruta para alcanzarla
             if router_origen not in (r1, r2):
-                # Encontrar camino a cualquiera de los dos routers de la conexión
-                camino_r1 = encontrar_camino_mas_corto(grafo, router_origen, r1)
-                camino_r2 = encontrar_camino_mas_corto(grafo, router_origen, r2)
+                # Elegir el más cercano de los dos routers de la conexión
+                saltos_r1 = saltos[router_origen - 1][r1 - 1]
+                saltos_r2 = saltos[router_origen - 1][r2 - 1]
                 
-                # Elegir el camino más corto
-                if camino_r1 and camino_r2:
-                    camino = camino_r1 if len(camino_r1) <= len(camino_r2) else camino_r2
-                elif camino_r1:
-                    camino = camino_r1
-                elif camino_r2:
-                    camino = camino_r2
+                if saltos_r1 > 0 and (saltos_r2 < 0 or saltos_r1 <= saltos_r2):
+                    router_cercano = r1
+                elif saltos_r2 > 0:
+                    router_cercano = r2
                 else:
                     continue
                 
-                if len(camino) >= 2:
-                    next_hop_router = camino[1]
-                    next_hop_ip = obtener_ip_conexion_entre_routers(
-                        next_hop_router, router_origen, conexiones_mapa, es_primer_router_dict
-                    )
+                next_hop_router = primer_salto[router_origen - 1][router_cercano - 1]
+                if next_hop_router:
+                    next_hop_ip = ip_siguiente_salto(next_hop_router)
                     
                     if next_hop_ip:
-                        mascara_30_decimal = convertir_mascara(mask_30)
-                        rutas_estaticas[router_origen].append({
-                            'red': network_30,
-                            'mascara': mascara_30_decimal,
-                            'next_hop': next_hop_ip,
-                            'descripcion': f"Red /30 entre Router {r1} y Router {r2}"
-                        })
+                        rutas.append(RutaEstatica(red_30, mask_30, next_hop_ip, RUTA_ENLACE, r1, r2))
         
-        print(f"   ✅ {len(rutas_estaticas[router_origen])} rutas calculadas")
+        print(f"   ✅ {len(rutas)} rutas calculadas")
     
     # Calcular rutas estáticas específicas para cada SWC3
     rutas_estaticas_swc3 = {}
@@ -576,65 +1410,35 @@ def calcular_rutas_estaticas(conexiones_mapa, router_vlans_asignadas, num_router
         if not tiene_swc3:  # Solo procesar routers que SÍ tienen SWC3
             continue
             
-        rutas_estaticas_swc3[router_swc3] = []
+        rutas = rutas_estaticas_swc3[router_swc3] = []
         swc3_config = swc3_configuraciones[router_swc3]
-        router_ip = obtener_ip_usable(swc3_config['red_conexion'][0], swc3_config['red_conexion'][1], 0)  # IP del router
+        # Todas las rutas del SWC3 van via su router asociado
+        router_ip = ip_to_int(obtener_ip_usable(swc3_config['red_conexion'][0], swc3_config['red_conexion'][1], 0))
         
         print(f"🔧 Calculando rutas para SWC3_R{router_swc3}...")
         
-        # Para cada otro router, calcular rutas a sus redes
+        # Para cada otro router: red administrativa y VLANs (la administrativa del SWC3 no)
         for router_destino in range(1, num_routers + 1):
             if router_swc3 == router_destino:
                 continue
-            
-            # Todas las rutas del SWC3 van via su router asociado
-            next_hop_ip = router_ip
-            
-            # Agregar ruta a la red administrativa del router destino
-            red_admin = f"192.168.{router_destino}.0"
-            mascara_admin = "255.255.255.0"
-            rutas_estaticas_swc3[router_swc3].append({
-                'red': red_admin,
-                'mascara': mascara_admin,
-                'next_hop': next_hop_ip,
-                'descripcion': f"Red administrativa Router {router_destino}"
-            })
-            
-            # Agregar rutas a las VLANs del router destino
-            if router_destino in router_vlans_asignadas:
-                for vlan_id, (network, mask) in router_vlans_asignadas[router_destino].items():
-                    mascara_decimal = convertir_mascara(mask)
-                    rutas_estaticas_swc3[router_swc3].append({
-                        'red': network,
-                        'mascara': mascara_decimal,
-                        'next_hop': next_hop_ip,
-                        'descripcion': f"VLAN {vlan_id} de Router {router_destino}"
-                    })
-        
-        # Agregar rutas hacia redes /30 entre routers (todas via router asociado)
-        for (r1, r2), (network_30, mask_30) in conexiones_mapa.items():
-            if router_swc3 not in (r1, r2):  # Si el SWC3 no está en la conexión
-                mascara_30_decimal = convertir_mascara(mask_30)
-                rutas_estaticas_swc3[router_swc3].append({
-                    'red': network_30,
-                    'mascara': mascara_30_decimal,
-                    'next_hop': router_ip,
-                    'descripcion': f"Red /30 entre Router {r1} y Router {r2}"
-                })
+            for red, prefijo, tipo, id_a, id_b in redes_destino[router_destino]:
+                if tipo != RUTA_ADMIN_SWC3:
+                    rutas.append(RutaEstatica(red, prefijo, router_ip, tipo, id_a, id_b))
+        
+        # Agregar rutas hacia redes /30 entre routers (todas via router asociado,
+        # incluidas las de su propio router: el SWC3 no está conectado a ninguna)
+        for r1, r2, red_30, mask_30 in redes_enlace:
+            rutas.append(RutaEstatica(red_30, mask_30, router_ip, RUTA_ENLACE, r1, r2))
         
         # Agregar rutas hacia otras redes /30 Router-SWC3
-        for router_otro_swc3, otro_swc3_config in swc3_configuraciones.items():
+        for router_otro_swc3, (red_swc3, mask_swc3) in redes_swc3.items():
             if router_swc3 != router_otro_swc3:
-                network_router_swc3, mask_router_swc3 = otro_swc3_config['red_conexion']
-                mascara_decimal = convertir_mascara(mask_router_swc3)
-                rutas_estaticas_swc3[router_swc3].append({
-                    'red': network_router_swc3,
-                    'mascara': mascara_decimal,
-                    'next_hop': router_ip,
-                    'descripcion': f"Red /30 entre Router {router_otro_swc3} y SWC3_R{router_otro_swc3}"
-                })
+                rutas.append(RutaEstatica(red_swc3, mask_swc3, router_ip, RUTA_ENLACE_SWC3, router_otro_swc3))
         
-        print(f"   ✅ {len(rutas_estaticas_swc3[router_swc3])} rutas calculadas para SWC3_R{router_swc3}")
+        print(f"   ✅ {len(rutas)} rutas calculadas para SWC3_R{router_swc3}")
+    
+    if huella is not None:
+        CACHE_RUTAS.guardar(huella, rutas_estaticas, rutas_estaticas_swc3)
     
     print("✅ Cálculo de rutas estáticas completado\n")
     return rutas_estaticas, rutas_estaticas_swc3
@@ -651,75 +1455,961 @@ def generar_comandos_rutas_estaticas(rutas_estaticas):
     comandos.append("! -- CONFIGURACIÓN DE RUTAS ESTÁTICAS --")
     
     for ruta in rutas_estaticas:
-        red = ruta['red']
-        mascara = ruta['mascara']
-        next_hop = ruta['next_hop']
-        descripcion = ruta['descripcion']
-        
-        comandos.append(f"! {descripcion}")
-        comandos.append(f"ip route {red} {mascara} {next_hop}")
+        comandos.append(f"! {ruta.descripcion}")
+        comandos.append(ruta.comando())
     
     return comandos
 
 # ============================================================================
+# VERIFICACIÓN DE REENVÍO (LONGEST PREFIX MATCH)
+# ============================================================================
 
-# Función para generar comandos de configuración de interfaz
-def configurar_interface(interface, ip, mascara):
-    return [
-        f"int {interface}",
-        f"ip add {ip} {mascara}",
-        "no shut"
-    ]
+# Límite de ejemplos que se muestran por cada tipo de problema en el reporte
+MAX_EJEMPLOS_REPORTE = 10
 
-# Función para generar comandos de configuración de switch
-def generar_comandos_switch(router_num, todas_vlans):
-    comandos = [
-        "en",
-        "conf t",
-        f"hostname SWITCH{router_num}",
-        "ip domain-name cisco",
-        "crypto key generate rsa general-keys modulus 512",
-        "line vty 0 5",
-        "transport input ssh",
-        "login local",
-        "exit",
-        "username admin privilege 15 password cisco",
-        "enable secret cisco"
-    ]
+class TrieRutas:
+    """
+    Tabla de ruteo IPv4 como trie Patricia (binario comprimido):
+    cada nodo es [red, prefijo, valor, hijo_0, hijo_1] y solo existen los nodos
+    de las rutas y los de bifurcación, así una búsqueda recorre pocos nodos
+    """
+    def __init__(self):
+        self.raiz = [0, 0, None, None, None]
     
-    # Comandos para crear VLANs
-    for vlan_id, _ in todas_vlans:
-        vlan_name = {2: "dos", 3: "tres", 4: "cuatro", 5: "cinco", 6: "seis", 7: "siete", 8: "ocho", 9: "nueve", 10: "diez"}.get(vlan_id, f"vlan{vlan_id}")
-        comandos.append(f"VLAN {vlan_id}")
-        comandos.append(f"name {vlan_name}")
+    def insertar(self, red, prefijo, valor):
+        red &= (0xFFFFFFFF << (32 - prefijo)) & 0xFFFFFFFF
+        nodo = self.raiz
+        while True:
+            if nodo[1] == prefijo:
+                nodo[2] = valor
+                return
+            
+            rama = 3 + ((red >> (31 - nodo[1])) & 1)
+            hijo = nodo[rama]
+            if hijo is None:
+                nodo[rama] = [red, prefijo, valor, None, None]
+                return
+            
+            # Bits en común entre la nueva ruta y el hijo (sin pasar del prefijo de ninguno)
+            limite = prefijo if prefijo < hijo[1] else hijo[1]
+            comun = 32 - (red ^ hijo[0]).bit_length()
+            if comun > limite:
+                comun = limite
+            
+            if comun == hijo[1]:
+                nodo = hijo
+                continue
+            
+            if comun == prefijo:
+                # La nueva ruta contiene al hijo: se intercala entre ambos
+                nuevo = [red, prefijo, valor, None, None]
+                nuevo[3 + ((hijo[0] >> (31 - prefijo)) & 1)] = hijo
+            else:
+                # Divergen antes: nodo de bifurcación sin valor con ambos como hijos
+                nuevo = [red & ((0xFFFFFFFF << (32 - comun)) & 0xFFFFFFFF), comun, None, None, None]
+                nuevo[3 + ((hijo[0] >> (31 - comun)) & 1)] = hijo
+                nuevo[3 + ((red >> (31 - comun)) & 1)] = [red, prefijo, valor, None, None]
+            nodo[rama] = nuevo
+            return
     
-    # Configuraciones de puertos
-    comandos.extend([
-        "int fa0/1",
-        "switchport mode trunk",
-        "int fa0/2",
-        "switchport mode access",
-        "switchport access vlan " if len(todas_vlans) >= 2 else "switchport access vlan 2",
-        "int fa0/3",
-        "switchport mode access",
-        "switchport access vlan " if len(todas_vlans) >= 2 else "switchport access vlan 2",
-        "int fa0/4",
-        "switchport mode access",
-        "switchport access vlan ",
-        "exit"
-    ])
+    def buscar(self, ip_int):
+        """
+        Retorna el valor de la ruta más específica que contiene ip_int (o None)
+        """
+        nodo = self.raiz
+        mejor = nodo[2]
+        while nodo[1] < 32:
+            hijo = nodo[3 + ((ip_int >> (31 - nodo[1])) & 1)]
+            if hijo is None or (ip_int ^ hijo[0]) >> (32 - hijo[1]):
+                break
+            nodo = hijo
+            if nodo[2] is not None:
+                mejor = nodo[2]
+        return mejor
+
+def construir_tablas_reenvio(plan):
+    """
+    Construye la tabla de reenvío de cada router y SWC3 del plan (redes conectadas + rutas estáticas IPv4)
+    Retorna (tablas, propietarios, destinos, gateways_vlan):
+      - tablas: {dispositivo: TrieRutas}
+      - propietarios: {ip_int: dispositivo} de todas las interfaces
+      - destinos: {(red_int, prefijo): descripcion} de todas las redes conectadas
+      - gateways_vlan: lista de (descripcion, dispositivo, red_int, prefijo) por cada VLAN
+    """
+    tablas = {}
+    propietarios = {}
+    destinos = {}
+    gateways_vlan = []
     
-    # Configurar IP administrativa
-    comandos.extend([
-        "int vlan 1",
-        f"ip add 192.168.{router_num}.2 255.255.255.0",
-        "no shut"
-    ])
+    def conectar(dispositivo, network, mask, ip, descripcion):
+        red_int = ip_to_int(network)
+        tablas[dispositivo].insertar(red_int, mask, ('conectada', None))
+        propietarios[ip_to_int(ip)] = dispositivo
+        destinos.setdefault((red_int, mask), descripcion)
     
-    return comandos
-
-# Función para generar comandos para un router, incluyendo OSPF o Ruteo Estático
-def generar_comandos_router(router_num, vlans_asignadas, conexiones_routers, area_ospf, conexiones_ospf, router_id, tipo_ruteo="ospf", rutas_estaticas=None):
+    for r in range(1, plan['num_routers'] + 1):
+        router = f"Router{r}"
+        tablas[router] = TrieRutas()
+        vlans_router = plan['router_vlans_asignadas'].get(r, {})
+        swc3_config = plan['swc3_configuraciones'].get(r)
+        
+        if swc3_config:
+            # Las VLANs y la red administrativa viven en el SWC3
+            swc3 = f"SWC3_R{r}"
+            tablas[swc3] = TrieRutas()
+            network, mask = swc3_config['red_conexion']
+            conectar(router, network, mask, obtener_ip_usable(network, mask, 0), f"Red /30 entre Router {r} y SWC3_R{r}")
+            conectar(swc3, network, mask, swc3_config['ip_hacia_router'], f"Red /30 entre Router {r} y SWC3_R{r}")
+            conectar(swc3, f"192.168.{r}.0", 24, swc3_config['ip_admin'], f"Red administrativa Router {r}")
+            gateway = swc3
+            posicion_gateway = -2
+        else:
+            conectar(router, f"192.168.{r}.0", 24, f"192.168.{r}.1", f"Red administrativa Router {r}")
+            gateway = router
+            posicion_gateway = -1
+        
+        for vlan_id, (network, mask) in vlans_router.items():
+            conectar(gateway, network, mask, obtener_ip_usable(network, mask, posicion_gateway), f"VLAN {vlan_id} de Router {r}")
+            gateways_vlan.append((f"VLAN {vlan_id} de Router {r}", gateway, ip_to_int(network), mask))
+        
+        conexiones_router, _ = conexiones_de_router(plan, r)
+        for hacia_router, (network, mask, es_primer_router) in conexiones_router.items():
+            ip = obtener_ip_usable(network, mask, 0 if es_primer_router else -1)
+            conectar(router, network, mask, ip, f"Red /30 entre Router {min(r, hacia_router)} y Router {max(r, hacia_router)}")
+    
+    # Rutas estáticas (las IPv6 no forman parte de esta verificación); ya guardan red,
+    # prefijo y siguiente salto como enteros
+    for prefijo_nombre, rutas_por_dispositivo in (("Router", plan['rutas_estaticas']), ("SWC3_R", plan['rutas_estaticas_swc3'])):
+        for r, rutas in rutas_por_dispositivo.items():
+            tabla = tablas.get(f"{prefijo_nombre}{r}")
+            if tabla is None:
+                continue
+            for ruta in rutas:
+                if not ruta.ipv6:
+                    tabla.insertar(ruta.red, ruta.prefijo, ('estatica', ruta.next_hop))
+    
+    return tablas, propietarios, destinos, gateways_vlan
+
+def decidir_salto(tablas, propietarios, dispositivo, ip_destino, cache_salidas):
+    """
+    Decisión de reenvío de un dispositivo para una IP destino
+    Retorna ('entregado', None), ('siguiente', dispositivo_vecino) o ('agujero', motivo)
+    cache_salidas guarda la resolución de cada siguiente salto, que no depende del destino
+    """
+    tabla = tablas[dispositivo]
+    entrada = tabla.buscar(ip_destino)
+    if entrada is None:
+        return ('agujero', "sin ruta")
+    
+    tipo, next_hop = entrada
+    if tipo == 'conectada':
+        return ('entregado', None)
+    
+    clave = (dispositivo, next_hop)
+    if clave not in cache_salidas:
+        vecino = propietarios.get(next_hop)
+        salida = tabla.buscar(next_hop)
+        if vecino is None:
+            decision = ('agujero', f"siguiente salto {int_to_ip(next_hop)} no pertenece a ningún dispositivo")
+        elif salida is None or salida[0] != 'conectada':
+            decision = ('agujero', f"siguiente salto {int_to_ip(next_hop)} no está en una red conectada")
+        elif vecino == dispositivo:
+            decision = ('agujero', f"siguiente salto {int_to_ip(next_hop)} es una IP propia")
+        else:
+            decision = ('siguiente', vecino)
+        cache_salidas[clave] = decision
+    return cache_salidas[clave]
+
+def resolver_destino(tablas, propietarios, ip_destino, origenes, cache_salidas):
+    """
+    Recorre salto a salto desde cada origen hacia una IP destino
+    Como el reenvío solo depende del destino, cada dispositivo se decide una sola vez
+    y los recorridos posteriores se detienen al llegar a un dispositivo ya resuelto
+    Retorna (saltos, finales):
+      - saltos: {dispositivo: decisión de decidir_salto}
+      - finales: {dispositivo: ('entregado', dispositivo_final) | ('agujero', (dispositivo_final, motivo)) | ('bucle', ciclo)}
+    """
+    saltos = {}
+    finales = {}
+    for origen in origenes:
+        camino = []
+        posiciones = {}
+        actual = origen
+        while actual not in finales:
+            if actual in posiciones:
+                finales[actual] = ('bucle', camino[posiciones[actual]:])
+                break
+            posiciones[actual] = len(camino)
+            camino.append(actual)
+            
+            decision = decidir_salto(tablas, propietarios, actual, ip_destino, cache_salidas)
+            saltos[actual] = decision
+            if decision[0] == 'entregado':
+                finales[actual] = ('entregado', actual)
+            elif decision[0] == 'agujero':
+                finales[actual] = ('agujero', (actual, decision[1]))
+            else:
+                actual = decision[1]
+        
+        # Todo el camino recorrido termina igual que el dispositivo donde se detuvo
+        for dispositivo in camino:
+            finales.setdefault(dispositivo, finales[actual])
+    
+    return saltos, finales
+
+def reconstruir_camino(saltos, origen):
+    """
+    Lista de dispositivos recorridos desde origen siguiendo las decisiones ya calculadas
+    """
+    camino = [origen]
+    vistos = {origen}
+    while saltos[camino[-1]][0] == 'siguiente':
+        siguiente = saltos[camino[-1]][1]
+        if siguiente in vistos:
+            break
+        vistos.add(siguiente)
+        camino.append(siguiente)
+    return camino
+
+def verificar_reenvio(plan):
+    """
+    Simula el reenvío IPv4 (longest prefix match) desde el gateway de cada VLAN hacia
+    todas las redes del plan y detecta agujeros negros, bucles y caminos asimétricos
+    entre pares de VLANs. Pensado para verificar las rutas de calcular_rutas_estaticas
+    """
+    inicio = time.perf_counter()
+    tablas, propietarios, destinos, gateways_vlan = construir_tablas_reenvio(plan)
+    
+    origenes = list(dict.fromkeys(gateway for _, gateway, _, _ in gateways_vlan))
+    redes_vlan = {(red_int, prefijo) for _, _, red_int, prefijo in gateways_vlan}
+    cache_salidas = {}
+    
+    agujeros = {}
+    bucles = {}
+    saltos_hacia_vlan = {}
+    entregados = 0
+    
+    for (red_int, prefijo), descripcion in destinos.items():
+        # Se prueba con la primera IP usable de la red (o la red misma en /31 y /32)
+        ip_destino = red_int + 1 if prefijo < 31 else red_int
+        saltos, finales = resolver_destino(tablas, propietarios, ip_destino, origenes, cache_salidas)
+        destino = f"{descripcion} ({int_to_ip(red_int)}/{prefijo})"
+        
+        for origen_vlan, gateway, _, _ in gateways_vlan:
+            estado, detalle = finales[gateway]
+            if estado == 'entregado':
+                entregados += 1
+            elif estado == 'agujero':
+                agujeros.setdefault((destino, *detalle), []).append(origen_vlan)
+            else:
+                bucles.setdefault((destino, tuple(detalle)), []).append(origen_vlan)
+        
+        if (red_int, prefijo) in redes_vlan:
+            saltos_hacia_vlan[(red_int, prefijo)] = (saltos, finales)
+    
+    # Asimetría: el camino de ida entre dos VLANs no es el de vuelta invertido.
+    # Se recorre solo la ida comprobando que cada dispositivo devuelve el tráfico al anterior,
+    # y los caminos completos se reconstruyen únicamente para los pares asimétricos
+    asimetricos = []
+    for i, (vlan_a, gateway_a, red_a, prefijo_a) in enumerate(gateways_vlan):
+        saltos_a, finales_a = saltos_hacia_vlan[(red_a, prefijo_a)]
+        for vlan_b, gateway_b, red_b, prefijo_b in gateways_vlan[i + 1:]:
+            saltos_b, finales_b = saltos_hacia_vlan[(red_b, prefijo_b)]
+            if gateway_a == gateway_b or finales_b[gateway_a][0] != 'entregado' or finales_a[gateway_b][0] != 'entregado':
+                continue
+            actual = gateway_a
+            while saltos_b[actual][0] == 'siguiente':
+                siguiente = saltos_b[actual][1]
+                if saltos_a.get(siguiente) != ('siguiente', actual):
+                    asimetricos.append({'origen': vlan_a, 'destino': vlan_b,
+                                        'ida': reconstruir_camino(saltos_b, gateway_a),
+                                        'vuelta': reconstruir_camino(saltos_a, gateway_b)})
+                    break
+                actual = siguiente
+    
+    return {
+        'dispositivos': len(tablas),
+        'destinos': len(destinos),
+        'comprobaciones': len(destinos) * len(gateways_vlan),
+        'entregados': entregados,
+        'agujeros_negros': [
+            {'destino': destino, 'dispositivo': dispositivo, 'motivo': motivo, 'origenes': origenes_afectados}
+            for (destino, dispositivo, motivo), origenes_afectados in agujeros.items()
+        ],
+        'bucles': [
+            {'destino': destino, 'ciclo': list(ciclo), 'origenes': origenes_afectados}
+            for (destino, ciclo), origenes_afectados in bucles.items()
+        ],
+        'asimetricos': asimetricos,
+        'duracion': time.perf_counter() - inicio
+    }
+
+def mostrar_reporte_reenvio(reporte):
+    """
+    Muestra el resultado de verificar_reenvio
+    """
+    print(f"\n" + "="*50)
+    print("🧭 VERIFICACIÓN DE REENVÍO (LONGEST PREFIX MATCH)")
+    print("="*50)
+    print(f"📊 {reporte['dispositivos']} dispositivos, {reporte['destinos']} redes destino, "
+          f"{reporte['comprobaciones']} comprobaciones en {reporte['duracion']:.2f} s")
+    print(f"✅ Entregados: {reporte['entregados']}/{reporte['comprobaciones']}")
+    
+    if reporte['agujeros_negros']:
+        print(f"\n🕳️ Agujeros negros: {len(reporte['agujeros_negros'])}")
+        for agujero in reporte['agujeros_negros'][:MAX_EJEMPLOS_REPORTE]:
+            print(f"   ❌ {agujero['destino']}: se pierde en {agujero['dispositivo']} ({agujero['motivo']}) "
+                  f"- afecta a {len(agujero['origenes'])} VLAN(s)")
+    
+    if reporte['bucles']:
+        print(f"\n🔁 Bucles: {len(reporte['bucles'])}")
+        for bucle in reporte['bucles'][:MAX_EJEMPLOS_REPORTE]:
+            print(f"   ❌ {bucle['destino']}: {' → '.join(bucle['ciclo'])} → {bucle['ciclo'][0]} "
+                  f"- afecta a {len(bucle['origenes'])} VLAN(s)")
+    
+    if reporte['asimetricos']:
+        print(f"\n↔️ Caminos asimétricos: {len(reporte['asimetricos'])}")
+        for asimetrico in reporte['asimetricos'][:MAX_EJEMPLOS_REPORTE]:
+            print(f"   ⚠️ {asimetrico['origen']} → {asimetrico['destino']}: ida {' → '.join(asimetrico['ida'])}, "
+                  f"vuelta {' → '.join(asimetrico['vuelta'])}")
+    
+    if not (reporte['agujeros_negros'] or reporte['bucles'] or reporte['asimetricos']):
+        print("🎯 Todas las VLANs alcanzan todas las redes sin bucles y con caminos simétricos")
+
+# ============================================================================
+# PLANIFICACIÓN DE RUTAS ESTÁTICAS POR CARGA
+# ============================================================================
+
+# Iteraciones de repesado y cuánto se encarece un enlace según su utilización relativa
+ITERACIONES_REPESADO = 40
+FACTOR_REPESADO = 0.5
+# Tráfico por defecto entre cada par de routers cuando no se da una matriz (kbps)
+TRAFICO_UNIFORME_KBPS = 100
+
+def matriz_trafico(num_routers, trafico=None, uniforme=None):
+    """
+    Demandas {(origen, destino): kbps} entre las LAN de los routers
+    trafico: {"1-3": 2000} (de las VLANs del Router 1 hacia las del Router 3)
+    uniforme: kbps entre cada par de routers que no aparece en trafico
+    """
+    demandas = {}
+    if uniforme:
+        for origen in range(1, num_routers + 1):
+            for destino in range(1, num_routers + 1):
+                if origen != destino:
+                    demandas[(origen, destino)] = uniforme
+    for par, kbps in (trafico or {}).items():
+        origen, destino = (int(r) for r in par.split('-'))
+        demandas[(origen, destino)] = kbps
+    return demandas
+
+def pesos_por_adyacencia(grafo, peso_enlace):
+    """
+    Pesos {router: {vecino: peso}} con peso_enlace((r1, r2)) para cada enlace (r1 < r2), así Dijkstra
+    lee el peso de cada vecino directamente sin armar la clave del enlace en cada relajación
+    """
+    return {r: {vecino: peso_enlace((r, vecino) if r < vecino else (vecino, r)) for vecino in vecinos}
+            for r, vecinos in grafo.items()}
+
+def arboles_por_destino(grafo, num_routers, pesos):
+    """
+    Primer salto de cada router hacia cada destino sobre el árbol de caminos mínimos (Dijkstra desde
+    el destino). Al ser un árbol por destino, el reenvío salto a salto nunca forma bucles.
+    Los empates se resuelven por orden del grafo, como encontrar_camino_mas_corto
+    pesos: {router: {vecino: peso}} (ver pesos_por_adyacencia)
+    Retorna una matriz primer_salto[origen - 1][destino - 1] (0 = sin camino)
+    """
+    infinito = float('inf')
+    primer_salto = [[0] * num_routers for _ in range(num_routers)]
+    for destino in range(1, num_routers + 1):
+        distancia = [infinito] * (num_routers + 1)
+        distancia[destino] = 0
+        cola = [(0, destino)]
+        while cola:
+            d, actual = heapq.heappop(cola)
+            if d > distancia[actual]:
+                continue
+            pesos_actual = pesos[actual]
+            for vecino in grafo[actual]:
+                nueva = d + pesos_actual[vecino]
+                if nueva < distancia[vecino]:
+                    distancia[vecino] = nueva
+                    heapq.heappush(cola, (nueva, vecino))
+        # Primer salto: el vecino que da la menor distancia (el primero del grafo si empatan)
+        for origen in range(1, num_routers + 1):
+            if origen != destino and distancia[origen] < infinito:
+                pesos_origen = pesos[origen]
+                mejor, mejor_distancia = 0, infinito
+                for vecino in grafo[origen]:
+                    distancia_vecino = distancia[vecino] + pesos_origen[vecino]
+                    if distancia_vecino < mejor_distancia:
+                        mejor, mejor_distancia = vecino, distancia_vecino
+                primer_salto[origen - 1][destino - 1] = mejor
+    return primer_salto
+
+def demandas_por_destino(demandas):
+    """
+    Agrupa la matriz de tráfico {(origen, destino): kbps} por destino: {destino: {origen: kbps}}
+    """
+    por_destino = {}
+    for (origen, destino), kbps in demandas.items():
+        if origen != destino:
+            acumulada = por_destino.setdefault(destino, {})
+            acumulada[origen] = acumulada.get(origen, 0) + kbps
+    return por_destino
+
+def cargas_por_enlace(primer_salto, demanda_por_destino):
+    """
+    Carga prevista en cada sentido de cada enlace {(desde, hacia): kbps} al seguir los primeros saltos
+    con la demanda agrupada por destino (ver demandas_por_destino)
+    Los primeros saltos hacia un destino forman un árbol: la demanda de cada router se acumula de las
+    hojas hacia el destino, una vez por router y destino, en vez de recorrer cada par salto a salto
+    """
+    num_routers = len(primer_salto)
+    cargas = {}
+    for destino, acumulada in demanda_por_destino.items():
+        columna = destino - 1
+        siguientes = [0] + [fila[columna] for fila in primer_salto]
+        siguientes[destino] = 0
+        hijos = [[] for _ in range(num_routers + 1)]
+        for origen in range(1, num_routers + 1):
+            if siguientes[origen]:
+                hijos[siguientes[origen]].append(origen)
+        
+        # Orden BFS desde el destino: al recorrerlo al revés cada router va después de todo su subárbol
+        orden = [destino]
+        for actual in orden:
+            orden.extend(hijos[actual])
+        carga = [0] * (num_routers + 1)
+        for origen, kbps in acumulada.items():
+            carga[origen] = kbps
+        for actual in reversed(orden[1:]):
+            kbps = carga[actual]
+            if kbps:
+                siguiente = siguientes[actual]
+                cargas[(actual, siguiente)] = cargas.get((actual, siguiente), 0) + kbps
+                carga[siguiente] += kbps
+    return cargas
+
+def utilizacion_maxima(cargas, capacidades):
+    """
+    Utilización (carga / capacidad) del sentido más cargado de la red
+    """
+    return max((kbps / capacidades.get(tuple(sorted(sentido)), ANCHO_BANDA_ENLACE_KBPS)
+                for sentido, kbps in cargas.items()), default=0.0)
+
+def planificar_rutas_por_carga(conexiones_mapa, num_routers, demandas, capacidades=None, iteraciones=ITERACIONES_REPESADO):
+    """
+    Elige los primeros saltos de las rutas estáticas minimizando la utilización máxima de los enlaces.
+    Repesado iterativo: se parte de los caminos de menos saltos y en cada vuelta cada enlace se encarece
+    en proporción a su utilización respecto de la del enlace más cargado; se conserva la mejor solución.
+    capacidades: {(r1, r2): kbps}; por defecto 10 Mbps (Ethernet del NM-4E), como plan['anchos_banda']
+    Retorna (primer_salto, reporte) con la carga prevista de cada enlace antes y después
+    """
+    capacidades = capacidades or {}
+    grafo = construir_grafo_topologia(conexiones_mapa, num_routers)
+    primer_salto_bfs = calcular_matrices_topologia(grafo)['primer_salto']
+    if np is not None:
+        primer_salto_bfs = primer_salto_bfs.tolist()
+    
+    demanda_por_destino = demandas_por_destino(demandas)
+    cargas_antes = cargas_por_enlace(primer_salto_bfs, demanda_por_destino)
+    mejor = (utilizacion_maxima(cargas_antes, capacidades), sum(cargas_antes.values()))
+    mejor_primer_salto, mejores_cargas = primer_salto_bfs, cargas_antes
+    
+    pesos = pesos_por_adyacencia(grafo, lambda enlace: 1.0)
+    for _ in range(iteraciones):
+        primer_salto = arboles_por_destino(grafo, num_routers, pesos)
+        cargas = cargas_por_enlace(primer_salto, demanda_por_destino)
+        maxima = utilizacion_maxima(cargas, capacidades)
+        if (maxima, sum(cargas.values())) < mejor:
+            mejor = (maxima, sum(cargas.values()))
+            mejor_primer_salto, mejores_cargas = primer_salto, cargas
+        if maxima == 0:
+            break
+        for r1, r2 in conexiones_mapa:
+            capacidad = capacidades.get((r1, r2), ANCHO_BANDA_ENLACE_KBPS)
+            utilizacion = max(cargas.get((r1, r2), 0), cargas.get((r2, r1), 0)) / capacidad
+            pesos[r1][r2] = pesos[r2][r1] = pesos[r1][r2] * (1 + FACTOR_REPESADO * utilizacion / maxima)
+    
+    reporte = {
+        'enlaces': sorted(conexiones_mapa),
+        'capacidades': {enlace: capacidades.get(enlace, ANCHO_BANDA_ENLACE_KBPS) for enlace in conexiones_mapa},
+        'antes': cargas_antes,
+        'despues': mejores_cargas,
+        'utilizacion_antes': utilizacion_maxima(cargas_antes, capacidades),
+        'utilizacion_despues': mejor[0],
+        'demanda_total': sum(demandas.values())
+    }
+    return mejor_primer_salto, reporte
+
+def lineas_reporte_carga(reporte):
+    """
+    Líneas de texto con la carga prevista de cada sentido de cada enlace, antes y después de planificar
+    """
+    lineas = [f"Demanda total: {reporte['demanda_total']} kbps - utilización máxima "
+              f"{reporte['utilizacion_antes']:.1%} → {reporte['utilizacion_despues']:.1%}"]
+    for r1, r2 in reporte['enlaces']:
+        capacidad = reporte['capacidades'][(r1, r2)]
+        for sentido in ((r1, r2), (r2, r1)):
+            antes, despues = reporte['antes'].get(sentido, 0), reporte['despues'].get(sentido, 0)
+            if antes or despues:
+                lineas.append(f"R{sentido[0]}→R{sentido[1]} ({capacidad} kbps): {antes} kbps ({antes / capacidad:.1%}) "
+                              f"→ {despues} kbps ({despues / capacidad:.1%})")
+    return lineas
+
+def mostrar_reporte_carga(reporte):
+    """
+    Muestra la carga prevista por enlace de planificar_rutas_por_carga
+    """
+    print(f"\n" + "="*50)
+    print("⚖️ CARGA PREVISTA POR ENLACE (CAMINOS MÍNIMOS → PLANIFICADA)")
+    print("="*50)
+    for linea in lineas_reporte_carga(reporte):
+        print(f"   {linea}")
+
+
+# ============================================================================
+
+# Función para generar comandos de configuración de interfaz
+def configurar_interface(interface, ip, mascara):
+    return [
+        f"int {interface}",
+        f"ip add {ip} {mascara}",
+        "no shut"
+    ]
+
+# Función para obtener la dirección IPv6 (con prefijo) equivalente a una red IPv4 del plan
+# posicion 0: gateway de la VLAN o primer extremo del enlace; posicion 1: segundo extremo
+def obtener_ipv6_interfaz(redes6, network, posicion):
+    if not redes6 or network not in redes6:
+        return None
+    red6, prefijo = redes6[network]
+    red6_int = ip6_to_int(red6)
+    # En /127 se usan las dos direcciones (RFC 6164); en /64 el gateway es ::1
+    direccion = red6_int + posicion if prefijo >= 127 else red6_int + 1 + posicion
+    return f"{int_to_ip6(direccion)}/{prefijo}"
+
+# Función para generar los comandos IPv6 de una interfaz (dirección y OSPFv3 si aplica)
+def comandos_ipv6_interfaz(redes6, network, posicion, tipo_ruteo, area):
+    direccion6 = obtener_ipv6_interfaz(redes6, network, posicion)
+    if direccion6 is None:
+        return []
+    comandos = [f"ipv6 address {direccion6}"]
+    if tipo_ruteo == "ospf":
+        comandos.append(f"ipv6 ospf 1 area {area}")
+    elif tipo_ruteo == "eigrp":
+        comandos.append(f"ipv6 eigrp {PROCESO_EIGRP}")
+    elif tipo_ruteo == "rip":
+        comandos.append("ipv6 rip RIPNG enable")
+    return comandos
+
+# Función para calcular el mínimo de bloques que cubren las redes propias sin tocar ninguna ajena
+def minimizar_redes_ospf(redes_propias, redes_ajenas, ajustados=False):
+    """
+    Retorna la lista mínima de bloques (network, mask) que contienen todas las redes propias
+    y no se solapan con ninguna red ajena (el espacio sin asignar puede quedar cubierto).
+    Recorre el árbol binario de direcciones: un bloque sin redes ajenas se usa entero
+    y uno con redes ajenas se divide en sus dos mitades.
+    Con ajustados=True cada bloque se reduce al más pequeño que contiene sus redes propias
+    (misma cantidad de bloques, sin cubrir más espacio libre del necesario)
+    """
+    def a_rango(network, mask):
+        inicio = ip_to_int(network)
+        return (inicio, inicio + 2 ** (32 - mask) - 1)
+    
+    def cubrir(red, prefijo, propias, ajenas):
+        if not propias:
+            return []
+        if not ajenas:
+            if ajustados:
+                # Prefijo común entre la primera y la última dirección de las redes propias del bloque
+                inicio = min(r[0] for r in propias)
+                prefijo = 32 - (inicio ^ max(r[1] for r in propias)).bit_length()
+                red = inicio & ((0xFFFFFFFF << (32 - prefijo)) & 0xFFFFFFFF)
+            return [(int_to_ip(red), prefijo)]
+        # Con propias y ajenas en el bloque, ninguna de ellas lo contiene entero (no se solapan entre sí)
+        mitad = red + 2 ** (31 - prefijo)
+        return (cubrir(red, prefijo + 1, [r for r in propias if r[1] < mitad], [r for r in ajenas if r[0] < mitad]) +
+                cubrir(mitad, prefijo + 1, [r for r in propias if r[0] >= mitad], [r for r in ajenas if r[1] >= mitad]))
+    
+    return cubrir(0, 0, [a_rango(*red) for red in redes_propias], [a_rango(*red) for red in redes_ajenas])
+
+# Función para generar las sentencias network de OSPF de un dispositivo
+def comandos_network_ospf(redes_ospf, redes_plan=None):
+    """
+    redes_ospf: lista de (network, mask, area) de las interfaces del dispositivo
+    Sin redes_plan se genera una sentencia por red; con redes_plan (todas las redes IPv4 del plan)
+    se genera por área el mínimo de sentencias que cubren exactamente las interfaces del dispositivo
+    """
+    if redes_plan is None:
+        return [f"network {network} {convertir_a_wildcard(convertir_mascara(mask))} area {area}"
+                for network, mask, area in redes_ospf]
+    
+    propias = {(network, mask) for network, mask, _ in redes_ospf}
+    ajenas = [red for red in redes_plan if red not in propias]
+    
+    comandos = []
+    for area in dict.fromkeys(area for _, _, area in redes_ospf):
+        # Las interfaces del propio dispositivo en otras áreas tampoco se pueden cubrir
+        redes_area = [(network, mask) for network, mask, area_red in redes_ospf if area_red == area]
+        otras_areas = [(network, mask) for network, mask, area_red in redes_ospf if area_red != area]
+        for network, mask in minimizar_redes_ospf(redes_area, ajenas + otras_areas):
+            comandos.append(f"network {network} {convertir_a_wildcard(convertir_mascara(mask))} area {area}")
+    return comandos
+
+# Función para generar los resúmenes de área de un ABR (area X range)
+def comandos_rangos_area(rangos_area):
+    """
+    rangos_area: lista de (area, network, mask) que el router resume como ABR
+    """
+    return [f"area {area} range {network} {convertir_mascara(mask)}" for area, network, mask in rangos_area]
+
+# Ancho de banda de referencia de OSPF (Mbps): 1000 para que Gigabit y FastEthernet no empaten en costo 1
+REFERENCIA_ANCHO_BANDA_OSPF = 1000
+
+# Función para generar los ajustes comunes del proceso OSPF: costo de referencia e interfaces pasivas
+def comandos_ajustes_ospf(interfaces_pasivas):
+    """
+    interfaces_pasivas: interfaces con red anunciada pero sin vecinos OSPF (VLANs y administración),
+    que así dejan de enviar hellos
+    """
+    comandos = [f"auto-cost reference-bandwidth {REFERENCIA_ANCHO_BANDA_OSPF}"]
+    comandos.extend(f"passive-interface {interface}" for interface in interfaces_pasivas)
+    return comandos
+
+# Función para generar los timers hello/dead de OSPF de un enlace entre routers
+def comandos_timers_ospf(timers_ospf, redes6=None, network=None):
+    """
+    timers_ospf: (hello, dead) en segundos o None para los valores por defecto de IOS
+    Si el enlace también tiene IPv6 se ajustan igual los timers de OSPFv3
+    """
+    if not timers_ospf:
+        return []
+    hello, dead = timers_ospf
+    comandos = [f"ip ospf hello-interval {hello}", f"ip ospf dead-interval {dead}"]
+    if obtener_ipv6_interfaz(redes6, network, 0):
+        comandos.extend([f"ipv6 ospf hello-interval {hello}", f"ipv6 ospf dead-interval {dead}"])
+    return comandos
+
+# Función para generar las áreas stub de un dispositivo (area X stub [no-summary])
+def comandos_areas_stub(areas_stub):
+    """
+    areas_stub: lista de (area, sin_resumen); sin_resumen solo lo lleva el ABR de un área totally stubby
+    """
+    return [f"area {area} stub{' no-summary' if sin_resumen else ''}" for area, sin_resumen in areas_stub]
+
+# EIGRP: número de sistema autónomo y atributos de las interfaces para la métrica compuesta
+PROCESO_EIGRP = 100
+ANCHO_BANDA_ENLACE_KBPS = 10000   # Ethernet1/x del módulo NM-4E (10 Mbps)
+RETARDO_ENLACE_US = 1000
+ANCHO_BANDA_LAN_KBPS = 100000     # FastEthernet hacia el switch o el SWC3
+RETARDO_LAN_US = 100
+MAX_VARIANCE_EIGRP = 128
+
+# Función para obtener la red con clase (A, B o C) que contiene una red; RIP solo acepta estas
+def red_con_clase(network):
+    primer_octeto = int(network.split('.')[0])
+    mask = 8 if primer_octeto < 128 else 16 if primer_octeto < 192 else 24
+    return obtener_network_from_ip(network, mask)
+
+# Función para generar el proceso EIGRP de un dispositivo
+def comandos_eigrp(redes, redes_plan, router_id, interfaces_pasivas, variance=None, redes6=None):
+    """
+    redes: (network, mask) de las interfaces del dispositivo
+    Con redes_plan las sentencias network se agregan al mínimo sin cubrir redes de otros dispositivos
+    variance > 1 activa el balanceo de carga por costos desiguales (ver calcular_variance_eigrp)
+    """
+    bloques = redes
+    if redes_plan is not None:
+        propias = set(redes)
+        bloques = minimizar_redes_ospf(redes, [red for red in redes_plan if red not in propias])
+    
+    comandos = [f"router eigrp {PROCESO_EIGRP}"]
+    comandos.extend(f"passive-interface {interface}" for interface in interfaces_pasivas)
+    comandos.extend(f"network {network} {convertir_a_wildcard(convertir_mascara(mask))}" for network, mask in bloques)
+    if variance and variance > 1:
+        comandos.append(f"variance {variance}")
+    comandos.append("no auto-summary")
+    
+    # EIGRP para IPv6: las interfaces ya se agregaron con "ipv6 eigrp 100"
+    if redes6:
+        comandos.extend([f"ipv6 router eigrp {PROCESO_EIGRP}", f"eigrp router-id {router_id}"])
+        comandos.extend(f"passive-interface {interface}" for interface in interfaces_pasivas)
+        comandos.append("no shutdown")
+    return comandos
+
+# Función para generar el proceso RIP v2 de un dispositivo
+def comandos_rip(redes, interfaces_pasivas, redes6=None):
+    """
+    redes: (network, mask) de las interfaces del dispositivo
+    RIP solo admite redes con clase: basta una sentencia network por red con clase distinta
+    """
+    comandos = ["router rip", "version 2"]
+    comandos.extend(f"passive-interface {interface}" for interface in interfaces_pasivas)
+    comandos.extend(f"network {red}" for red in dict.fromkeys(red_con_clase(network) for network, _ in redes))
+    comandos.append("no auto-summary")
+    
+    # RIPng: las interfaces ya se agregaron con "ipv6 rip RIPNG enable"
+    if redes6:
+        comandos.append("ipv6 router rip RIPNG")
+    return comandos
+
+# ============================================================================
+# RAÍCES DE SPANNING-TREE POR VLAN
+# ============================================================================
+
+# Prioridades PVST: la raíz de cada VLAN y su respaldo si la raíz cae
+PRIORIDAD_STP_RAIZ = 4096
+PRIORIDAD_STP_SECUNDARIA = 8192
+
+def switches_capa2_de_router(plan, router_num):
+    """
+    Switches del dominio de capa 2 que cuelga de un router y las VLANs que conoce cada uno
+    Retorna (distribución, acceso): listas de (nombre_dispositivo, conjunto de VLANs)
+    El SWC3 (si existe) es la distribución y la cadena de switches de acceso el resto; con la poda
+    de VLANs todos solo tienen las VLANs del router
+    """
+    vlans_router = {1, *plan['router_vlans_asignadas'].get(router_num, {})}
+    distribucion = []
+    if plan['swc3_configuraciones'].get(router_num):
+        distribucion.append((f"SWC3_R{router_num}", vlans_router))
+    acceso = [(switch['nombre'], vlans_router) for switch in planificar_capa_acceso(plan, router_num)]
+    return distribucion, acceso
+
+def planificar_raices_stp(plan, router_num):
+    """
+    Elige la raíz (y la secundaria) de cada VLAN en el dominio de capa 2 de un router
+    La raíz va en un switch de distribución que tenga la VLAN (el SWC3 es su gateway, así el
+    camino del PC a su gateway no cruza el árbol), repartiendo las VLANs pares e impares entre
+    los switches de distribución; si ninguno la tiene, la raíz es el switch de acceso
+    Retorna {nombre_dispositivo: {vlan: prioridad}}
+    """
+    distribucion, acceso = switches_capa2_de_router(plan, router_num)
+    prioridades = {nombre: {} for nombre, _ in distribucion + acceso}
+    todas_vlans = sorted(set().union(*(vlans for _, vlans in distribucion + acceso)))
+
+    for vlan in todas_vlans:
+        candidatos = [nombre for nombre, vlans in distribucion if vlan in vlans]
+        if candidatos:
+            # Rotar por la VLAN: con dos distribuciones las impares van a una y las pares a la otra
+            desplazamiento = vlan % len(candidatos)
+            candidatos = candidatos[desplazamiento:] + candidatos[:desplazamiento]
+        candidatos += [nombre for nombre, vlans in acceso if vlan in vlans]
+
+        prioridades[candidatos[0]][vlan] = PRIORIDAD_STP_RAIZ
+        if len(candidatos) > 1:
+            prioridades[candidatos[1]][vlan] = PRIORIDAD_STP_SECUNDARIA
+
+    return prioridades
+
+def lista_vlans(vlans):
+    """
+    Lista de VLANs en el formato de IOS, con los tramos consecutivos como rango (ej: 1-3,5)
+    """
+    tramos = []
+    for vlan in sorted(set(vlans)):
+        if tramos and tramos[-1][1] == vlan - 1:
+            tramos[-1][1] = vlan
+        else:
+            tramos.append([vlan, vlan])
+    return ",".join(str(inicio) if inicio == fin else f"{inicio}-{fin}" for inicio, fin in tramos)
+
+def comandos_prioridades_stp(prioridades):
+    """
+    prioridades: {vlan: prioridad} de un switch
+    Una sentencia por prioridad con la lista de VLANs (ej: spanning-tree vlan 1-3 priority 4096)
+    """
+    vlans_por_prioridad = {}
+    for vlan, prioridad in prioridades.items():
+        vlans_por_prioridad.setdefault(prioridad, []).append(vlan)
+    return [f"spanning-tree vlan {lista_vlans(vlans)} priority {prioridad}"
+            for prioridad, vlans in sorted(vlans_por_prioridad.items())]
+
+# ============================================================================
+# ETHERCHANNEL (LACP) EN LA TRONCAL SWC3 → SWITCH
+# ============================================================================
+
+# LACP agrupa como mucho 8 enlaces activos; un solo miembro es el cable de siempre, sin port-channel
+MAX_MIEMBROS_ETHERCHANNEL = 8
+GRUPO_ETHERCHANNEL = 1
+
+def puertos_troncal_swc3(miembros):
+    """
+    Puertos de cada cable de la troncal SWC3 → Switch: [(X de gi1/0/X en el SWC3, Y de fa0/Y en el switch)]
+    El primer cable es el de siempre (gi1/0/2 ↔ fa0/1); los demás siguen en gi1/0/3... del SWC3
+    y en el switch después de los puertos de los PCs (fa0/5...)
+    """
+    return [(2 + i, 1 if i == 0 else 4 + i) for i in range(miembros)]
+
+def comandos_troncal(interfaces, modo_lacp=None, vlans_permitidas=None):
+    """
+    Troncal sobre una interfaz o, con varias, EtherChannel LACP (channel-group con modo active/passive)
+    vlans_permitidas: poda de la troncal (switchport trunk allowed vlan); None permite todas
+    """
+    modo_troncal = ["switchport mode trunk"]
+    if vlans_permitidas is not None:
+        modo_troncal.append(f"switchport trunk allowed vlan {lista_vlans(vlans_permitidas)}")
+    if len(interfaces) == 1:
+        return [f"int {interfaces[0]}", *modo_troncal]
+    comandos = []
+    for interfaz in interfaces:
+        comandos.extend([
+            f"int {interfaz}",
+            *modo_troncal,
+            f"channel-group {GRUPO_ETHERCHANNEL} mode {modo_lacp}"
+        ])
+    comandos.extend([f"int port-channel {GRUPO_ETHERCHANNEL}", *modo_troncal])
+    return comandos
+
+# ============================================================================
+# CAPA DE ACCESO: SWITCHES Y PCs DE CADA ROUTER
+# ============================================================================
+
+# 2960-24TT: fa0/1-24 para cables y PCs, gi0/1 baja al siguiente switch de la cadena y gi0/2 sube
+PUERTOS_SWITCH_ACCESO = 24
+PCS_CAPA_ACCESO_CLASICA = 3  # Sin PCs por VLAN en el plan: 3 PCs en fa0/2-4 repartidos entre las VLANs
+
+def nombre_switch_acceso(router_num, indice):
+    return f"SWITCH{router_num}" if indice == 1 else f"SWITCH{router_num}_{indice}"
+
+def ip_admin_switch_acceso(router_num, indice):
+    """
+    IP de la VLAN 1: 192.168.R.2 el primer switch; los encadenados desde .4 (.3 es del SWC3)
+    """
+    return f"192.168.{router_num}.{2 if indice == 1 else indice + 2}"
+
+def mascara_para_hosts(hosts):
+    """
+    Prefijo más largo cuya red tiene al menos 'hosts' direcciones usables
+    """
+    prefijo = 30
+    while prefijo > 1 and (1 << (32 - prefijo)) - 2 < hosts:
+        prefijo -= 1
+    return prefijo
+
+def vlans_de_pcs(plan, router_num):
+    """
+    VLAN de cada PC del router, en orden de PC (None si el router no tiene VLANs)
+    Con plan['pcs_por_vlan'] van todos los PCs de una VLAN seguidos; sin él, los 3 PCs clásicos
+    se reparten entre las VLANs del router por turnos
+    """
+    vlans = sorted(plan['router_vlans_asignadas'].get(router_num, {}))
+    pcs_por_vlan = plan.get('pcs_por_vlan')
+    if pcs_por_vlan:
+        cantidades = pcs_por_vlan.get(router_num, {})
+        return [vlan_id for vlan_id in vlans for _ in range(cantidades.get(vlan_id, 0))]
+    return [vlans[i % len(vlans)] if vlans else None for i in range(PCS_CAPA_ACCESO_CLASICA)]
+
+def planificar_capa_acceso(plan, router_num):
+    """
+    Switches de acceso de un router, encadenados: el primero sube por fa0/1 (o el EtherChannel)
+    al router o al SWC3 y cada uno baja por gi0/1 al gi0/2 del siguiente
+    Los PCs ocupan los puertos libres en orden y se agregan switches mientras falten puertos
+    Retorna una lista de {'nombre', 'indice', 'ip_admin', 'pcs': [(nombre_pc, puerto, vlan_id)], 'siguiente'}
+    (puerto es el N de fa0/N)
+    """
+    # En el primer switch fa0/1 es la troncal y, con EtherChannel, fa0/5... son los demás cables
+    ocupados = {1}
+    if plan['swc3_configuraciones'].get(router_num):
+        ocupados.update(puerto for _, puerto in puertos_troncal_swc3(plan.get('miembros_etherchannel', 1)))
+
+    switches = []
+    libres = []
+    for numero_pc, vlan_id in enumerate(vlans_de_pcs(plan, router_num), start=1):
+        if not libres:
+            indice = len(switches) + 1
+            switches.append({'nombre': nombre_switch_acceso(router_num, indice), 'indice': indice,
+                             'ip_admin': ip_admin_switch_acceso(router_num, indice), 'pcs': [], 'siguiente': False})
+            libres = [puerto for puerto in range(PUERTOS_SWITCH_ACCESO, 0, -1)
+                      if indice > 1 or puerto not in ocupados]
+        switches[-1]['pcs'].append((f"PC{router_num}_{numero_pc}", libres.pop(), vlan_id))
+
+    if not switches:
+        switches.append({'nombre': nombre_switch_acceso(router_num, 1), 'indice': 1,
+                         'ip_admin': ip_admin_switch_acceso(router_num, 1), 'pcs': [], 'siguiente': False})
+    for switch in switches[:-1]:
+        switch['siguiente'] = True
+    return switches
+
+def comandos_puertos_acceso(pcs):
+    """
+    Puertos de acceso de un switch: los tramos de puertos seguidos en la misma VLAN van con int range
+    """
+    tramos = []
+    for _, puerto, vlan_id in pcs:
+        if tramos and tramos[-1][1] == puerto - 1 and tramos[-1][2] == vlan_id:
+            tramos[-1][1] = puerto
+        else:
+            tramos.append([puerto, puerto, vlan_id])
+    comandos = []
+    for inicio, fin, vlan_id in tramos:
+        comandos.append(f"int fa0/{inicio}" if inicio == fin else f"int range fa0/{inicio} - {fin}")
+        comandos.append("switchport mode access")
+        if vlan_id is not None:
+            comandos.append(f"switchport access vlan {vlan_id}")
+    return comandos
+
+# Función para generar comandos de configuración de switch
+def generar_comandos_switch(router_num, todas_vlans, prioridades_stp=None, miembros_troncal=1, vlans_router=None, switch_acceso=None):
+    """
+    vlans_router: VLANs asignadas al router; si se pasan, el switch solo crea esas
+    y la troncal solo las permite (más la VLAN 1 administrativa)
+    switch_acceso: el switch dentro de la capa de acceso del router (ver planificar_capa_acceso);
+    sin él es el primer switch sin puertos de PCs
+    """
+    if switch_acceso is None:
+        switch_acceso = {'nombre': nombre_switch_acceso(router_num, 1), 'indice': 1,
+                         'ip_admin': ip_admin_switch_acceso(router_num, 1), 'pcs': [], 'siguiente': False}
+    comandos = [
+        "en",
+        "conf t",
+        f"hostname {switch_acceso['nombre']}",
+        "ip domain-name cisco",
+        "crypto key generate rsa general-keys modulus 512",
+        "line vty 0 5",
+        "transport input ssh",
+        "login local",
+        "exit",
+        "username admin privilege 15 password cisco",
+        "enable secret cisco"
+    ]
+    
+    # Comandos para crear VLANs (con poda, solo las que existen detrás del router)
+    vlans_switch = [vlan_id for vlan_id, _ in todas_vlans if vlans_router is None or vlan_id in vlans_router]
+    for vlan_id in vlans_switch:
+        vlan_name = {2: "dos", 3: "tres", 4: "cuatro", 5: "cinco", 6: "seis", 7: "siete", 8: "ocho", 9: "nueve", 10: "diez"}.get(vlan_id, f"vlan{vlan_id}")
+        comandos.append(f"VLAN {vlan_id}")
+        comandos.append(f"name {vlan_name}")
+
+    # Raíz de spanning-tree de las VLANs que le tocan (ver planificar_raices_stp)
+    if prioridades_stp:
+        comandos.extend(comandos_prioridades_stp(prioridades_stp))
+
+    # Configuraciones de puertos: troncal hacia el router o el SWC3 (EtherChannel pasivo si lleva varios cables);
+    # los switches encadenados suben por gi0/2 y bajan por gi0/1 al siguiente
+    vlans_permitidas = [1, *vlans_switch] if vlans_router is not None else None
+    if switch_acceso['indice'] == 1:
+        comandos.extend(comandos_troncal([f"fa0/{puerto}" for _, puerto in puertos_troncal_swc3(miembros_troncal)], "passive",
+                                         vlans_permitidas))
+    else:
+        comandos.extend(comandos_troncal(["gi0/2"], None, vlans_permitidas))
+    if switch_acceso['siguiente']:
+        comandos.extend(comandos_troncal(["gi0/1"], None, vlans_permitidas))
+    comandos.extend(comandos_puertos_acceso(switch_acceso['pcs']))
+    comandos.append("exit")
+    
+    # Configurar IP administrativa
+    comandos.extend([
+        "int vlan 1",
+        f"ip add {switch_acceso['ip_admin']} 255.255.255.0",
+        "no shut"
+    ])
+    
+    return comandos
+
+# Función para generar comandos para un router, incluyendo OSPF o Ruteo Estático
+def generar_comandos_router(router_num, vlans_asignadas, conexiones_routers, area_ospf, conexiones_ospf, router_id, tipo_ruteo="ospf", rutas_estaticas=None, redes6=None, redes_plan=None, rangos_area=None, areas_stub=None, timers_ospf=None, variance=None, anchos_banda=None):
     # Configuración básica con SSH y seguridad
     comandos = [
         "en", 
@@ -733,6 +2423,7 @@ def generar_comandos_router(router_num, vlans_asignadas, conexiones_routers, are
         "exit",
         "username admin privilege 15 password cisco",
         "enable secret cisco",
+        *(["ipv6 unicast-routing"] if redes6 else []),  # Dual-stack
         "int fa0/0", 
         "no shut",
         "int fa0/0.1",
@@ -747,6 +2438,7 @@ def generar_comandos_router(router_num, vlans_asignadas, conexiones_routers, are
         comandos.append(f"int fa0/0.{vlan_num}")
         comandos.append(f"encapsulation dot1Q {vlan_num}")
         comandos.append(f"ip add {ip_usable} {mascara_decimal}")
+        comandos.extend(comandos_ipv6_interfaz(redes6, network, 0, tipo_ruteo, area_ospf))
         comandos.append("no shut")
 
     # Comandos para conexiones entre routers - Usando interfaces del módulo NM-4E
@@ -758,6 +2450,12 @@ def generar_comandos_router(router_num, vlans_asignadas, conexiones_routers, are
         ip_usable = obtener_ip_usable(network, mask, ip_offset)
         mascara_decimal = convertir_mascara(mask)
         comandos.extend(configurar_interface(interface, ip_usable, mascara_decimal))
+        area_enlace = conexiones_ospf[hacia_router][3] if hacia_router in conexiones_ospf else area_ospf
+        comandos.extend(comandos_ipv6_interfaz(redes6, network, 0 if es_primer_router else 1, tipo_ruteo, area_enlace))
+        if tipo_ruteo == "ospf":
+            comandos.extend(comandos_timers_ospf(timers_ospf, redes6, network))
+        if anchos_banda and hacia_router in anchos_banda:
+            comandos.append(f"bandwidth {anchos_banda[hacia_router]}")
 
     # Comandos DHCP para cada VLAN
     for vlan_num, (network, mask) in vlans_asignadas.items():
@@ -769,25 +2467,56 @@ def generar_comandos_router(router_num, vlans_asignadas, conexiones_routers, are
             f"network {network} {mascara_decimal}"
         ])
 
+    # Solo las Ethernet1/x tienen vecinos: la administración y las subinterfaces de VLAN son pasivas
+    interfaces_pasivas = ["fa0/0.1"] + [f"fa0/0.{vlan_num}" for vlan_num in vlans_asignadas]
+    
     # Configuración de ruteo según el tipo elegido
     if tipo_ruteo == "ospf":
         # Configuración OSPF
         comandos.append(f"router ospf 1")
         comandos.append(f"router-id {router_id}")
+        comandos.extend(comandos_ajustes_ospf(interfaces_pasivas))
         
         # Agregar la VLAN administrativa (VLAN 1) al área OSPF
-        comandos.append(f"network 192.168.{router_num}.0 0.0.0.255 area {area_ospf}")
+        redes_ospf = [(f"192.168.{router_num}.0", 24, area_ospf)]
         
         # Agregar redes de VLANs al área del router
         for vlan_num, (network, mask) in vlans_asignadas.items():
-            wildcard = convertir_a_wildcard(convertir_mascara(mask))
-            comandos.append(f"network {network} {wildcard} area {area_ospf}")
+            redes_ospf.append((network, mask, area_ospf))
         
         # Agregar redes entre routers al área correspondiente - Ordenados
         conexiones_ospf_ordenadas = sorted(conexiones_ospf.items(), key=lambda x: x[0])
         for hacia_router, (network, mask, es_primer_router, area) in conexiones_ospf_ordenadas:
-            wildcard = convertir_a_wildcard(convertir_mascara(mask))
-            comandos.append(f"network {network} {wildcard} area {area}")
+            redes_ospf.append((network, mask, area))
+        
+        comandos.extend(comandos_network_ospf(redes_ospf, redes_plan))
+        
+        # ABR: resumir las redes de cada área a la que pertenece
+        if rangos_area:
+            comandos.extend(comandos_rangos_area(rangos_area))
+        
+        # Áreas stub: todos los routers del área deben declararlas igual
+        if areas_stub:
+            comandos.extend(comandos_areas_stub(areas_stub))
+        
+        # OSPFv3: las interfaces ya se asignaron a su área con "ipv6 ospf 1 area X"
+        if redes6:
+            comandos.extend([
+                "ipv6 router ospf 1",
+                f"router-id {router_id}"
+            ])
+            comandos.extend(comandos_ajustes_ospf(interfaces_pasivas))
+            if areas_stub:
+                comandos.extend(comandos_areas_stub(areas_stub))
+    
+    elif tipo_ruteo in ("eigrp", "rip"):
+        # Administración, VLANs y enlaces entre routers
+        redes = [(f"192.168.{router_num}.0", 24)] + list(vlans_asignadas.values())
+        redes += [(network, mask) for _, (network, mask, _) in sorted(conexiones_routers.items())]
+        if tipo_ruteo == "eigrp":
+            comandos.extend(comandos_eigrp(redes, redes_plan, router_id, interfaces_pasivas, variance, redes6))
+        else:
+            comandos.extend(comandos_rip(redes, interfaces_pasivas, redes6))
     
     elif tipo_ruteo == "estatico":
         # Configuración de rutas estáticas
@@ -804,37 +2533,102 @@ def generar_router_id(area, contador):
     return f"{area_num}.{area_num}.{area_num}.{contador}"
 
 # Función para detectar conexiones ya configuradas para un router
-def detectar_conexiones_previas(router_actual, conexiones_mapa, areas_ospf, configuracion_orden):
+# Solo recorre los vecinos del router en el registro, no todo el mapa de conexiones
+def detectar_conexiones_previas(router_actual, registro, areas_ospf):
     conexiones_previas = {}
     conexiones_ospf_previas = {}
     
-    # Buscar todas las conexiones donde este router está involucrado
-    for conexion_key, (network, mask) in conexiones_mapa.items():
-        r1, r2 = conexion_key
-        
-        # Si este router es parte de la conexión
-        if router_actual in conexion_key:
-            # El otro router en la conexión
-            otro_router = r2 if r1 == router_actual else r1
+    for otro_router, conexion_key in registro.vecinos(router_actual).items():
+        # Si el otro router ya fue configurado
+        if registro.configurado(otro_router):
+            network, mask = registro.conexiones_mapa[conexion_key]
             
-            # Si el otro router ya fue configurado
-            if otro_router in configuracion_orden:
-                # Determinar si este router es el "primer router" en la conexión
-                es_primer_router = conexion_key[0] == router_actual
-                
-                # Determinar el área de la conexión (la del router ya configurado)
-                area_red = areas_ospf[otro_router]
-                
-                # Guardar la conexión
-                conexiones_previas[otro_router] = (network, mask, es_primer_router)
-                conexiones_ospf_previas[otro_router] = (network, mask, es_primer_router, area_red)
+            # Determinar si este router es el "primer router" en la conexión
+            es_primer_router = conexion_key[0] == router_actual
+            
+            # Determinar el área de la conexión (la del router ya configurado)
+            area_red = areas_ospf[otro_router]
+            
+            # Guardar la conexión
+            conexiones_previas[otro_router] = (network, mask, es_primer_router)
+            conexiones_ospf_previas[otro_router] = (network, mask, es_primer_router, area_red)
     
     return conexiones_previas, conexiones_ospf_previas
 
-# Funciones para modificar la configuración del router
-def mostrar_configuracion_router(router_num, vlans_router, conexiones_router):
-    """
-    Muestra la configuración actual del router
+# Función para declarar la topología sin asignar direcciones (áreas OSPF automáticas)
+# Retorna la lista de routers con el formato de la especificación: {"swc3", "vlans", "conexiones"}
+def declarar_routers_interactivo(num_routers, num_swc3, vlans_combos):
+    routers = []
+    routers_con_swc3 = {}
+    conexiones_registradas = {i: [] for i in range(1, num_routers + 1)}
+    
+    for r in range(1, num_routers + 1):
+        print(f"\n" + "="*50)
+        print(f"🖥️ DECLARANDO ROUTER {r}")
+        print("="*50)
+        
+        tiene_swc3 = False
+        if sum(1 for asignado in routers_con_swc3.values() if asignado) < num_swc3:
+            tiene_swc3 = asignar_swc3_a_router(r, num_swc3, routers_con_swc3)
+        
+        vlans_router = []
+        num_vlans_router = validar_numero_positivo(f"🏷️ ¿Cuántas VLANs tiene el router {r}?: ")
+        for i in range(num_vlans_router):
+            vlan_id = validar_vlan_id(f"Número de VLAN {i+1} de {num_vlans_router} (empezando desde 2): ", vlans_combos)
+            if vlan_id in vlans_router:
+                print(f"❌ La VLAN {vlan_id} ya está en el router {r}")
+                continue
+            vlans_router.append(vlan_id)
+        
+        if conexiones_registradas[r]:
+            print(f"🔗 Conexiones ya declaradas para el Router {r}: {sorted(conexiones_registradas[r])}")
+        
+        conexiones = []
+        nuevas_conexiones = validar_numero(f"\n🔗 ¿Cuántas conexiones NUEVAS tiene el router {r}? (No incluyas las ya declaradas): ")
+        for j in range(nuevas_conexiones):
+            routers_disponibles = [i for i in range(1, num_routers + 1)
+                                   if i != r and i not in conexiones_registradas[r]]
+            if not routers_disponibles:
+                print(f"✅ El Router {r} ya está conectado a todos los demás routers.")
+                break
+            print(f"🖥️ Routers disponibles para conexión: {routers_disponibles}")
+            hacia_router = validar_router_destino(f"¿Hacia qué router va la conexión {j+1} del router {r}?: ", r, num_routers, conexiones_registradas)
+            conexiones_registradas[r].append(hacia_router)
+            conexiones_registradas[hacia_router].append(r)
+            conexiones.append(hacia_router)
+            print(f"✅ Router {r} ↔ Router {hacia_router}")
+        
+        routers.append({"swc3": tiene_swc3, "vlans": vlans_router, "conexiones": conexiones})
+    
+    return routers
+
+# Función para pedir el ancho de banda de los enlaces entre routers que no son de 10 Mbps
+# (línea "bandwidth", métrica EIGRP y variance, costo OSPF y capacidad en la planificación por carga)
+# Retorna {(r1, r2): kbps} con r1 < r2, como el "anchos_banda" de la especificación
+def pedir_anchos_banda(conexiones_mapa):
+    anchos_banda = {}
+    if not conexiones_mapa or not validar_si_no("📶 ¿Hay enlaces entre routers que no sean de 10 Mbps? (s/n): "):
+        return anchos_banda
+    
+    print(f"🔗 Enlaces configurados: {', '.join(f'{r1}-{r2}' for r1, r2 in sorted(conexiones_mapa))}")
+    num_enlaces = validar_numero_positivo("📶 ¿Cuántos enlaces tienen otro ancho de banda?: ")
+    while len(anchos_banda) < min(num_enlaces, len(conexiones_mapa)):
+        entrada = validar_texto(f"🔗 Enlace {len(anchos_banda) + 1} de {num_enlaces} (ej: 1-3): ")
+        try:
+            conexion_key = tuple(sorted(int(r) for r in entrada.split('-')))
+        except ValueError:
+            conexion_key = None
+        if conexion_key not in conexiones_mapa:
+            print(f"❌ Error: {entrada} no es un enlace configurado.")
+            continue
+        anchos_banda[conexion_key] = validar_numero_positivo(f"📶 Ancho de banda del enlace R{conexion_key[0]}-R{conexion_key[1]} en kbps (ej: 1544): ")
+    
+    return anchos_banda
+
+# Funciones para modificar la configuración del router
+def mostrar_configuracion_router(router_num, vlans_router, conexiones_router):
+    """
+    Muestra la configuración actual del router
     """
     print(f"\n📋 CONFIGURACIÓN ACTUAL DEL ROUTER {router_num}:")
     print("="*50)
@@ -935,7 +2729,7 @@ def modificar_vlans_router(router_num, vlans_router, vlans_combos, router_vlans_
             print("❌ Opción no válida. Selecciona 1, 2, 3 o 4.")
 
 def modificar_conexiones_router(router_num, conexiones_router, conexiones_ospf, num_routers, 
-                              conexiones_registradas, redes_routers, conexiones_mapa, area_ospf):
+                              conexiones_registradas, registro, area_ospf):
     """
     Permite modificar las conexiones del router actual
     """
@@ -963,11 +2757,10 @@ def modificar_conexiones_router(router_num, conexiones_router, conexiones_ospf,
             hacia_router = validar_router_destino(f"¿Hacia qué router crear la conexión?: ", 
                                                 router_num, num_routers, conexiones_registradas)
             
-            # Asignar una red de la lista de redes entre routers
-            if redes_routers:
-                network, mask = redes_routers.pop(0)
-                conexion_key = tuple(sorted([router_num, hacia_router]))
-                conexiones_mapa[conexion_key] = (network, mask)
+            # Pedir una red /30 para la nueva conexión
+            red = registro.conectar(router_num, hacia_router)
+            if red:
+                network, mask = red
                 
                 # Si este router tiene el número más bajo, es el "primer router"
                 es_primer_router = router_num < hacia_router
@@ -1021,13 +2814,8 @@ def modificar_conexiones_router(router_num, conexiones_router, conexiones_ospf,
                 if router_a_desconectar in conexiones_registradas[router_num]:
                     conexiones_registradas[router_num].remove(router_a_desconectar)
                 
-                # Devolver la red a la lista de disponibles
-                redes_routers.append((network, mask))
-                
-                # Eliminar del mapa de conexiones
-                conexion_key = tuple(sorted([router_num, router_a_desconectar]))
-                if conexion_key in conexiones_mapa:
-                    del conexiones_mapa[conexion_key]
+                # Eliminar del registro y dejar la red disponible para otra conexión
+                registro.desconectar(router_num, router_a_desconectar)
                 
                 print(f"✅ Conexión con Router {router_a_desconectar} eliminada ({network}/{mask})")
             else:
@@ -1050,7 +2838,7 @@ def modificar_conexiones_router(router_num, conexiones_router, conexiones_ospf,
 
 def confirmar_o_modificar_router(router_num, vlans_router, conexiones_router, conexiones_ospf, 
                                vlans_combos, router_vlans_asignadas, num_routers, 
-                               conexiones_registradas, redes_routers, conexiones_mapa, area_ospf):
+                               conexiones_registradas, registro, area_ospf):
     """
     Permite al usuario confirmar o modificar la configuración del router actual
     """
@@ -1073,8 +2861,7 @@ def confirmar_o_modificar_router(router_num, vlans_router, conexiones_router, co
             modificar_vlans_router(router_num, vlans_router, vlans_combos, router_vlans_asignadas)
         elif opcion == 3:  # Modificar conexiones
             modificar_conexiones_router(router_num, conexiones_router, conexiones_ospf, 
-                                      num_routers, conexiones_registradas, redes_routers, 
-                                      conexiones_mapa, area_ospf)
+                                      num_routers, conexiones_registradas, registro, area_ospf)
         elif opcion == 4:  # Ver configuración
             continue  # El bucle mostrará la configuración nuevamente
         else:
@@ -1091,10 +2878,13 @@ def generar_router_id_swc3(area, contador_base):
     area_num = int(area) + 1
     return f"{area_num}.{area_num}.{area_num}.{contador_base}"
 
-def generar_comandos_swc3(router_num, vlans_asignadas, area_ospf, router_id_swc3, ip_hacia_router, ip_admin_swc3, tipo_ruteo="ospf", rutas_estaticas=None):
+def generar_comandos_swc3(router_num, vlans_asignadas, area_ospf, router_id_swc3, ip_hacia_router, ip_admin_swc3, tipo_ruteo="ospf", rutas_estaticas=None, redes6=None, redes_plan=None, areas_stub=None, prioridades_stp=None, miembros_troncal=1):
     """
     Genera comandos de configuración para Switch Capa 3
     """
+    # Dual-stack: el SWC3 es el segundo extremo del enlace hacia el router
+    ipv6_hacia_router = comandos_ipv6_interfaz(redes6, obtener_network_from_ip(ip_hacia_router, 30), 1, tipo_ruteo, area_ospf)
+    
     comandos = [
         "en",
         "conf t", 
@@ -1108,11 +2898,13 @@ def generar_comandos_swc3(router_num, vlans_asignadas, area_ospf, router_id_swc3
         "username admin privilege 15 password cisco",
         "enable secret cisco",
         "ip routing",  # Comando clave para habilitar routing
+        *(["ipv6 unicast-routing"] if redes6 else []),
         
         # Interfaz hacia el router (sin switchport)
         "int gi1/0/1",
         "no switchport",
         f"ip add {ip_hacia_router} {convertir_mascara(30)}",
+        *ipv6_hacia_router,
         "no shut",
         
         # VLAN administrativa
@@ -1127,9 +2919,10 @@ def generar_comandos_swc3(router_num, vlans_asignadas, area_ospf, router_id_swc3
         mascara_decimal = convertir_mascara(mask)
         comandos.extend([
             f"int vlan {vlan_num}",
-            f"ip add {ip_usable} {mascara_decimal}",
-            "no shut"
+            f"ip add {ip_usable} {mascara_decimal}"
         ])
+        comandos.extend(comandos_ipv6_interfaz(redes6, network, 0, tipo_ruteo, area_ospf))
+        comandos.append("no shut")
     
     # Configurar DHCP para cada VLAN
     for vlan_num, (network, mask) in vlans_asignadas.items():
@@ -1154,30 +2947,62 @@ def generar_comandos_swc3(router_num, vlans_asignadas, area_ospf, router_id_swc3
         "vlan 1",
         "name uno"
     ])
+
+    # El SWC3 es el gateway de sus VLANs: normalmente también su raíz de spanning-tree
+    if prioridades_stp:
+        comandos.extend(comandos_prioridades_stp(prioridades_stp))
+
+    # Interfaz hacia el switch normal (con switchport trunk; EtherChannel activo si lleva varios cables)
+    comandos.extend(comandos_troncal([f"gi1/0/{puerto}" for puerto, _ in puertos_troncal_swc3(miembros_troncal)], "active",
+                                     [1, *vlans_asignadas]))
+    comandos.append("exit")
     
-    # Interfaz hacia el switch normal (con switchport trunk)
-    comandos.extend([
-        "int gi1/0/2",
-        "switchport mode trunk",
-        "exit"
-    ])
+    # Solo gi1/0/1 (hacia el router) tiene vecino: las SVI son pasivas
+    interfaces_pasivas = ["vlan 1"] + [f"vlan {vlan_num}" for vlan_num in vlans_asignadas]
     
     # Configuración de ruteo según el tipo elegido
     if tipo_ruteo == "ospf":
         # Configuración OSPF
         comandos.extend([
             "router ospf 1",
-            f"router-id {router_id_swc3}",
+            f"router-id {router_id_swc3}"
+        ])
+        comandos.extend(comandos_ajustes_ospf(interfaces_pasivas))
+        redes_ospf = [
             # Red administrativa
-            f"network 192.168.{router_num}.0 0.0.0.255 area {area_ospf}",
+            (f"192.168.{router_num}.0", 24, area_ospf),
             # Red hacia el router
-            f"network {obtener_network_from_ip(ip_hacia_router, 30)} 0.0.0.3 area {area_ospf}"
-        ])
+            (obtener_network_from_ip(ip_hacia_router, 30), 30, area_ospf)
+        ]
         
         # Agregar redes de VLANs al área del router
         for vlan_num, (network, mask) in vlans_asignadas.items():
-            wildcard = convertir_a_wildcard(convertir_mascara(mask))
-            comandos.append(f"network {network} {wildcard} area {area_ospf}")
+            redes_ospf.append((network, mask, area_ospf))
+        
+        comandos.extend(comandos_network_ospf(redes_ospf, redes_plan))
+        
+        # El SWC3 es un router interno de su área: "area X stub" igual que su router
+        if areas_stub:
+            comandos.extend(comandos_areas_stub(areas_stub))
+        
+        # OSPFv3: las interfaces ya se asignaron a su área con "ipv6 ospf 1 area X"
+        if redes6:
+            comandos.extend([
+                "ipv6 router ospf 1",
+                f"router-id {router_id_swc3}"
+            ])
+            comandos.extend(comandos_ajustes_ospf(interfaces_pasivas))
+            if areas_stub:
+                comandos.extend(comandos_areas_stub(areas_stub))
+    
+    elif tipo_ruteo in ("eigrp", "rip"):
+        # Administración, enlace hacia el router y VLANs; el SWC3 tiene un único camino, sin variance
+        redes = [(f"192.168.{router_num}.0", 24), (obtener_network_from_ip(ip_hacia_router, 30), 30)]
+        redes += list(vlans_asignadas.values())
+        if tipo_ruteo == "eigrp":
+            comandos.extend(comandos_eigrp(redes, redes_plan, router_id_swc3, interfaces_pasivas, None, redes6))
+        else:
+            comandos.extend(comandos_rip(redes, interfaces_pasivas, redes6))
     
     elif tipo_ruteo == "estatico":
         # Configuración de rutas estáticas
@@ -1344,10 +3169,11 @@ def generar_codigo_ptbuilder(datos_red, mapa_interfaces_dinamico):
             routers_data[router_num] = {
                 'router': dispositivo,
                 'swc3': None,
-                'switch': None
+                'switches': [],
+                'pcs': {}
             }
     
-    # Buscar SWC3 y Switches correspondientes
+    # Buscar SWC3, Switches y PCs correspondientes
     for dispositivo in datos_red:
         nombre = dispositivo['nombre']
         tipo = dispositivo['tipo']
@@ -1361,200 +3187,1405 @@ def generar_codigo_ptbuilder(datos_red, mapa_interfaces_dinamico):
             if router_num in routers_data:
                 routers_data[router_num]['swc3'] = dispositivo
         elif tipo == 'SW':
-            # SWITCH1 corresponde a Router1
-            router_num = int(nombre.replace('SWITCH', ''))
+            # SWITCH1 (y los encadenados SWITCH1_2, SWITCH1_3...) corresponden a Router1
+            router_num = dispositivo.get('router') or int(nombre.replace('SWITCH', ''))
             if router_num in routers_data:
-                routers_data[router_num]['switch'] = dispositivo
+                routers_data[router_num]['switches'].append(dispositivo)
+        elif tipo == 'PC':
+            switch_nombre = dispositivo.get('switch_nombre', f"SWITCH{dispositivo['switch']}")
+            if dispositivo['switch'] in routers_data:
+                routers_data[dispositivo['switch']]['pcs'].setdefault(switch_nombre, []).append(dispositivo)
+    
+    # CONFIGURACIÓN DE ESPACIADO Y DISTRIBUCIÓN
+    ESPACIADO_HORIZONTAL = 250    # Distancia entre grupos de router
+    ESPACIADO_VERTICAL = 200      # Distancia entre filas
+    ESPACIADO_DISPOSITIVOS = 80   # Distancia entre dispositivos del mismo grupo
+    ROUTERS_POR_FILA = 3          # Número de routers por fila
+    PCS_POR_FILA = 3              # PCs por fila debajo de cada switch
+    ALTO_FILA_PCS = 60            # Distancia entre filas de PCs
+    
+    # Posiciones base para cada fila
+    X_INICIAL = 50
+    Y_INICIAL = 50
+    
+    # Calcular posiciones para cada dispositivo
+    posiciones = {}
+    
+    # Los switches de un router van uno debajo del otro, cada uno con sus filas de PCs;
+    # un grupo más alto que el clásico (1 switch, 3 PCs) empuja hacia abajo las filas de routers siguientes
+    y_fila = Y_INICIAL
+    alto_extra_fila = 0
+    
+    for i, (router_num, devices) in enumerate(sorted(routers_data.items())):
+        # Calcular posición en la fila (cada fila nueva empieza debajo del grupo más alto de la anterior)
+        posicion_en_fila = i % ROUTERS_POR_FILA
+        if i and posicion_en_fila == 0:
+            y_fila += ESPACIADO_VERTICAL + alto_extra_fila
+            alto_extra_fila = 0
+        
+        # Coordenadas base del grupo
+        x_base = X_INICIAL + (posicion_en_fila * ESPACIADO_HORIZONTAL)
+        y_base = y_fila
+        
+        # Posicionar Router (centro del grupo)
+        router_device = devices['router']
+        posiciones[router_device['nombre']] = (x_base + ESPACIADO_DISPOSITIVOS, y_base)
+        
+        # Posicionar SWC3 (arriba del router, si existe)
+        if devices['swc3']:
+            swc3_device = devices['swc3']
+            posiciones[swc3_device['nombre']] = (x_base + ESPACIADO_DISPOSITIVOS, y_base - ESPACIADO_DISPOSITIVOS)
+        
+        # Posicionar Switches (abajo del router)
+        y_switch = y_base + ESPACIADO_DISPOSITIVOS
+        y_ultima_fila = y_switch + ESPACIADO_DISPOSITIVOS
+        for switch_device in devices['switches']:
+            posiciones[switch_device['nombre']] = (x_base + ESPACIADO_DISPOSITIVOS, y_switch)
+            
+            # Posicionar PCs debajo del switch en filas de 3 (izquierda, centro un poco más abajo, derecha)
+            for indice_pc, pc in enumerate(devices['pcs'].get(switch_device['nombre'], [])):
+                columna = indice_pc % PCS_POR_FILA
+                y_ultima_fila = y_switch + ESPACIADO_DISPOSITIVOS + (indice_pc // PCS_POR_FILA) * ALTO_FILA_PCS
+                posiciones[pc['nombre']] = (x_base + columna * ESPACIADO_DISPOSITIVOS,
+                                            y_ultima_fila + (20 if columna == 1 else 0))
+            y_switch = y_ultima_fila + ESPACIADO_DISPOSITIVOS
+        alto_extra_fila = max(alto_extra_fila, y_ultima_fila - (y_base + 2 * ESPACIADO_DISPOSITIVOS))
+    
+    # Paso 1: Crear dispositivos
+    codigo_js.append('console.log("Ejecutando Paso 1: Creando dispositivos...");')
+    
+    # Crear dispositivos agrupados por router para mejor organización visual
+    for i, (router_num, devices) in enumerate(sorted(routers_data.items())):
+        # Crear router
+        router_device = devices['router']
+        x, y = posiciones[router_device['nombre']]
+        codigo_js.append(f'addDevice("{router_device["nombre"]}", "2811", {x}, {y});')
+        
+        # Crear SWC3 si existe
+        if devices['swc3']:
+            swc3_device = devices['swc3']
+            x, y = posiciones[swc3_device['nombre']]
+            codigo_js.append(f'addDevice("{swc3_device["nombre"]}", "3650-24PS", {x}, {y});')
+        
+        # Crear Switches
+        for switch_device in devices['switches']:
+            x, y = posiciones[switch_device['nombre']]
+            codigo_js.append(f'addDevice("{switch_device["nombre"]}", "2960-24TT", {x}, {y});')
+            
+            # Crear PCs conectadas al switch
+            for pc in devices['pcs'].get(switch_device['nombre'], []):
+                pc_x, pc_y = posiciones[pc['nombre']]
+                codigo_js.append(f'addDevice("{pc["nombre"]}", "PC-PT", {pc_x}, {pc_y});')
+    codigo_js.append('console.log("Paso 1 completado.");')
+    codigo_js.append('')
+    
+    # Paso 2: Agregar módulos
+    codigo_js.append('console.log("Ejecutando Paso 2: Agregando módulos...");')
+    for dispositivo in datos_red:
+        nombre = dispositivo['nombre']
+        tipo = dispositivo['tipo']
+        
+        # Agregar módulos según el tipo
+        if tipo == 'R':  # Router
+            # Instalar módulo NM-4E en slot especial 1
+            codigo_js.append(f'addModuleFixed("{nombre}", 1, "NM-4E");')
+            # Instalar módulos HWIC en slots restantes
+            for slot in [0, 2, 3]:  # Slots 0, 2, 3 (slot 1 usado por NM-4E)
+                codigo_js.append(f'addModuleFixed("{nombre}", {slot}, "HWIC-1GE-SFP");')
+    codigo_js.append('console.log("Paso 2 completado.");')
+    codigo_js.append('')
+    
+    # Paso 3: Crear conexiones
+    codigo_js.append('console.log("Ejecutando Paso 3: Creando conexiones...");')
+    
+    # Procesar todas las conexiones del mapa dinámico
+    for conexion_key, conexion_data in mapa_interfaces_dinamico.items():
+        
+        # CONEXIONES ROUTER ↔ ROUTER (formato: (r1, r2))
+        if isinstance(conexion_key, tuple) and len(conexion_key) == 2:
+            r1, r2 = conexion_key
+            device1 = f'Router{r1}'
+            device2 = f'Router{r2}'
+            interface1 = conexion_data['r1_interface']
+            interface2 = conexion_data['r2_interface']
+            cable_type = conexion_data['link_type']
+            
+            codigo_js.append(f'addLink("{device1}", "{interface1}", "{device2}", "{interface2}", "{cable_type}");')
+        
+        # CONEXIONES ROUTER ↔ SWC3, SWC3 ↔ SWITCH, ROUTER ↔ SWITCH (formato: string)
+        elif isinstance(conexion_key, str):
+            device1 = conexion_data['device1']
+            device2 = conexion_data['device2']
+            interface1 = conexion_data['interface1']
+            interface2 = conexion_data['interface2']
+            cable_type = conexion_data['link_type']
+            
+            codigo_js.append(f'addLink("{device1}", "{interface1}", "{device2}", "{interface2}", "{cable_type}");')
+    
+    codigo_js.append('console.log("Paso 3 completado.");')
+    codigo_js.append('')
+    
+    # Paso 4: Configurar DHCP en las PCs
+    codigo_js.append('console.log("Ejecutando Paso 4: Configurando DHCP en PCs...");')
+    
+    # Configurar DHCP en todas las PCs
+    for i, (router_num, devices) in enumerate(sorted(routers_data.items())):
+        for switch_device in devices['switches']:
+            for pc in devices['pcs'].get(switch_device['nombre'], []):
+                codigo_js.append(f'configurePcIp("{pc["nombre"]}", true);')
+    
+    codigo_js.append('console.log("Paso 4 completado. Topología lista!");')
+    
+    return '\n'.join(codigo_js)
+
+def guardar_codigo_ptbuilder(filename_base, codigo_js):
+    """
+    Guarda el código JavaScript en un archivo separado
+    """
+    filename_js = f"{filename_base}_PTBuilder.js"
+    
+    try:
+        with open(filename_js, 'w') as f:
+            f.write(codigo_js)
+        return filename_js
+    except Exception as e:
+        print(f"❌ Error al guardar código PTBuilder: {e}")
+        return None
+
+def mostrar_resumen_ptbuilder(filename_js, num_routers, num_swc3, capa_acceso=None):
+    """
+    Muestra resumen de lo generado para PTBuilder con módulo NM-4E, distribución inteligente y PCs con DHCP
+    """
+    num_pcs = num_routers * 3  # 3 PCs por router/switch
+    num_switches = num_routers
+    if capa_acceso is not None:
+        num_switches = sum(len(switches) for switches in capa_acceso.values())
+        num_pcs = sum(len(switch['pcs']) for switches in capa_acceso.values() for switch in switches)
+    reparto_pcs = "3 por switch" if num_switches == num_routers and num_pcs == num_routers * 3 else "según hosts por VLAN"
+    print(f"\n" + "="*60)
+    print("🚀 CÓDIGO PTBUILDER V5.0 GENERADO")
+    print("="*60)
+    print(f"📁 Archivo JavaScript: {filename_js}")
+    print(f"🖥️ Routers 2811 creados: {num_routers}")
+    print(f"🔧 Módulos NM-4E instalados: {num_routers}")
+    print(f"🔌 SWC3 creados: {num_swc3}")
+    print(f"🔄 Switches creados: {num_switches}")
+    print(f"💻 PCs creadas: {num_pcs} ({reparto_pcs})")
+    print(f"\n🎯 DISTRIBUCIÓN INTELIGENTE:")
+    print(f"   • Dispositivos agrupados por router")
+    print(f"   • 3 routers por fila (espaciado optimizado)")
+    print(f"   • SWC3 arriba, Router centro, Switch abajo")
+    print(f"   • PCs distribuidas alrededor de cada switch")
+    print(f"   • Distancias reducidas entre dispositivos relacionados")
+    print(f"\n💻 CONFIGURACIÓN DE PCs:")
+    print(f"   • Modelo: PC-PT estándar")
+    print(f"   • DHCP habilitado automáticamente")
+    print(f"   • Interfaces: FastEthernet0/2, FastEthernet0/3, FastEthernet0/4")
+    print(f"   • Conexiones straight a switch")
+    print(f"\n🔧 CARACTERÍSTICAS DE LOS ROUTERS:")
+    print(f"   • Modelo: Cisco 2811")
+    print(f"   • Módulo NM-4E en slot 1")
+    print(f"   • Interfaces NM-4E: Ethernet1/0, Ethernet1/1, Ethernet1/2, Ethernet1/3")
+    print(f"   • Módulos HWIC-1GE-SFP en slots 0, 2, 3")
+    print(f"\n📋 INSTRUCCIONES DE USO:")
+    print(f"1. Abre PTBuilderV2 en Packet Tracer")
+    print(f"2. Copia el contenido de {filename_js}")
+    print(f"3. Pega en el editor de PTBuilderV2")
+    print(f"4. Haz clic en 'Ejecutar'")
+    print(f"5. ¡Tu topología completa con PCs se creará automáticamente!")
+    print("="*60)
+
+# ============================================================================
+# PLAN DE RED: GENERACIÓN SIN PREGUNTAS Y RENDERIZADO DEL ARCHIVO .CISCO
+# ============================================================================
+
+def construir_datos_red(num_routers, routers_con_swc3, capa_acceso=None):
+    """
+    Lista de dispositivos (routers, SWC3, switches y PCs) para PTBuilder
+    capa_acceso: {router: planificar_capa_acceso}; sin ella, 1 switch y 3 PCs por router
+    """
+    datos_red = []
+    
+    # Agregar routers
+    for r in range(1, num_routers + 1):
+        datos_red.append({'nombre': f'Router{r}', 'tipo': 'R'})
+    
+    # Agregar SWC3
+    for r in range(1, num_routers + 1):
+        if routers_con_swc3.get(r, False):
+            datos_red.append({'nombre': f'SWC3_R{r}', 'tipo': 'SWC3'})
+    
+    # Agregar switches
+    for r in range(1, num_routers + 1):
+        if capa_acceso is not None:
+            for switch in capa_acceso.get(r, []):
+                datos_red.append({'nombre': switch['nombre'], 'tipo': 'SW', 'router': r})
+        else:
+            datos_red.append({'nombre': f'SWITCH{r}', 'tipo': 'SW', 'router': r})
+    
+    # Agregar PCs (3 PCs por switch, o los que reparte la capa de acceso)
+    for r in range(1, num_routers + 1):
+        if capa_acceso is not None:
+            for switch in capa_acceso.get(r, []):
+                for pc_nombre, _, _ in switch['pcs']:
+                    datos_red.append({'nombre': pc_nombre, 'tipo': 'PC', 'switch': r, 'switch_nombre': switch['nombre']})
+        else:
+            for pc_num in range(1, 4):  # PC1, PC2, PC3 por cada switch
+                datos_red.append({'nombre': f'PC{r}_{pc_num}', 'tipo': 'PC', 'switch': r})
+    
+    return datos_red
+
+def capa_acceso_de_plan(plan):
+    """
+    Switches y PCs de acceso de todos los routers del plan: {router: planificar_capa_acceso}
+    """
+    return {r: planificar_capa_acceso(plan, r) for r in range(1, plan['num_routers'] + 1)}
+
+def generar_ptbuilder_de_plan(plan):
+    """
+    Genera el código PTBuilder de un plan completo
+    """
+    capa_acceso = capa_acceso_de_plan(plan)
+    mapa_interfaces_dinamico = crear_mapa_interfaces_dinamico(
+        plan['conexiones_mapa'], plan['router_vlans_asignadas'], plan['routers_con_swc3'],
+        plan.get('miembros_etherchannel', 1), capa_acceso)
+    datos_red = construir_datos_red(plan['num_routers'], plan['routers_con_swc3'], capa_acceso)
+    return generar_codigo_ptbuilder(datos_red, mapa_interfaces_dinamico)
+
+def conexiones_de_router(plan, router_num):
+    """
+    Reconstruye las conexiones de un router a partir del mapa de conexiones del plan
+    Retorna (conexiones_router, conexiones_ospf) con el formato de generar_comandos_router
+    """
+    conexiones_router = {}
+    conexiones_ospf = {}
+    
+    for conexion_key, (network, mask) in plan['conexiones_mapa'].items():
+        r1, r2 = conexion_key
+        if router_num in conexion_key:
+            otro_router = r2 if r1 == router_num else r1
+            es_primer_router = r1 == router_num
+            area_red = plan['areas_conexiones'].get(conexion_key, plan['areas_ospf'][router_num])
+            conexiones_router[otro_router] = (network, mask, es_primer_router)
+            conexiones_ospf[otro_router] = (network, mask, es_primer_router, area_red)
+    
+    return conexiones_router, conexiones_ospf
+
+def redes_del_plan(plan):
+    """
+    Todas las redes IPv4 del plan: combos de VLANs (asignados o no), redes /30 y redes administrativas
+    """
+    redes = [red for _, combos in plan['vlans_combos'] for red in combos]
+    redes += list(plan['redes_30'])
+    redes += [(f"192.168.{r}.0", 24) for r in range(1, plan['num_routers'] + 1)]
+    return list(dict.fromkeys(redes))
+
+def areas_de_router(plan, router_num):
+    """
+    Áreas OSPF en las que el router tiene interfaces: la suya y la de cada enlace
+    (un router con más de una es un ABR)
+    """
+    areas = [plan['areas_ospf'][router_num]]
+    for conexion_key in sorted(plan['conexiones_mapa']):
+        if router_num in conexion_key:
+            areas.append(plan['areas_conexiones'].get(conexion_key, plan['areas_ospf'][router_num]))
+    return list(dict.fromkeys(areas))
+
+def redes_por_area(plan):
+    """
+    Redes IPv4 en uso agrupadas por área OSPF: VLANs, red administrativa y red Router-SWC3
+    en el área del router, y cada enlace entre routers en su propia área
+    """
+    redes_area = {}
+    for r in range(1, plan['num_routers'] + 1):
+        area = plan['areas_ospf'][r]
+        redes_area.setdefault(area, []).append((f"192.168.{r}.0", 24))
+        redes_area[area].extend(plan['router_vlans_asignadas'].get(r, {}).values())
+        swc3_config = plan['swc3_configuraciones'].get(r)
+        if swc3_config:
+            redes_area[area].append(tuple(swc3_config['red_conexion']))
+    for conexion_key, red in plan['conexiones_mapa'].items():
+        area = plan['areas_conexiones'].get(conexion_key, plan['areas_ospf'][conexion_key[0]])
+        redes_area.setdefault(area, []).append(tuple(red))
+    return redes_area
+
+def calcular_rangos_area(plan):
+    """
+    Resúmenes por área para los comandos "area X range": el mínimo de bloques ajustados que
+    contienen las redes del área sin solaparse con redes de otras áreas.
+    Solo se conservan los bloques que agrupan dos o más redes (uno con una sola red no ahorra nada)
+    Retorna {area: [(network, mask), ...]}
+    """
+    redes_area = redes_por_area(plan)
+    rangos = {}
+    for area, redes in redes_area.items():
+        otras_areas = [red for otra_area, redes_otra in redes_area.items() if otra_area != area for red in redes_otra]
+        bloques = []
+        for network, mask in minimizar_redes_ospf(redes, otras_areas, ajustados=True):
+            inicio, fin = ip_to_int(network), ip_to_int(network) + 2 ** (32 - mask) - 1
+            if sum(1 for red, _ in redes if inicio <= ip_to_int(red) <= fin) >= 2:
+                bloques.append((network, mask))
+        if bloques:
+            rangos[area] = bloques
+    return rangos
+
+def metrica_eigrp(ancho_banda_kbps, retardo_us):
+    """
+    Métrica compuesta de EIGRP con los K por defecto: 256 × (10^7 / ancho de banda mínimo + retardo total / 10)
+    """
+    return 256 * (10 ** 7 // ancho_banda_kbps + retardo_us // 10)
+
+def distancias_eigrp(plan, grafo):
+    """
+    Camino EIGRP de cada router hacia las LAN de cada destino (Bellman-Ford, como converge EIGRP)
+    Retorna ({destino: {router: (ancho de banda mínimo, retardo total)}}, por_vecino) donde
+    por_vecino(vecino, router, camino) extiende el camino de un vecino con el enlace hacia él
+    """
+    num_routers = plan['num_routers']
+    anchos_banda = plan.get('anchos_banda', {})
+    
+    def atributos_enlace(r1, r2):
+        return anchos_banda.get(tuple(sorted([r1, r2])), ANCHO_BANDA_ENLACE_KBPS), RETARDO_ENLACE_US
+    
+    def por_vecino(vecino, router, camino):
+        ancho_enlace, retardo_enlace = atributos_enlace(router, vecino)
+        return min(camino[0], ancho_enlace), camino[1] + retardo_enlace
+    
+    mejores = {}
+    for destino in range(1, num_routers + 1):
+        caminos = {destino: (ANCHO_BANDA_LAN_KBPS, RETARDO_LAN_US)}
+        cambiado = True
+        while cambiado:
+            cambiado = False
+            for router in range(1, num_routers + 1):
+                if router == destino:
+                    continue
+                for vecino in grafo[router]:
+                    if vecino not in caminos:
+                        continue
+                    candidato = por_vecino(vecino, router, caminos[vecino])
+                    if router not in caminos or metrica_eigrp(*candidato) < metrica_eigrp(*caminos[router]):
+                        caminos[router] = candidato
+                        cambiado = True
+        mejores[destino] = caminos
+    return mejores, por_vecino
+
+def calcular_variance_eigrp(plan):
+    """
+    Variance de EIGRP de cada router a partir de los costos de los caminos:
+    para cada destino (las LAN de otro router) se calcula la distancia factible (FD) y, entre los vecinos
+    que cumplen la condición de factibilidad (distancia anunciada < FD), la métrica del camino por cada uno.
+    La variance es el menor entero que deja usar todos los sucesores factibles (balanceo por costos desiguales).
+    Con enlaces iguales solo hay caminos de igual costo y la variance queda en 1
+    Retorna {router: variance}
+    """
+    num_routers = plan['num_routers']
+    grafo = construir_grafo_topologia(plan['conexiones_mapa'], num_routers)
+    mejores, por_vecino = distancias_eigrp(plan, grafo)
+    
+    variance = {}
+    for router in range(1, num_routers + 1):
+        variance_router = 1
+        for destino, caminos in mejores.items():
+            if destino == router or router not in caminos:
+                continue
+            distancia_factible = metrica_eigrp(*caminos[router])
+            for vecino in grafo[router]:
+                if vecino in caminos and metrica_eigrp(*caminos[vecino]) < distancia_factible:
+                    metrica_vecino = metrica_eigrp(*por_vecino(vecino, router, caminos[vecino]))
+                    variance_router = max(variance_router, -(-metrica_vecino // distancia_factible))
+        variance[router] = min(variance_router, MAX_VARIANCE_EIGRP)
+    return variance
+
+def costo_ospf(ancho_banda_kbps):
+    """
+    Costo OSPF de una interfaz con "auto-cost reference-bandwidth": referencia / ancho de banda, mínimo 1
+    """
+    return max(1, REFERENCIA_ANCHO_BANDA_OSPF * 1000 // ancho_banda_kbps)
+
+def primer_salto_ruteo_dinamico(plan):
+    """
+    Primeros saltos hacia cada router con los que converge el ruteo dinámico del plan, según el costo de
+    los enlaces (plan['anchos_banda']): OSPF por la suma de costos, EIGRP por la métrica compuesta del sucesor.
+    RIP solo cuenta saltos, igual que los caminos de menos saltos de calcular_rutas_estaticas
+    Retorna la matriz primer_salto[origen - 1][destino - 1] (0 = sin camino) o None para RIP y estático
+    """
+    num_routers = plan['num_routers']
+    grafo = construir_grafo_topologia(plan['conexiones_mapa'], num_routers)
+    anchos_banda = plan.get('anchos_banda', {})
+    
+    if plan['tipo_ruteo'] == "ospf":
+        pesos = pesos_por_adyacencia(grafo, lambda enlace: costo_ospf(anchos_banda.get(enlace, ANCHO_BANDA_ENLACE_KBPS)))
+        return arboles_por_destino(grafo, num_routers, pesos)
+    
+    if plan['tipo_ruteo'] == "eigrp":
+        mejores, por_vecino = distancias_eigrp(plan, grafo)
+        primer_salto = [[0] * num_routers for _ in range(num_routers)]
+        for destino, caminos in mejores.items():
+            for router in caminos:
+                if router != destino:
+                    # Sucesor: el vecino por el que el camino tiene la menor métrica (empates por orden del grafo)
+                    primer_salto[router - 1][destino - 1] = min(
+                        (vecino for vecino in grafo[router] if vecino in caminos),
+                        key=lambda vecino: metrica_eigrp(*por_vecino(vecino, router, caminos[vecino])))
+        return primer_salto
+    return None
+
+def clasificar_areas_stub(plan, sin_resumen=False):
+    """
+    Áreas que pueden ser stub: todas las no troncales. Un área con rutas externas (tipo 5) no puede
+    ser stub, pero los planes OSPF generados nunca las tienen: no llevan rutas estáticas ni
+    "redistribute" en ningún router, así que no hay ASBR.
+    Con sin_resumen son totally stubby: el ABR tampoco anuncia rutas inter-área, solo la ruta por defecto
+    Retorna {area: sin_resumen}
+    """
+    if plan['tipo_ruteo'] != "ospf":
+        return {}
+    areas_por_router = {r: areas_de_router(plan, r) for r in range(1, plan['num_routers'] + 1)}
+    if not any("0" in areas for areas in areas_por_router.values()):
+        return {}  # Sin área 0 no hay ABR que inyecte la ruta por defecto
+    
+    areas_stub = {}
+    for areas in areas_por_router.values():
+        for area in areas:
+            if area != "0":
+                areas_stub[area] = sin_resumen
+    return dict(sorted(areas_stub.items(), key=lambda item: int(item[0])))
+
+def area_de_enlace(area1, area2):
+    """
+    Área de un enlace entre routers de áreas distintas: la que no es el área 0
+    (así el router del área 0 queda como ABR); entre dos áreas no troncales, la menor
+    """
+    if area1 == area2:
+        return area1
+    if "0" in (area1, area2):
+        return area2 if area1 == "0" else area1
+    return min(area1, area2, key=int)
+
+def aplicar_areas_automaticas(plan, areas):
+    """
+    Aplica un reparto {router: area} (ver particionar_areas_ospf) a un plan ya armado:
+    área de cada router y de cada enlace, y router-ids renumerados por área en orden de router
+    (el SWC3 toma el número siguiente al de su router, como en la asignación manual)
+    Retorna los contadores finales por área
+    """
+    contadores_areas = {}
+    for r in range(1, plan['num_routers'] + 1):
+        area = areas.get(r, "0")
+        plan['areas_ospf'][r] = area
+        contadores_areas[area] = contadores_areas.get(area, 0) + 1
+        plan['router_ids'][r] = generar_router_id(area, contadores_areas[area])
+        if r in plan['swc3_configuraciones']:
+            contadores_areas[area] += 1
+            plan['swc3_configuraciones'][r]['router_id'] = generar_router_id_swc3(area, contadores_areas[area])
+    
+    for conexion_key in sorted(plan['conexiones_mapa']):
+        area1, area2 = (plan['areas_ospf'][r] for r in conexion_key)
+        plan['areas_conexiones'][conexion_key] = area_de_enlace(area1, area2)
+        if area1 != area2 and "0" not in (area1, area2):
+            print(f"⚠️ Enlace R{conexion_key[0]}-R{conexion_key[1]} entre las áreas {area1} y {area2} "
+                  f"(ninguna es el área 0): queda en el área {plan['areas_conexiones'][conexion_key]}")
+    
+    return contadores_areas
+
+def generar_comandos_dispositivos(plan, router_num):
+    """
+    Genera los bloques de comandos asociados a un router del plan:
+    el router, su SWC3 (si lo tiene) y sus switches de acceso
+    Retorna una lista de (nombre_dispositivo, comandos)
+    """
+    tipo_ruteo = plan['tipo_ruteo']
+    area_ospf = plan['areas_ospf'][router_num]
+    router_id = plan['router_ids'][router_num]
+    vlans_router = plan['router_vlans_asignadas'].get(router_num, {})
+    swc3_config = plan['swc3_configuraciones'].get(router_num)
+    conexiones_router, conexiones_ospf = conexiones_de_router(plan, router_num)
+    
+    bloques = []
+    redes6 = plan.get('redes6')
+    # Con minimizar_ospf las sentencias network se agregan sin cubrir redes de otros dispositivos
+    redes_plan = redes_del_plan(plan) if plan.get('minimizar_ospf') or tipo_ruteo == "eigrp" else None
+    # Si el router es ABR resume cada una de sus áreas con los rangos calculados en el plan
+    # (ABR: tiene interfaces en el área 0 y en alguna otra; sin el área 0 IOS ignora "area X range")
+    areas_router = areas_de_router(plan, router_num)
+    es_abr = "0" in areas_router and len(areas_router) > 1
+    rangos_area = []
+    if es_abr:
+        rangos_area = [(area, network, mask) for area in areas_router
+                       for network, mask in plan.get('rangos_area', {}).get(area, [])]
+    # Áreas stub del router: "no-summary" solo en el ABR, los routers internos llevan "area X stub"
+    areas_stub = plan.get('areas_stub', {})
+    # EIGRP: variance del router y ancho de banda de los enlaces que no son de 10 Mbps
+    variance = plan.get('variance_eigrp', {}).get(router_num)
+    anchos_banda = {otro: ancho for conexion_key, ancho in plan.get('anchos_banda', {}).items()
+                    if router_num in conexion_key for otro in conexion_key if otro != router_num}
+    areas_stub_router = [(area, areas_stub[area] and es_abr) for area in areas_router if area in areas_stub]
+    prioridades_stp = planificar_raices_stp(plan, router_num)
+    # EtherChannel solo en la troncal SWC3 → Switch (el 2811 no agrupa enlaces)
+    miembros_troncal = plan.get('miembros_etherchannel', 1) if swc3_config else 1
+    if swc3_config:
+        # Router se conecta al SWC3, no directamente al switch
+        comandos_router = generar_comandos_router_con_swc3(router_num, vlans_router, conexiones_router, area_ospf, conexiones_ospf, router_id, tipo_ruteo, None, swc3_config, redes6, redes_plan, rangos_area, areas_stub_router, plan.get('timers_ospf'), variance, anchos_banda)
+    else:
+        comandos_router = generar_comandos_router(router_num, vlans_router, conexiones_router, area_ospf, conexiones_ospf, router_id, tipo_ruteo, None, redes6, redes_plan, rangos_area, areas_stub_router, plan.get('timers_ospf'), variance, anchos_banda)
+    bloques.append((f"Router{router_num}", comandos_router))
+    
+    if swc3_config:
+        comandos_swc3 = generar_comandos_swc3(router_num, vlans_router, area_ospf, swc3_config['router_id'], 
+                                            swc3_config['ip_hacia_router'], swc3_config['ip_admin'], 
+                                            tipo_ruteo, None, redes6, redes_plan,
+                                            [(area_ospf, False)] if area_ospf in areas_stub else None,
+                                            prioridades_stp.get(f"SWC3_R{router_num}"), miembros_troncal)
+        bloques.append((f"SWC3_R{router_num}", comandos_swc3))
+    
+    for switch_acceso in planificar_capa_acceso(plan, router_num):
+        bloques.append((switch_acceso['nombre'], generar_comandos_switch(router_num, plan['vlans_combos'],
+                                                                         prioridades_stp[switch_acceso['nombre']], miembros_troncal,
+                                                                         vlans_router, switch_acceso)))
+    return bloques
+
+def renderizar_plan(plan):
+    """
+    Genera el contenido completo del archivo .CISCO a partir del plan
+    """
+    tipo_ruteo = plan['tipo_ruteo']
+    salida = []
+    
+    salida.append("! COMBOS GENERADOS CON VALIDACIONES (V5.0)\n")
+    salida.append("! Incluye SSH, Seguridad, configuración de Switches y Validaciones\n")
+    salida.append("! NUEVA FUNCIONALIDAD: Routers 2811 con módulo NM-4E\n")
+    salida.append("! Interfaces NM-4E: Ethernet1/0, Ethernet1/1, Ethernet1/2, Ethernet1/3\n")
+    salida.append(f"! TIPO DE RUTEO: {NOMBRES_TIPO_RUTEO[tipo_ruteo].upper()}\n")
+    salida.append(f"! SEMILLA DE ASIGNACIÓN: {plan['semilla']}\n\n")
+    
+    # Imprimir combos generados
+    salida.append("! Redes entre routers (/30):\n")
+    for idx, (network, mask) in enumerate(plan['redes_30']):
+        mascara_decimal = convertir_mascara(mask)
+        salida.append(f"! Red {idx+1}: {network}/{mask} ({mascara_decimal})\n")
+    
+    salida.append("\n! Combos generados para cada VLAN:\n")
+    for vlan_num, combos in plan['vlans_combos']:
+        salida.append(f"\n! VLAN {vlan_num}:\n")
+        for idx, (network, mask) in enumerate(combos):
+            mascara_decimal = convertir_mascara(mask)
+            salida.append(f"! Combo {idx+1}: {network}/{mask} ({mascara_decimal})\n")
+    
+    if plan.get('redes6'):
+        salida.append(f"\n! Direccionamiento IPv6 (dual-stack) dentro de {plan['base_ipv6']}:\n")
+        for network, (red6, prefijo) in plan['redes6'].items():
+            salida.append(f"! {network} ↔ {red6}/{prefijo}\n")
+    
+    if plan.get('areas_stub'):
+        salida.append("\n! Áreas stub (sin rutas externas):\n")
+        for area, sin_resumen in plan['areas_stub'].items():
+            salida.append(f"! Área {area}: {'totally stubby (solo ruta por defecto)' if sin_resumen else 'stub'}\n")
+    
+    salida.append("\n\n! CONFIGURACIÓN DE ROUTERS Y SWITCHES\n")
+    
+    for r in range(1, plan['num_routers'] + 1):
+        salida.append(f"\n! ---- ROUTER {r} ----\n")
+        salida.append(f"! Router-ID: {plan['router_ids'][r]}\n")
+        swc3_config = plan['swc3_configuraciones'].get(r)
+        if swc3_config:
+            network_r_swc3, mask_r_swc3 = swc3_config['red_conexion']
+            salida.append(f"! SWC3 Router-ID: {swc3_config['router_id']}\n")
+            salida.append(f"! Conexión Router-SWC3: {network_r_swc3}/{mask_r_swc3}\n")
+        
+        for nombre, comandos in generar_comandos_dispositivos(plan, r):
+            if nombre.startswith("Router"):
+                salida.append("\n! -- CONFIGURACIÓN DE ROUTER --\n")
+            else:
+                salida.append(f"\n! -- CONFIGURACIÓN DEL {nombre} --\n")
+            for comando in comandos:
+                salida.append(f"{comando}\n")
+    
+    if tipo_ruteo == "estatico":
+        rutas_estaticas_por_router = plan['rutas_estaticas']
+        rutas_estaticas_por_swc3 = plan['rutas_estaticas_swc3']
+        
+        # Agregar las rutas estáticas al final del archivo
+        salida.append(f"\n\n! ======================================\n")
+        salida.append(f"! RUTAS ESTÁTICAS CALCULADAS AUTOMÁTICAMENTE\n")
+        salida.append(f"! ======================================\n\n")
+        
+        if plan.get('reporte_carga'):
+            salida.append("! Rutas planificadas por carga. Carga prevista por enlace (caminos mínimos → planificada):\n")
+            for linea in lineas_reporte_carga(plan['reporte_carga']):
+                salida.append(f"! {linea}\n")
+            salida.append("\n")
+        
+        for router_num in range(1, plan['num_routers'] + 1):
+            if rutas_estaticas_por_router.get(router_num):
+                salida.append(f"! ---- RUTAS ESTÁTICAS PARA ROUTER {router_num} ----\n")
+                salida.append(f"! Configurar en Router{router_num}:\n")
+                for comando in generar_comandos_rutas_estaticas(rutas_estaticas_por_router[router_num]):
+                    salida.append(f"{comando}\n")
+                salida.append(f"\n")
+                
+                # También agregar rutas para SWC3 si existe - USAR RUTAS ESPECÍFICAS
+                if plan['routers_con_swc3'].get(router_num, False):
+                    salida.append(f"! ---- RUTAS ESTÁTICAS PARA SWC3_R{router_num} ----\n")
+                    salida.append(f"! Configurar en SWC3_R{router_num}:\n")
+                    
+                    # Usar las rutas específicas del SWC3, no las del router
+                    if router_num in rutas_estaticas_por_swc3:
+                        for comando in generar_comandos_rutas_estaticas(rutas_estaticas_por_swc3[router_num]):
+                            salida.append(f"{comando}\n")
+                    salida.append(f"\n")
+    
+    return ''.join(salida)
+
+def traducir_rutas_a_ipv6(rutas, redes6, indice6=None):
+    """
+    Deriva las rutas IPv6 equivalentes a una lista de rutas IPv4 (mismo camino y mismo siguiente salto)
+    Las redes sin equivalente IPv6 (ej: las administrativas 192.168.X.0) se omiten
+    indice6: redes6 indexado por red IPv4 entera → (red IPv6 entera, prefijo); se calcula si no se pasa
+    """
+    if indice6 is None:
+        indice6 = {ip_to_int(network): (ip6_to_int(red6), prefijo) for network, (red6, prefijo) in redes6.items()}
+    
+    rutas6 = []
+    for ruta in rutas:
+        if ruta.ipv6 or ruta.red not in indice6:
+            continue
+        
+        # El siguiente salto siempre está en una /30: primera usable → extremo 0, segunda → extremo 1
+        red_next_hop = ruta.next_hop & 0xFFFFFFFC
+        if red_next_hop not in indice6:
+            continue
+        red6_next_hop, prefijo_next_hop = indice6[red_next_hop]
+        posicion = ruta.next_hop - red_next_hop - 1
+        # En /127 se usan las dos direcciones (RFC 6164); en /64 el gateway es ::1
+        next_hop6 = red6_next_hop + posicion if prefijo_next_hop >= 127 else red6_next_hop + 1 + posicion
+        
+        red6, prefijo = indice6[ruta.red]
+        rutas6.append(RutaEstatica(red6, prefijo, next_hop6, ruta.tipo, ruta.id_a, ruta.id_b, ipv6=True))
+    return rutas6
+
+def asignar_ipv6_plan(plan, base_ipv6, prefijo_base, subredes_ocupadas6=None):
+    """
+    Agrega direccionamiento IPv6 al plan (dual-stack): una /64 por cada combo de VLAN
+    y una /127 por cada enlace entre routers y Router-SWC3.
+    Se asigna después de todo el IPv4 para que la misma semilla siga dando el mismo plan IPv4
+    """
+    if subredes_ocupadas6 is None:
+        subredes_ocupadas6 = []
+    
+    redes6 = {}
+    redes_a_asignar = [(network, 64) for _, combos in plan['vlans_combos'] for network, _ in combos]
+    redes_a_asignar += [(plan['conexiones_mapa'][key][0], 127) for key in sorted(plan['conexiones_mapa'])]
+    redes_a_asignar += [(plan['swc3_configuraciones'][r]['red_conexion'][0], 127) for r in sorted(plan['swc3_configuraciones'])]
+    
+    for network, prefijo in redes_a_asignar:
+        red6 = calcular_rango_subred6(base_ipv6, prefijo_base, prefijo, subredes_ocupadas6)
+        if red6 is None:
+            print(f"❌ No hay más espacio IPv6 en {base_ipv6}/{prefijo_base} para {network}")
+            break
+        redes6[network] = red6
+    
+    plan['base_ipv6'] = f"{base_ipv6}/{prefijo_base}"
+    plan['redes6'] = redes6
+    
+    # Rutas estáticas IPv6: mismas decisiones de camino que las IPv4
+    if plan['tipo_ruteo'] == "estatico":
+        indice6 = {ip_to_int(network): (ip6_to_int(red6), prefijo) for network, (red6, prefijo) in redes6.items()}
+        for rutas_por_dispositivo in (plan['rutas_estaticas'], plan['rutas_estaticas_swc3']):
+            for dispositivo, rutas in rutas_por_dispositivo.items():
+                rutas.extend(traducir_rutas_a_ipv6(rutas, redes6, indice6))
+    
+    return plan
+
+def timers_desde_especificacion(timers):
+    """
+    Timers hello/dead de la especificación: {"hello": 5, "dead": 20}; sin "dead" se usa 4 × hello como IOS
+    """
+    if not timers:
+        return None
+    hello = int(timers['hello'])
+    return (hello, int(timers.get('dead', hello * 4)))
+
+def pcs_desde_especificacion(espec):
+    """
+    PCs por VLAN de cada router: "pcs" del router ({"2": 40}) o, si no lo trae, "pcs_por_vlan" global
+    para cada una de sus VLANs. Retorna {router: {vlan_id: pcs}}; vacío si la especificación no
+    dimensiona la capa de acceso (3 PCs clásicos por switch)
+    """
+    por_defecto = espec.get('pcs_por_vlan')
+    if por_defecto is None and not any('pcs' in router for router in espec['routers']):
+        return {}
+    pcs_por_vlan = {}
+    for r, router in enumerate(espec['routers'], start=1):
+        cantidades = {int(vlan_id): int(pcs) for vlan_id, pcs in router.get('pcs', {}).items()}
+        pcs_por_vlan[r] = {vlan_id: cantidades.get(vlan_id, int(por_defecto or 0)) for vlan_id in router.get('vlans', [])}
+    return pcs_por_vlan
+
+def cargar_especificacion(ruta):
+    """
+    Carga una especificación de red en JSON, por ejemplo:
+    {
+      "base_ip": "17.0.0.0",
+      "tipo_ruteo": "ospf",                     ("ospf", "estatico", "eigrp" o "rip")
+      "aleatorio_routers": true,
+      "base_ipv6": "2001:db8:acad::/48",        (opcional: dual-stack)
+      "minimizar_ospf": true,                   (opcional: sentencias network agregadas)
+      "resumir_areas": true,                    (opcional: "area X range" en los ABR)
+      "areas_stub": "stub",                     (opcional: "stub" o "totally" para las áreas no troncales)
+      "timers_ospf": {"hello": 5, "dead": 20},  (opcional: timers de los enlaces entre routers)
+      "anchos_banda": {"1-3": 1544},            (opcional: kbps de enlaces que no son de 10 Mbps)
+      "rutas_por_carga": true,                  (opcional, estático: rutas que minimizan la utilización máxima)
+      "trafico": {"1-3": 2000},                 (opcional: kbps de las VLANs de R1 hacia las de R3)
+      "trafico_uniforme": 100,                  (opcional: kbps entre cada par de routers sin tráfico propio)
+      "areas_automaticas": 8,                   (opcional: áreas OSPF automáticas de hasta 8 routers;
+                                                 ignora el "area" de cada router)
+      "etherchannel": 2,                        (opcional: cables LACP en la troncal SWC3 → Switch, hasta 8)
+      "pcs_por_vlan": 30,                       (opcional: PCs de cada VLAN en cada router; agrega switches
+                                                 de acceso encadenados y agranda las máscaras que no alcancen)
+      "vlans": [{"id": 2, "mascara": 24, "combos": 3}, {"id": 3, "mascara": 26, "combos": 3}],
+      "routers": [
+        {"area": 0, "swc3": false, "vlans": [2, 3], "conexiones": [2]},
+        {"area": 1, "swc3": true, "vlans": [2], "conexiones": [1], "pcs": {"2": 60}}
+      ]
+    }
+    """
+    with open(ruta, 'r') as f:
+        return json.load(f)
+
+def enlaces_declarados_de(routers):
+    """
+    Enlaces válidos de una lista de routers con el formato de la especificación, en el orden
+    declarado y todavía sin red (mismas reglas que asignar_routers_declarados)
+    Retorna {(r1, r2): (None, None)}
+    """
+    num_routers = len(routers)
+    declarados = RegistroConexiones()
+    for r, router in enumerate(routers, start=1):
+        for hacia_router in router.get('conexiones', []):
+            conexion_key = tuple(sorted([r, hacia_router]))
+            if hacia_router == r or not (1 <= hacia_router <= num_routers) or conexion_key in declarados:
+                continue
+            if validar_conexiones_nm4e(r, declarados.conexiones_de(r), hacia_router) and \
+                    validar_conexiones_nm4e(hacia_router, declarados.conexiones_de(hacia_router), r):
+                declarados.conectar(r, hacia_router, (None, None))
+    return declarados.conexiones_mapa
+
+def ordenar_combos_por_direccion(vlans_combos):
+    """
+    Combos de cada VLAN en orden de dirección, para repartirlos área por área en tramos contiguos
+    """
+    return [(vlan_id, sorted(combos, key=lambda red: ip_to_int(red[0]))) for vlan_id, combos in vlans_combos]
+
+def asignar_routers_declarados(plan, routers, registro, areas_automaticas=None, enlaces_declarados=None):
+    """
+    Configura router por router (SWC3, VLANs y conexiones nuevas) a partir de una lista de routers
+    con el formato de la especificación, pidiendo las redes /30 al registro al crear cada enlace
+    Con áreas automáticas ({router: area}, ver particionar_areas_ospf) los routers se configuran
+    área por área, así cada área recibe tramos contiguos de direcciones que se pueden resumir;
+    solo se crean los enlaces de enlaces_declarados (la topología que se particionó)
+    Lanza ValueError si se acaban las redes /30
+    Retorna los contadores de router-id por área
+    """
+    tipo_ruteo = plan['tipo_ruteo']
+    num_routers = plan['num_routers']
+    orden_routers = list(enumerate(routers, start=1))
+    if areas_automaticas is not None:
+        orden_routers.sort(key=lambda par: (int(areas_automaticas[par[0]]), par[0]))
+    
+    contadores_areas = {}
+    combos_asignados = set()
+    combos_por_vlan = dict(plan['vlans_combos'])
+    
+    for r, router in orden_routers:
+        if areas_automaticas is not None:
+            area_ospf = areas_automaticas[r]
+        else:
+            area_ospf = str(router.get('area', 0)) if tipo_ruteo == "ospf" else "0"
+        plan['areas_ospf'][r] = area_ospf
+        contadores_areas[area_ospf] = contadores_areas.get(area_ospf, 0) + 1
+        plan['router_ids'][r] = generar_router_id(area_ospf, contadores_areas[area_ospf])
+        
+        # SWC3: toma la siguiente red /30 y el siguiente número de router-id del área
+        plan['routers_con_swc3'][r] = False
+        if router.get('swc3', False):
+            red_swc3 = registro.tomar_red_30()
+            if red_swc3 is None:
+                raise ValueError(f"No hay redes /30 disponibles para SWC3_R{r}")
+            contadores_areas[area_ospf] += 1
+            network_r_swc3, mask_r_swc3 = red_swc3
+            plan['routers_con_swc3'][r] = True
+            plan['swc3_configuraciones'][r] = {
+                'router_id': generar_router_id_swc3(area_ospf, contadores_areas[area_ospf]),
+                'ip_hacia_router': obtener_ip_usable(network_r_swc3, mask_r_swc3, 1),
+                'ip_admin': f"192.168.{r}.3",
+                'red_conexion': (network_r_swc3, mask_r_swc3)
+            }
+        
+        # VLANs: primer combo de la VLAN que no tenga otro router
+        vlans_router = {}
+        for vlan_id in router.get('vlans', []):
+            combo_libre = next((combo for combo in combos_por_vlan.get(vlan_id, []) if combo not in combos_asignados), None)
+            if combo_libre is None:
+                print(f"❌ No hay combos disponibles para la VLAN {vlan_id} en el Router {r}")
+                continue
+            vlans_router[vlan_id] = combo_libre
+            combos_asignados.add(combo_libre)
+        plan['router_vlans_asignadas'][r] = vlans_router
+        
+        # Conexiones nuevas: la red pertenece al área del router que la declara primero
+        for hacia_router in router.get('conexiones', []):
+            conexion_key = tuple(sorted([r, hacia_router]))
+            if hacia_router == r or not (1 <= hacia_router <= num_routers) or conexion_key in plan['conexiones_mapa']:
+                continue
+            if areas_automaticas is not None and conexion_key not in enlaces_declarados:
+                continue
+            if not validar_conexiones_nm4e(r, registro.conexiones_de(r), hacia_router) or \
+                    not validar_conexiones_nm4e(hacia_router, registro.conexiones_de(hacia_router), r):
+                continue
+            if not registro.conectar(r, hacia_router):
+                raise ValueError(f"No hay más redes /30 disponibles para la conexión Router {r} ↔ Router {hacia_router}")
+            plan['areas_conexiones'][conexion_key] = area_ospf
+    
+    if areas_automaticas is not None:
+        contadores_areas = aplicar_areas_automaticas(plan, areas_automaticas)
+    return contadores_areas
+
+def generar_plan_desde_especificacion(espec, semilla, subredes_ocupadas=None):
+    """
+    Genera un plan completo sin preguntas a partir de una especificación y una semilla
+    Sigue el mismo orden de asignación que el modo interactivo: combos de VLANs, redes /30
+    y después router por router (SWC3, VLANs y conexiones nuevas)
+    Lanza ValueError si se acaban las redes /30: un plan sin todos sus enlaces no se entrega
+    """
+    rng = random.Random(semilla)
+    if subredes_ocupadas is None:
+        subredes_ocupadas = []
+    
+    base_ip = espec['base_ip']
+    tipo_ruteo = espec.get('tipo_ruteo', 'ospf')
+    routers = espec['routers']
+    num_routers = len(routers)
+    
+    # Áreas automáticas: se reparten sobre la topología declarada antes de asignar direcciones
+    areas_automaticas, enlaces_declarados = None, None
+    if tipo_ruteo == "ospf" and espec.get('areas_automaticas'):
+        enlaces_declarados = enlaces_declarados_de(routers)
+        areas_automaticas = particionar_areas_ospf(construir_grafo_topologia(enlaces_declarados, num_routers),
+                                                   int(espec['areas_automaticas']))
+    
+    # Capa de acceso dimensionada: PCs por VLAN de cada router
+    pcs_por_vlan = pcs_desde_especificacion(espec)
+    
+    # Combos de VLANs (siempre con asignación aleatoria, como en configurar_vlans)
+    vlans_combos = []
+    for i, vlan in enumerate(espec['vlans']):
+        vlan_id = vlan.get('id', i + 2)
+        mascara = vlan['mascara']
+        # La máscara crece hasta que quepan los PCs del router más poblado más los dos gateways (router y SWC3)
+        max_pcs = max((cantidades.get(vlan_id, 0) for cantidades in pcs_por_vlan.values()), default=0)
+        if max_pcs and mascara_para_hosts(max_pcs + 2) < mascara:
+            print(f"📈 VLAN {vlan_id}: máscara /{mascara} → /{mascara_para_hosts(max_pcs + 2)} para {max_pcs} PCs")
+            mascara = mascara_para_hosts(max_pcs + 2)
+        combos = []
+        for _ in range(vlan['combos']):
+            combo = calcular_rango_subred(base_ip, mascara, subredes_ocupadas, True, rng)
+            if not combo:
+                print(f"❌ No hay más espacio para combos en la VLAN {vlan_id}.")
+                break
+            combos.append((combo[0], mascara))
+        vlans_combos.append((vlan_id, combos))
+    
+    # Redes /30: se piden al asignador al crear cada enlace; 'redes_30' en la especificación
+    # fija un máximo opcional
+    # Con áreas automáticas las redes se toman en orden de dirección (ver asignar_routers_declarados)
+    aleatorio_routers = espec.get('aleatorio_routers', False)
+    if areas_automaticas is not None:
+        vlans_combos = ordenar_combos_por_direccion(vlans_combos)
+        aleatorio_routers = False
+    registro = RegistroConexiones(base_ip, subredes_ocupadas, aleatorio_routers, rng, espec.get('redes_30'))
+    
+    plan = {
+        'semilla': semilla,
+        'base_ip': base_ip,
+        'tipo_ruteo': tipo_ruteo,
+        'num_routers': num_routers,
+        'vlans_combos': vlans_combos,
+        'redes_30': registro.redes_30,
+        'conexiones_mapa': registro.conexiones_mapa,
+        'areas_conexiones': {},
+        'router_vlans_asignadas': {},
+        'areas_ospf': {},
+        'router_ids': {},
+        'routers_con_swc3': {},
+        'swc3_configuraciones': {},
+        'rutas_estaticas': {},
+        'rutas_estaticas_swc3': {},
+        'base_ipv6': None,
+        'redes6': {},
+        'minimizar_ospf': espec.get('minimizar_ospf', False),
+        'rangos_area': {},
+        'areas_stub': {},
+        'timers_ospf': timers_desde_especificacion(espec.get('timers_ospf')),
+        'anchos_banda': {tuple(sorted(int(r) for r in enlace.split('-'))): int(ancho)
+                         for enlace, ancho in espec.get('anchos_banda', {}).items()},
+        'variance_eigrp': {},
+        'reporte_carga': None,
+        'miembros_etherchannel': max(1, min(MAX_MIEMBROS_ETHERCHANNEL, int(espec.get('etherchannel', 1)))),
+        'pcs_por_vlan': pcs_por_vlan
+    }
+    
+    asignar_routers_declarados(plan, routers, registro, areas_automaticas, enlaces_declarados)
+    
+    if tipo_ruteo == "estatico":
+        primer_salto_destinos = None
+        if espec.get('rutas_por_carga'):
+            uniforme = espec.get('trafico_uniforme', None if espec.get('trafico') else TRAFICO_UNIFORME_KBPS)
+            demandas = matriz_trafico(num_routers, espec.get('trafico'), uniforme)
+            primer_salto_destinos, plan['reporte_carga'] = planificar_rutas_por_carga(
+                plan['conexiones_mapa'], num_routers, demandas, plan['anchos_banda'])
+        plan['rutas_estaticas'], plan['rutas_estaticas_swc3'] = calcular_rutas_estaticas(
+            plan['conexiones_mapa'], plan['router_vlans_asignadas'], num_routers,
+            plan['routers_con_swc3'], plan['swc3_configuraciones'], primer_salto_destinos
+        )
+    elif tipo_ruteo == "eigrp":
+        plan['variance_eigrp'] = calcular_variance_eigrp(plan)
+    elif tipo_ruteo == "ospf":
+        if espec.get('resumir_areas'):
+            plan['rangos_area'] = calcular_rangos_area(plan)
+        if espec.get('areas_stub'):
+            plan['areas_stub'] = clasificar_areas_stub(plan, espec['areas_stub'] == "totally")
+    
+    if espec.get('base_ipv6'):
+        red6, prefijo_base = espec['base_ipv6'].split('/')
+        asignar_ipv6_plan(plan, red6, int(prefijo_base))
+    
+    return plan
+
+# ============================================================================
+# INSTANTÁNEAS BINARIAS DEL PLAN
+# ============================================================================
+
+# Formato: cabecera MAGIA + versión (uint16) y una serie de secciones etiqueta(4 bytes) + largo (uint32).
+# Cada sección es una lista de columnas: tipo de array (1 byte) + cantidad (uint32) + datos little-endian.
+# Quien lee ignora las etiquetas que no conoce y usa valores por defecto para las que faltan,
+# así una instantánea vieja se puede cargar con una versión más nueva del generador.
+# Los textos repetidos (áreas, router-ids, IPs administrativas) van una sola vez en la tabla TEXT y se
+# referencian por índice (192.168.X.3 no es una dirección válida por encima del router 255).
+MAGIA_INSTANTANEA = b"RDV5PLAN"
+VERSION_INSTANTANEA = 1
+SIN_VALOR = 0xFFFFFFFF
+MASCARA_64 = (1 << 64) - 1
+
+def _columna(tipo, valores):
+    columna = array(tipo, valores)
+    if sys.byteorder == 'big':
+        columna.byteswap()
+    return tipo.encode() + struct.pack('<I', len(columna)) + columna.tobytes()
+
+def _seccion(etiqueta, *columnas):
+    cuerpo = struct.pack('<I', len(columnas)) + b''.join(columnas)
+    return etiqueta + struct.pack('<I', len(cuerpo)) + cuerpo
+
+def _leer_secciones(datos):
+    """
+    Separa las secciones de una instantánea: {etiqueta: [array, ...]}
+    """
+    if datos[:len(MAGIA_INSTANTANEA)] != MAGIA_INSTANTANEA:
+        raise ValueError("El archivo no es una instantánea de plan")
+    posicion = len(MAGIA_INSTANTANEA)
+    version, = struct.unpack_from('<H', datos, posicion)
+    if version > VERSION_INSTANTANEA:
+        raise ValueError(f"Instantánea versión {version}: este generador solo lee hasta la versión {VERSION_INSTANTANEA}")
+    posicion += 2
     
-    # CONFIGURACIÓN DE ESPACIADO Y DISTRIBUCIÓN
-    ESPACIADO_HORIZONTAL = 250    # Distancia entre grupos de router
-    ESPACIADO_VERTICAL = 200      # Distancia entre filas
-    ESPACIADO_DISPOSITIVOS = 80   # Distancia entre dispositivos del mismo grupo
-    ROUTERS_POR_FILA = 3          # Número de routers por fila
+    secciones = {}
+    while posicion < len(datos):
+        etiqueta = bytes(datos[posicion:posicion + 4])
+        largo, = struct.unpack_from('<I', datos, posicion + 4)
+        fin = posicion + 8 + largo
+        num_columnas, = struct.unpack_from('<I', datos, posicion + 8)
+        posicion += 12
+        columnas = []
+        for _ in range(num_columnas):
+            tipo = chr(datos[posicion])
+            cantidad, = struct.unpack_from('<I', datos, posicion + 1)
+            columna = array(tipo)
+            inicio = posicion + 5
+            columna.frombytes(datos[inicio:inicio + cantidad * columna.itemsize])
+            if sys.byteorder == 'big':
+                columna.byteswap()
+            columnas.append(columna)
+            posicion = inicio + cantidad * columna.itemsize
+        secciones[etiqueta] = columnas
+        posicion = fin
+    return version, secciones
+
+class _TablaTextos:
+    def __init__(self):
+        self.textos = []
+        self.indices = {}
     
-    # Posiciones base para cada fila
-    X_INICIAL = 50
-    Y_INICIAL = 50
+    def indice(self, texto):
+        if texto is None:
+            return SIN_VALOR
+        if texto not in self.indices:
+            self.indices[texto] = len(self.textos)
+            self.textos.append(texto)
+        return self.indices[texto]
     
-    # Calcular posiciones para cada dispositivo
-    posiciones = {}
+    def seccion(self):
+        codificados = [texto.encode() for texto in self.textos]
+        return _seccion(b"TEXT", _columna('I', map(len, codificados)), _columna('B', b''.join(codificados)))
+
+def _leer_textos(columnas):
+    largos, contenido = columnas
+    contenido = contenido.tobytes()
+    textos, posicion = [], 0
+    for largo in largos:
+        textos.append(contenido[posicion:posicion + largo].decode())
+        posicion += largo
+    return textos
+
+def _vacias(cantidad):
+    # Columnas vacías para las secciones que no están en la instantánea
+    return [array('I') for _ in range(cantidad)]
+
+def _texto(textos, indice):
+    return None if indice == SIN_VALOR else textos[indice]
+
+def _seccion_rutas(etiqueta, rutas_por_dispositivo):
+    """
+    Rutas de todos los dispositivos en columnas; en cada lista las IPv6 van después de las IPv4
+    (así las agrega asignar_ipv6_plan) y se guardan en columnas de 2 × 64 bits
+    """
+    dispositivos, cantidades4, cantidades6 = [], [], []
+    rutas4, rutas6 = [], []
+    for dispositivo, rutas in rutas_por_dispositivo.items():
+        propias4 = [ruta for ruta in rutas if not ruta.ipv6]
+        propias6 = [ruta for ruta in rutas if ruta.ipv6]
+        dispositivos.append(dispositivo)
+        cantidades4.append(len(propias4))
+        cantidades6.append(len(propias6))
+        rutas4 += propias4
+        rutas6 += propias6
+    return _seccion(
+        etiqueta,
+        _columna('I', dispositivos), _columna('I', cantidades4), _columna('I', cantidades6),
+        _columna('I', [ruta.red for ruta in rutas4]), _columna('B', [ruta.prefijo for ruta in rutas4]),
+        _columna('I', [ruta.next_hop for ruta in rutas4]), _columna('B', [ruta.tipo for ruta in rutas4]),
+        _columna('I', [ruta.id_a for ruta in rutas4]), _columna('I', [ruta.id_b for ruta in rutas4]),
+        _columna('Q', [ruta.red >> 64 for ruta in rutas6]), _columna('Q', [ruta.red & MASCARA_64 for ruta in rutas6]),
+        _columna('B', [ruta.prefijo for ruta in rutas6]),
+        _columna('Q', [ruta.next_hop >> 64 for ruta in rutas6]), _columna('Q', [ruta.next_hop & MASCARA_64 for ruta in rutas6]),
+        _columna('B', [ruta.tipo for ruta in rutas6]),
+        _columna('I', [ruta.id_a for ruta in rutas6]), _columna('I', [ruta.id_b for ruta in rutas6])
+    )
+
+class RutasDeInstantanea(Mapping):
+    """
+    {dispositivo: [RutaEstatica]} leído de una instantánea. Las columnas se cargan enteras,
+    pero los objetos de cada dispositivo se crean la primera vez que se consultan:
+    así cargar un plan de miles de routers no crea millones de rutas que quizá no se usen
+    """
+    def __init__(self, columnas):
+        self.columnas = columnas
+        dispositivos, cantidades4, cantidades6 = columnas[:3]
+        self.posiciones = {}
+        inicio4 = inicio6 = 0
+        for dispositivo, cantidad4, cantidad6 in zip(dispositivos, cantidades4, cantidades6):
+            self.posiciones[dispositivo] = (inicio4, inicio4 + cantidad4, inicio6, inicio6 + cantidad6)
+            inicio4 += cantidad4
+            inicio6 += cantidad6
+        self.cache = {}
     
-    for i, (router_num, devices) in enumerate(sorted(routers_data.items())):
-        # Calcular fila y posición en la fila
-        fila = i // ROUTERS_POR_FILA
-        posicion_en_fila = i % ROUTERS_POR_FILA
-        
-        # Coordenadas base del grupo
-        x_base = X_INICIAL + (posicion_en_fila * ESPACIADO_HORIZONTAL)
-        y_base = Y_INICIAL + (fila * ESPACIADO_VERTICAL)
-        
-        # Posicionar Router (centro del grupo)
-        router_device = devices['router']
-        posiciones[router_device['nombre']] = (x_base + ESPACIADO_DISPOSITIVOS, y_base)
-        
-        # Posicionar SWC3 (arriba del router, si existe)
-        if devices['swc3']:
-            swc3_device = devices['swc3']
-            posiciones[swc3_device['nombre']] = (x_base + ESPACIADO_DISPOSITIVOS, y_base - ESPACIADO_DISPOSITIVOS)
-        
-        # Posicionar Switch (abajo del router)
-        if devices['switch']:
-            switch_device = devices['switch']
-            # Si hay SWC3, el switch va abajo del SWC3; si no, va abajo del router
-            y_switch = y_base + ESPACIADO_DISPOSITIVOS
-            posiciones[switch_device['nombre']] = (x_base + ESPACIADO_DISPOSITIVOS, y_switch)
-            
-            # Posicionar PCs alrededor del switch (3 PCs por switch)
-            pc_positions = [
-                (x_base, y_switch + ESPACIADO_DISPOSITIVOS),           # PC1 - izquierda abajo
-                (x_base + ESPACIADO_DISPOSITIVOS, y_switch + ESPACIADO_DISPOSITIVOS + 20), # PC2 - centro abajo
-                (x_base + ESPACIADO_DISPOSITIVOS * 2, y_switch + ESPACIADO_DISPOSITIVOS)   # PC3 - derecha abajo
-            ]
-            for pc_num in range(1, 4):
-                pc_name = f'PC{router_num}_{pc_num}'
-                posiciones[pc_name] = pc_positions[pc_num - 1]
+    def __getitem__(self, dispositivo):
+        if dispositivo not in self.cache:
+            inicio4, fin4, inicio6, fin6 = self.posiciones[dispositivo]
+            (_, _, _, redes, prefijos, saltos, tipos, ids_a, ids_b,
+             redes6_alto, redes6_bajo, prefijos6, saltos6_alto, saltos6_bajo, tipos6, ids6_a, ids6_b) = self.columnas
+            tramo = slice(inicio4, fin4)
+            rutas = list(map(RutaEstatica, redes[tramo], prefijos[tramo], saltos[tramo], tipos[tramo], ids_a[tramo], ids_b[tramo]))
+            rutas += [RutaEstatica((redes6_alto[i] << 64) | redes6_bajo[i], prefijos6[i],
+                                   (saltos6_alto[i] << 64) | saltos6_bajo[i], tipos6[i], ids6_a[i], ids6_b[i], ipv6=True)
+                      for i in range(inicio6, fin6)]
+            self.cache[dispositivo] = rutas
+        return self.cache[dispositivo]
     
-    # Paso 1: Crear dispositivos
-    codigo_js.append('console.log("Ejecutando Paso 1: Creando dispositivos...");')
+    def __iter__(self):
+        return iter(self.posiciones)
     
-    # Crear dispositivos agrupados por router para mejor organización visual
-    for i, (router_num, devices) in enumerate(sorted(routers_data.items())):
-        # Crear router
-        router_device = devices['router']
-        x, y = posiciones[router_device['nombre']]
-        codigo_js.append(f'addDevice("{router_device["nombre"]}", "2811", {x}, {y});')
-        
-        # Crear SWC3 si existe
-        if devices['swc3']:
-            swc3_device = devices['swc3']
-            x, y = posiciones[swc3_device['nombre']]
-            codigo_js.append(f'addDevice("{swc3_device["nombre"]}", "3650-24PS", {x}, {y});')
-        
-        # Crear Switch
-        if devices['switch']:
-            switch_device = devices['switch']
-            x, y = posiciones[switch_device['nombre']]
-            codigo_js.append(f'addDevice("{switch_device["nombre"]}", "2960-24TT", {x}, {y});')
-            
-            # Crear PCs conectadas al switch
-            for pc_num in range(1, 4):
-                pc_name = f'PC{router_num}_{pc_num}'
-                pc_x, pc_y = posiciones[pc_name]
-                codigo_js.append(f'addDevice("{pc_name}", "PC-PT", {pc_x}, {pc_y});')
-    codigo_js.append('console.log("Paso 1 completado.");')
-    codigo_js.append('')
+    def __len__(self):
+        return len(self.posiciones)
+
+def _reporte_carga_a_json(reporte):
+    if reporte is None:
+        return None
+    return {
+        'enlaces': [list(enlace) for enlace in reporte['enlaces']],
+        'capacidades': [[r1, r2, kbps] for (r1, r2), kbps in reporte['capacidades'].items()],
+        'antes': [[r1, r2, kbps] for (r1, r2), kbps in reporte['antes'].items()],
+        'despues': [[r1, r2, kbps] for (r1, r2), kbps in reporte['despues'].items()],
+        'utilizacion_antes': reporte['utilizacion_antes'],
+        'utilizacion_despues': reporte['utilizacion_despues'],
+        'demanda_total': reporte['demanda_total']
+    }
+
+def _reporte_carga_de_json(datos):
+    if datos is None:
+        return None
+    reporte = dict(datos)
+    reporte['enlaces'] = [tuple(enlace) for enlace in datos['enlaces']]
+    for clave in ('capacidades', 'antes', 'despues'):
+        reporte[clave] = {(r1, r2): kbps for r1, r2, kbps in datos[clave]}
+    return reporte
+
+def serializar_plan(plan):
+    """
+    Instantánea binaria de un plan completo (direccionamiento, enlaces, áreas, router-ids, SWC3,
+    IPv6 y rutas calculadas). Los datos pequeños de configuración van en JSON dentro de META
+    """
+    textos = _TablaTextos()
+    meta = {
+        'semilla': plan['semilla'],
+        'base_ip': plan['base_ip'],
+        'tipo_ruteo': plan['tipo_ruteo'],
+        'num_routers': plan['num_routers'],
+        'base_ipv6': plan['base_ipv6'],
+        'minimizar_ospf': plan['minimizar_ospf'],
+        'rangos_area': {area: [list(bloque) for bloque in bloques] for area, bloques in plan['rangos_area'].items()},
+        'areas_stub': plan['areas_stub'],
+        'timers_ospf': plan['timers_ospf'],
+        'anchos_banda': [[r1, r2, kbps] for (r1, r2), kbps in plan['anchos_banda'].items()],
+        'variance_eigrp': [[r, variance] for r, variance in plan['variance_eigrp'].items()],
+        'reporte_carga': _reporte_carga_a_json(plan['reporte_carga']),
+        'miembros_etherchannel': plan.get('miembros_etherchannel', 1),
+        'pcs_por_vlan': [[r, list(cantidades.items())] for r, cantidades in plan.get('pcs_por_vlan', {}).items()]
+    }
     
-    # Paso 2: Agregar módulos
-    codigo_js.append('console.log("Ejecutando Paso 2: Agregando módulos...");')
-    for dispositivo in datos_red:
-        nombre = dispositivo['nombre']
-        tipo = dispositivo['tipo']
-        
-        # Agregar módulos según el tipo
-        if tipo == 'R':  # Router
-            # Instalar módulo NM-4E en slot especial 1
-            codigo_js.append(f'addModuleFixed("{nombre}", 1, "NM-4E");')
-            # Instalar módulos HWIC en slots restantes
-            for slot in [0, 2, 3]:  # Slots 0, 2, 3 (slot 1 usado por NM-4E)
-                codigo_js.append(f'addModuleFixed("{nombre}", {slot}, "HWIC-1GE-SFP");')
-    codigo_js.append('console.log("Paso 2 completado.");')
-    codigo_js.append('')
+    vlans_combos = plan['vlans_combos']
+    combos = [combo for _, combos_vlan in vlans_combos for combo in combos_vlan]
+    vlans_router = plan['router_vlans_asignadas']
+    asignadas = [(vlan_id, red) for vlans in vlans_router.values() for vlan_id, red in vlans.items()]
+    conexiones = list(plan['conexiones_mapa'].items())
+    areas_conexiones = list(plan['areas_conexiones'].items())
+    swc3 = list(plan['swc3_configuraciones'].items())
+    redes6 = [(network, ip6_to_int(red6), prefijo) for network, (red6, prefijo) in plan['redes6'].items()]
     
-    # Paso 3: Crear conexiones
-    codigo_js.append('console.log("Ejecutando Paso 3: Creando conexiones...");')
+    secciones = [
+        _seccion(b"META", _columna('B', json.dumps(meta).encode())),
+        _seccion(b"VLCB", _columna('I', [vlan_id for vlan_id, _ in vlans_combos]),
+                 _columna('I', [len(combos_vlan) for _, combos_vlan in vlans_combos]),
+                 _columna('I', [ip_to_int(network) for network, _ in combos]), _columna('B', [mask for _, mask in combos])),
+        _seccion(b"R30_", _columna('I', [ip_to_int(network) for network, _ in plan['redes_30']]),
+                 _columna('B', [mask for _, mask in plan['redes_30']])),
+        _seccion(b"ENLC", _columna('I', [r1 for (r1, _), _ in conexiones]), _columna('I', [r2 for (_, r2), _ in conexiones]),
+                 _columna('I', [ip_to_int(network) for _, (network, _) in conexiones]),
+                 _columna('B', [mask for _, (_, mask) in conexiones])),
+        _seccion(b"AENL", _columna('I', [r1 for (r1, _), _ in areas_conexiones]), _columna('I', [r2 for (_, r2), _ in areas_conexiones]),
+                 _columna('I', [textos.indice(area) for _, area in areas_conexiones])),
+        _seccion(b"VLAS", _columna('I', list(vlans_router)), _columna('I', [len(vlans) for vlans in vlans_router.values()]),
+                 _columna('I', [vlan_id for vlan_id, _ in asignadas]),
+                 _columna('I', [ip_to_int(network) for _, (network, _) in asignadas]),
+                 _columna('B', [mask for _, (_, mask) in asignadas])),
+        _seccion(b"AREA", _columna('I', list(plan['areas_ospf'])), _columna('I', map(textos.indice, plan['areas_ospf'].values()))),
+        _seccion(b"RIDS", _columna('I', list(plan['router_ids'])), _columna('I', map(textos.indice, plan['router_ids'].values()))),
+        _seccion(b"SWC3", _columna('I', list(plan['routers_con_swc3'])), _columna('B', map(int, plan['routers_con_swc3'].values()))),
+        _seccion(b"SWCF", _columna('I', [r for r, _ in swc3]),
+                 _columna('I', [textos.indice(config['router_id']) for _, config in swc3]),
+                 _columna('I', [ip_to_int(config['ip_hacia_router']) for _, config in swc3]),
+                 _columna('I', [textos.indice(config['ip_admin']) for _, config in swc3]),
+                 _columna('I', [ip_to_int(config['red_conexion'][0]) for _, config in swc3]),
+                 _columna('B', [config['red_conexion'][1] for _, config in swc3])),
+        _seccion(b"RED6", _columna('I', [ip_to_int(network) for network, _, _ in redes6]),
+                 _columna('Q', [red6 >> 64 for _, red6, _ in redes6]), _columna('Q', [red6 & MASCARA_64 for _, red6, _ in redes6]),
+                 _columna('B', [prefijo for _, _, prefijo in redes6])),
+        _seccion_rutas(b"RUTA", plan['rutas_estaticas']),
+        _seccion_rutas(b"RSW3", plan['rutas_estaticas_swc3']),
+    ]
+    return MAGIA_INSTANTANEA + struct.pack('<H', VERSION_INSTANTANEA) + textos.seccion() + b''.join(secciones)
+
+def deserializar_plan(datos):
+    """
+    Reconstruye un plan desde su instantánea binaria (ver serializar_plan)
+    Las rutas se materializan por dispositivo al consultarlas (RutasDeInstantanea)
+    """
+    _, secciones = _leer_secciones(memoryview(datos))
+    textos = _leer_textos(secciones[b"TEXT"]) if b"TEXT" in secciones else []
+    meta = json.loads(secciones[b"META"][0].tobytes())
     
-    # Procesar todas las conexiones del mapa dinámico
-    for conexion_key, conexion_data in mapa_interfaces_dinamico.items():
-        
-        # CONEXIONES ROUTER ↔ ROUTER (formato: (r1, r2))
-        if isinstance(conexion_key, tuple) and len(conexion_key) == 2:
-            r1, r2 = conexion_key
-            device1 = f'Router{r1}'
-            device2 = f'Router{r2}'
-            interface1 = conexion_data['r1_interface']
-            interface2 = conexion_data['r2_interface']
-            cable_type = conexion_data['link_type']
-            
-            codigo_js.append(f'addLink("{device1}", "{interface1}", "{device2}", "{interface2}", "{cable_type}");')
-        
-        # CONEXIONES ROUTER ↔ SWC3, SWC3 ↔ SWITCH, ROUTER ↔ SWITCH (formato: string)
-        elif isinstance(conexion_key, str):
-            device1 = conexion_data['device1']
-            device2 = conexion_data['device2']
-            interface1 = conexion_data['interface1']
-            interface2 = conexion_data['interface2']
-            cable_type = conexion_data['link_type']
-            
-            codigo_js.append(f'addLink("{device1}", "{interface1}", "{device2}", "{interface2}", "{cable_type}");')
+    vlan_ids, cantidades, redes, mascaras = secciones.get(b"VLCB", _vacias(4))
+    vlans_combos, inicio = [], 0
+    for vlan_id, cantidad in zip(vlan_ids, cantidades):
+        vlans_combos.append((vlan_id, [(int_to_ip(redes[i]), mascaras[i]) for i in range(inicio, inicio + cantidad)]))
+        inicio += cantidad
     
-    codigo_js.append('console.log("Paso 3 completado.");')
-    codigo_js.append('')
+    routers, cantidades, vlan_ids, redes, mascaras = secciones.get(b"VLAS", _vacias(5))
+    router_vlans_asignadas, inicio = {}, 0
+    for r, cantidad in zip(routers, cantidades):
+        router_vlans_asignadas[r] = {vlan_ids[i]: (int_to_ip(redes[i]), mascaras[i]) for i in range(inicio, inicio + cantidad)}
+        inicio += cantidad
     
-    # Paso 4: Configurar DHCP en las PCs
-    codigo_js.append('console.log("Ejecutando Paso 4: Configurando DHCP en PCs...");')
+    redes, mascaras = secciones.get(b"R30_", _vacias(2))
+    r1s, r2s, redes_enlace, mascaras_enlace = secciones.get(b"ENLC", _vacias(4))
+    a1s, a2s, areas_enlace = secciones.get(b"AENL", _vacias(3))
+    routers_area, areas = secciones.get(b"AREA", _vacias(2))
+    routers_rid, rids = secciones.get(b"RIDS", _vacias(2))
+    routers_swc3, con_swc3 = secciones.get(b"SWC3", _vacias(2))
+    swc3_routers, swc3_rids, ips_hacia, ips_admin, redes_swc3, mascaras_swc3 = secciones.get(b"SWCF", _vacias(6))
+    redes4, altos, bajos, prefijos6 = secciones.get(b"RED6", _vacias(4))
     
-    # Configurar DHCP en todas las PCs
-    for i, (router_num, devices) in enumerate(sorted(routers_data.items())):
-        if devices['switch']:
-            for pc_num in range(1, 4):
-                pc_name = f'PC{router_num}_{pc_num}'
-                codigo_js.append(f'configurePcIp("{pc_name}", true);')
+    return {
+        'semilla': meta['semilla'],
+        'base_ip': meta['base_ip'],
+        'tipo_ruteo': meta['tipo_ruteo'],
+        'num_routers': meta['num_routers'],
+        'vlans_combos': vlans_combos,
+        'redes_30': [(int_to_ip(red), mascara) for red, mascara in zip(redes, mascaras)],
+        'conexiones_mapa': {(r1, r2): (int_to_ip(red), mascara)
+                            for r1, r2, red, mascara in zip(r1s, r2s, redes_enlace, mascaras_enlace)},
+        'areas_conexiones': {(r1, r2): _texto(textos, area) for r1, r2, area in zip(a1s, a2s, areas_enlace)},
+        'router_vlans_asignadas': router_vlans_asignadas,
+        'areas_ospf': {r: _texto(textos, area) for r, area in zip(routers_area, areas)},
+        'router_ids': {r: _texto(textos, rid) for r, rid in zip(routers_rid, rids)},
+        'routers_con_swc3': {r: bool(flag) for r, flag in zip(routers_swc3, con_swc3)},
+        'swc3_configuraciones': {
+            r: {
+                'router_id': _texto(textos, rid),
+                'ip_hacia_router': int_to_ip(ip_hacia),
+                'ip_admin': _texto(textos, ip_admin),
+                'red_conexion': (int_to_ip(red), mascara)
+            }
+            for r, rid, ip_hacia, ip_admin, red, mascara in zip(swc3_routers, swc3_rids, ips_hacia, ips_admin, redes_swc3, mascaras_swc3)
+        },
+        'rutas_estaticas': RutasDeInstantanea(secciones[b"RUTA"]) if b"RUTA" in secciones else {},
+        'rutas_estaticas_swc3': RutasDeInstantanea(secciones[b"RSW3"]) if b"RSW3" in secciones else {},
+        'base_ipv6': meta.get('base_ipv6'),
+        'redes6': {int_to_ip(red4): (int_to_ip6((alto << 64) | bajo), prefijo)
+                   for red4, alto, bajo, prefijo in zip(redes4, altos, bajos, prefijos6)},
+        'minimizar_ospf': meta.get('minimizar_ospf', False),
+        'rangos_area': {area: [tuple(bloque) for bloque in bloques] for area, bloques in meta.get('rangos_area', {}).items()},
+        'areas_stub': meta.get('areas_stub', {}),
+        'timers_ospf': tuple(meta['timers_ospf']) if meta.get('timers_ospf') else None,
+        'anchos_banda': {(r1, r2): kbps for r1, r2, kbps in meta.get('anchos_banda', [])},
+        'variance_eigrp': {r: variance for r, variance in meta.get('variance_eigrp', [])},
+        'reporte_carga': _reporte_carga_de_json(meta.get('reporte_carga')),
+        'miembros_etherchannel': meta.get('miembros_etherchannel', 1),
+        'pcs_por_vlan': {r: dict(cantidades) for r, cantidades in meta.get('pcs_por_vlan', [])}
+    }
+
+def guardar_instantanea(plan, ruta):
+    with open(ruta, 'wb') as f:
+        f.write(serializar_plan(plan))
+
+def cargar_instantanea(ruta):
+    with open(ruta, 'rb') as f:
+        return deserializar_plan(f.read())
+
+# ============================================================================
+# CACHÉ DE RUTAS ESTÁTICAS POR HUELLA DE TOPOLOGÍA
+# ============================================================================
+
+# calcular_rutas_estaticas es determinista: mismas entradas → mismas tablas. La huella resume
+# esas entradas y las tablas calculadas se guardan en disco con el formato de las instantáneas
+# (solo las secciones de rutas). Al superar el tamaño máximo se borran las menos usadas (LRU por mtime).
+# Solo la activan los programas de línea de comandos (activar_cache_rutas); al importar el módulo
+# queda desactivada. REDESV5_CACHE_RUTAS cambia la carpeta; vacía desactiva la caché
+VERSION_CALCULO_RUTAS = 1  # Cambiarla si cambia calcular_rutas_estaticas: invalida las tablas guardadas
+CARPETA_CACHE_RUTAS = os.environ.get("REDESV5_CACHE_RUTAS", os.path.join(os.path.expanduser("~"), ".cache", "redesv5", "rutas"))
+MAX_BYTES_CACHE_RUTAS = 256 * 1024 * 1024
+
+def huella_topologia(conexiones_mapa, router_vlans_asignadas, num_routers, routers_con_swc3, swc3_configuraciones, primer_salto_destinos=None):
+    """
+    Huella estable (SHA-256) de las entradas de calcular_rutas_estaticas, con direcciones como enteros
+    y en el orden en que se recorren (el orden de los diccionarios decide el orden de las rutas)
+    """
+    huella = hashlib.sha256()
     
-    codigo_js.append('console.log("Paso 4 completado. Topología lista!");')
+    def agregar(etiqueta, valores):
+        columna = array('Q', valores)
+        if sys.byteorder == 'big':
+            columna.byteswap()
+        huella.update(etiqueta + struct.pack('<Q', len(columna)) + columna.tobytes())
     
-    return '\n'.join(codigo_js)
+    agregar(b"VERS", [VERSION_CALCULO_RUTAS, num_routers])
+    agregar(b"ENLC", [valor for (r1, r2), (network, mask) in conexiones_mapa.items() for valor in (r1, r2, ip_to_int(network), mask)])
+    agregar(b"VLAS", [valor for r, vlans in router_vlans_asignadas.items()
+                      for valor in (r, len(vlans), *(v for vlan_id, (network, mask) in vlans.items() for v in (vlan_id, ip_to_int(network), mask)))])
+    agregar(b"SWC3", [valor for r, tiene_swc3 in routers_con_swc3.items() for valor in (r, int(bool(tiene_swc3)))])
+    agregar(b"SWCF", [valor for r, config in swc3_configuraciones.items()
+                      for valor in (r, ip_to_int(config['ip_hacia_router']), ip_to_int(config['red_conexion'][0]), config['red_conexion'][1])])
+    if primer_salto_destinos is not None:
+        agregar(b"SALT", [salto or 0 for fila in primer_salto_destinos for salto in fila])
+    return huella.hexdigest()
 
-def guardar_codigo_ptbuilder(filename_base, codigo_js):
+class CacheRutas:
     """
-    Guarda el código JavaScript en un archivo separado
+    Tablas de rutas estáticas en disco, un archivo por huella de topología.
+    Cada lectura actualiza el mtime del archivo, que sirve de marca de último uso para el LRU
     """
-    filename_js = f"{filename_base}_PTBuilder.js"
+    def __init__(self, carpeta, max_bytes=MAX_BYTES_CACHE_RUTAS):
+        self.carpeta = carpeta
+        self.max_bytes = max_bytes
     
-    try:
-        with open(filename_js, 'w') as f:
-            f.write(codigo_js)
-        return filename_js
-    except Exception as e:
-        print(f"❌ Error al guardar código PTBuilder: {e}")
-        return None
+    def archivo(self, huella):
+        return os.path.join(self.carpeta, f"{huella}.rutas")
+    
+    def obtener(self, huella):
+        """
+        Retorna (rutas_estaticas, rutas_estaticas_swc3) o None si la huella no está
+        (un archivo dañado cuenta como ausente)
+        """
+        archivo = self.archivo(huella)
+        try:
+            with open(archivo, 'rb') as f:
+                _, secciones = _leer_secciones(memoryview(f.read()))
+            os.utime(archivo)
+            return RutasDeInstantanea(secciones[b"RUTA"]), RutasDeInstantanea(secciones[b"RSW3"])
+        except (OSError, ValueError, KeyError, struct.error):
+            return None
+    
+    def guardar(self, huella, rutas_estaticas, rutas_estaticas_swc3):
+        # Se escribe en un temporal y se renombra: varios procesos (generar_variantes) pueden compartir la caché
+        os.makedirs(self.carpeta, exist_ok=True)
+        archivo = self.archivo(huella)
+        temporal = f"{archivo}.{os.getpid()}.tmp"
+        with open(temporal, 'wb') as f:
+            f.write(MAGIA_INSTANTANEA + struct.pack('<H', VERSION_INSTANTANEA) +
+                    _seccion_rutas(b"RUTA", rutas_estaticas) + _seccion_rutas(b"RSW3", rutas_estaticas_swc3))
+        os.replace(temporal, archivo)
+        self.recortar()
+    
+    def recortar(self):
+        """
+        Borra las tablas menos usadas hasta que la caché quepa en max_bytes
+        """
+        entradas = []
+        for entrada in os.scandir(self.carpeta):
+            if entrada.name.endswith(".rutas"):
+                try:
+                    datos = entrada.stat()
+                except FileNotFoundError:  # Otro proceso la borró mientras tanto
+                    continue
+                entradas.append((datos.st_mtime, datos.st_size, entrada.path))
+        
+        total = sum(tamano for _, tamano, _ in entradas)
+        for _, tamano, ruta in sorted(entradas):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            total -= tamano
+
+CACHE_RUTAS = None
 
-def mostrar_resumen_ptbuilder(filename_js, num_routers, num_swc3):
+def activar_cache_rutas():
     """
-    Muestra resumen de lo generado para PTBuilder con módulo NM-4E, distribución inteligente y PCs con DHCP
+    Activa la caché de rutas en disco en CARPETA_CACHE_RUTAS (salvo que REDESV5_CACHE_RUTAS esté vacía)
     """
-    num_pcs = num_routers * 3  # 3 PCs por router/switch
-    print(f"\n" + "="*60)
-    print("🚀 CÓDIGO PTBUILDER V5.0 GENERADO")
-    print("="*60)
-    print(f"📁 Archivo JavaScript: {filename_js}")
-    print(f"🖥️ Routers 2811 creados: {num_routers}")
-    print(f"🔧 Módulos NM-4E instalados: {num_routers}")
-    print(f"🔌 SWC3 creados: {num_swc3}")
-    print(f"🔄 Switches creados: {num_routers}")
-    print(f"💻 PCs creadas: {num_pcs} (3 por switch)")
-    print(f"\n🎯 DISTRIBUCIÓN INTELIGENTE:")
-    print(f"   • Dispositivos agrupados por router")
-    print(f"   • 3 routers por fila (espaciado optimizado)")
-    print(f"   • SWC3 arriba, Router centro, Switch abajo")
-    print(f"   • PCs distribuidas alrededor de cada switch")
-    print(f"   • Distancias reducidas entre dispositivos relacionados")
-    print(f"\n💻 CONFIGURACIÓN DE PCs:")
-    print(f"   • Modelo: PC-PT estándar")
-    print(f"   • DHCP habilitado automáticamente")
-    print(f"   • Interfaces: FastEthernet0/2, FastEthernet0/3, FastEthernet0/4")
-    print(f"   • Conexiones straight a switch")
-    print(f"\n🔧 CARACTERÍSTICAS DE LOS ROUTERS:")
-    print(f"   • Modelo: Cisco 2811")
-    print(f"   • Módulo NM-4E en slot 1")
-    print(f"   • Interfaces NM-4E: Ethernet1/0, Ethernet1/1, Ethernet1/2, Ethernet1/3")
-    print(f"   • Módulos HWIC-1GE-SFP en slots 0, 2, 3")
-    print(f"\n📋 INSTRUCCIONES DE USO:")
-    print(f"1. Abre PTBuilderV2 en Packet Tracer")
-    print(f"2. Copia el contenido de {filename_js}")
-    print(f"3. Pega en el editor de PTBuilderV2")
-    print(f"4. Haz clic en 'Ejecutar'")
-    print(f"5. ¡Tu topología completa con PCs se creará automáticamente!")
-    print("="*60)
+    global CACHE_RUTAS
+    CACHE_RUTAS = CacheRutas(CARPETA_CACHE_RUTAS) if CARPETA_CACHE_RUTAS else None
 
 # Función principal
 def main():
@@ -1567,6 +4598,9 @@ def main():
     print("🔄 NOVEDAD V5.0: Soporte para OSPF y Ruteo Estático Automático")
     print("=" * 70)
     
+    # Las rutas estáticas de una topología ya calculada se recuperan de la caché en disco
+    activar_cache_rutas()
+    
     # Validaciones de entrada básicas
     filename = validar_nombre_archivo("📁 Introduce el nombre del archivo de salida (sin extensión): ")
     filename = f"{filename}.CISCO"
@@ -1574,17 +4608,49 @@ def main():
     base_ip = validar_ip("🌐 Introduce la IP base (se usará para todo): ")
     num_vlans = validar_numero_positivo("🏷️ Introduce el número de VLANs: ")
     
-    subredes_ocupadas = []  # Para llevar el control de las subredes ya asignadas
+    # Para llevar el control de las subredes ya asignadas (lista, libro IPAM o servicio IPAM)
+    subredes_ocupadas = seleccionar_registro_subredes()
+    
+    # Generador aleatorio propio de la ejecución: con la misma semilla se obtiene el mismo plan
+    semilla = validar_semilla("🎲 Semilla para la asignación aleatoria (vacío = nueva semilla): ")
+    rng = random.Random(semilla)
+    
+    # Capa de acceso: PCs de cada VLAN en cada router (0 = los 3 PCs clásicos por switch);
+    # con más PCs se encadenan switches 2960 y se agrandan las máscaras que no alcancen
+    pcs_por_vlan = max(0, validar_numero("🖥️ PCs por VLAN en cada router (0 = 3 PCs por switch, como siempre): "))
     
     # Configurar VLANs y generar combos
     print("\n" + "="*50)
     print("🏷️ CONFIGURACIÓN DE VLANs")
     print("="*50)
-    vlans_combos = configurar_vlans(num_vlans, base_ip, subredes_ocupadas)
+    vlans_combos = configurar_vlans(num_vlans, base_ip, subredes_ocupadas, rng, pcs_por_vlan)
+    
+    # Dual-stack opcional: /64 por VLAN y /127 por enlace dentro de un bloque IPv6
+    base_ipv6, prefijo_ipv6 = None, None
+    if validar_si_no("🌐 ¿Generar también direccionamiento IPv6 (dual-stack)? (s/n): "):
+        base_ipv6, prefijo_ipv6 = validar_red_ipv6("🌐 Introduce el bloque IPv6 base (ej: 2001:db8:acad::/48): ")
     
     # NUEVA FUNCIONALIDAD: Selección de tipo de ruteo
     tipo_ruteo = validar_tipo_ruteo()
-    print(f"✅ Tipo de ruteo seleccionado: {'OSPF' if tipo_ruteo == 'ospf' else 'Ruteo Estático'}")
+    print(f"✅ Tipo de ruteo seleccionado: {NOMBRES_TIPO_RUTEO[tipo_ruteo]}")
+    
+    # Sentencias network de OSPF: una por red o el mínimo que cubre las interfaces de cada dispositivo
+    minimizar_ospf = False
+    if tipo_ruteo == "ospf":
+        minimizar_ospf = validar_si_no("🧮 ¿Agrupar las sentencias network de OSPF en el mínimo posible? (s/n): ")
+    
+    # Áreas OSPF automáticas: primero se declara la topología, después se reparte en áreas
+    # y al final se asignan las direcciones área por área
+    max_routers_area = 0
+    if tipo_ruteo == "ospf" and validar_si_no("🗺️ ¿Repartir las áreas OSPF automáticamente según la topología? (s/n): "):
+        max_routers_area = validar_numero_positivo("🖥️ Máximo de routers por área: ")
+    
+    # Timers hello/dead de los enlaces entre routers (dead = 4 × hello, como en IOS)
+    timers_ospf = None
+    if tipo_ruteo == "ospf" and validar_si_no("⏱️ ¿Ajustar los timers hello/dead de OSPF en los enlaces entre routers? (s/n): "):
+        hello = validar_numero_positivo("⏱️ Hello (segundos): ")
+        timers_ospf = (hello, hello * 4)
+        print(f"✅ Hello {hello} s, dead {hello * 4} s")
     
     # Pedir número de routers y combos de /30
     num_routers = validar_numero_positivo("🖥️ Introduce el número de routers: ")
@@ -1599,14 +4665,24 @@ def main():
         if num_swc3 > num_routers:
             print(f"❌ Error: No puedes tener más SWC3 ({num_swc3}) que routers ({num_routers})")
             num_swc3 = min(num_swc3, num_routers)
-    
-    # Calcular automáticamente el número de redes /30
+
+    # EtherChannel LACP en la troncal SWC3 → Switch (gi1/0/2... ↔ fa0/1, fa0/5...)
+    miembros_etherchannel = 1
+    if num_swc3 > 0 and validar_si_no("🔗 ¿Agrupar la troncal SWC3 → Switch en un EtherChannel (LACP)? (s/n): "):
+        while True:
+            miembros_etherchannel = validar_numero_positivo(f"🔗 Cables por EtherChannel (2-{MAX_MIEMBROS_ETHERCHANNEL}): ")
+            if 2 <= miembros_etherchannel <= MAX_MIEMBROS_ETHERCHANNEL:
+                break
+            print(f"❌ Error: Un EtherChannel LACP lleva entre 2 y {MAX_MIEMBROS_ETHERCHANNEL} cables")
+        print(f"✅ Troncales SWC3 → Switch con {miembros_etherchannel} cables (port-channel {GRUPO_ETHERCHANNEL})")
+
+    # Calcular automáticamente el máximo de redes /30 (se asignan al crear cada enlace)
     # Fórmula: (num_routers × 2) + num_swc3
     num_combos_30_calculado = (num_routers * 2) + num_swc3
     print(f"\n🔢 CÁLCULO AUTOMÁTICO DE REDES /30:")
     print(f"   📊 Routers: {num_routers} × 2 = {num_routers * 2} redes")
     print(f"   🔌 SWC3: {num_swc3} × 1 = {num_swc3} redes")
-    print(f"   🎯 Total calculado: {num_combos_30_calculado} redes /30")
+    print(f"   🎯 Máximo calculado: {num_combos_30_calculado} redes /30 (solo se asignan las que se usen)")
     
     # Permitir override manual si es necesario
     usar_calculo_automatico = validar_si_no(f"¿Usar el cálculo automático ({num_combos_30_calculado} redes /30)? (s/n): ")
@@ -1620,16 +4696,19 @@ def main():
     # Preguntar si desea usar asignación aleatoria para redes entre routers
     print(f"\n🔀 CONFIGURACIÓN DE REDES ENTRE ROUTERS")
     print("="*50)
-    usar_aleatorio_routers = validar_si_no("¿Deseas usar asignación aleatoria para redes entre routers? (s/n): ")
-    
-    # Configurar redes entre routers
-    redes_routers = configurar_redes_entre_routers(num_combos_30, base_ip, subredes_ocupadas, usar_aleatorio_routers)
+    if max_routers_area:
+        # Redes en orden de dirección para que cada área reciba tramos contiguos (area X range)
+        print("ℹ️ Con áreas automáticas las redes entre routers se asignan en orden, área por área")
+        usar_aleatorio_routers = False
+    else:
+        usar_aleatorio_routers = validar_si_no("¿Deseas usar asignación aleatoria para redes entre routers? (s/n): ")
     
-    # Mapa de conexiones entre routers (para no duplicar)
-    conexiones_mapa = {}
+    # Registro de conexiones entre routers: índice de vecinos, orden de configuración
+    # y redes /30 pedidas al asignador a medida que se crean los enlaces
+    registro = RegistroConexiones(base_ip, subredes_ocupadas, usar_aleatorio_routers, rng, num_combos_30)
+    conexiones_mapa = registro.conexiones_mapa
     router_vlans_asignadas = {}
     areas_ospf = {}  # Para guardar el área OSPF de cada router
-    configuracion_orden = []  # Para llevar el orden de configuración de los routers
     
     # Estructuras para SWC3
     routers_con_swc3 = {}  # {router_num: True/False}
@@ -1643,33 +4722,40 @@ def main():
     # Mapa para rastrear las conexiones ya registradas para cada router
     conexiones_registradas = {i: [] for i in range(1, num_routers + 1)}
     
+    # Área de cada red entre routers (la del router que la configura primero)
+    areas_conexiones = {}
+    rutas_estaticas_por_router, rutas_estaticas_por_swc3 = {}, {}
+    reporte_carga = None
+    
     # Para cada router, asignar VLANs y conexiones
     try:
-        with open(filename, 'w') as f:
-            f.write("! COMBOS GENERADOS CON VALIDACIONES (V5.0)\n")
-            f.write("! Incluye SSH, Seguridad, configuración de Switches y Validaciones\n")
-            f.write("! NUEVA FUNCIONALIDAD: Routers 2811 con módulo NM-4E\n")
-            f.write("! Interfaces NM-4E: Ethernet1/0, Ethernet1/1, Ethernet1/2, Ethernet1/3\n")
-            f.write(f"! TIPO DE RUTEO: {'OSPF' if tipo_ruteo == 'ospf' else 'RUTEO ESTÁTICO'}\n\n")
-            
-            # Imprimir combos generados
-            f.write("! Redes entre routers (/30):\n")
-            for idx, (network, mask) in enumerate(redes_routers):
-                mascara_decimal = convertir_mascara(mask)
-                f.write(f"! Red {idx+1}: {network}/{mask} ({mascara_decimal})\n")
-            
-            f.write("\n! Combos generados para cada VLAN:\n")
-            for vlan_num, combos in vlans_combos:
-                f.write(f"\n! VLAN {vlan_num}:\n")
-                for idx, (network, mask) in enumerate(combos):
-                    mascara_decimal = convertir_mascara(mask)
-                    f.write(f"! Combo {idx+1}: {network}/{mask} ({mascara_decimal})\n")
-            
-            f.write("\n\n! CONFIGURACIÓN DE ROUTERS Y SWITCHES\n")
+        if max_routers_area:
+            # Topología completa sin direcciones → reparto en áreas → redes /30 y combos área por área
+            routers_declarados = declarar_routers_interactivo(num_routers, num_swc3, vlans_combos)
+            enlaces_declarados = enlaces_declarados_de(routers_declarados)
+            areas_automaticas = particionar_areas_ospf(construir_grafo_topologia(enlaces_declarados, num_routers), max_routers_area)
+            vlans_combos = ordenar_combos_por_direccion(vlans_combos)
+            contadores_areas = asignar_routers_declarados({
+                'tipo_ruteo': tipo_ruteo,
+                'num_routers': num_routers,
+                'vlans_combos': vlans_combos,
+                'conexiones_mapa': conexiones_mapa,
+                'areas_conexiones': areas_conexiones,
+                'router_vlans_asignadas': router_vlans_asignadas,
+                'areas_ospf': areas_ospf,
+                'router_ids': router_ids,
+                'routers_con_swc3': routers_con_swc3,
+                'swc3_configuraciones': swc3_configuraciones
+            }, routers_declarados, registro, areas_automaticas, enlaces_declarados)
+            swc3_router_ids = {r: config['router_id'] for r, config in swc3_configuraciones.items()}
             
+            print(f"\n🗺️ Áreas OSPF automáticas (máximo {max_routers_area} routers por área):")
+            for area in sorted(contadores_areas, key=int):
+                miembros = [r for r in range(1, num_routers + 1) if areas_ospf[r] == area]
+                print(f"   🌐 Área {area}: {len(miembros)} routers → {', '.join(f'R{r}' for r in miembros)}")
+        else:
             # Pedir datos para configurar cada router
             for r in range(1, num_routers + 1):
-                f.write(f"\n! ---- ROUTER {r} ----\n")
                 print(f"\n" + "="*50)
                 print(f"🖥️ CONFIGURANDO ROUTER {r}")
                 print("="*50)
@@ -1680,7 +4766,7 @@ def main():
                     area_ospf = validar_area_ospf(f"🌐 ¿A qué área OSPF pertenece el router {r}? (0, 1, 2, etc.): ")
                 
                 areas_ospf[r] = area_ospf
-                configuracion_orden.append(r)  # Registrar el orden de configuración
+                registro.registrar_router(r)  # Registrar el orden de configuración
                 
                 # Asignar router-id (solo para OSPF, pero lo generamos siempre para compatibilidad)
                 if area_ospf not in contadores_areas:
@@ -1690,8 +4776,6 @@ def main():
                     
                 router_id = generar_router_id(area_ospf, contadores_areas[area_ospf])
                 router_ids[r] = router_id
-                
-                f.write(f"! Router-ID: {router_id}\n")
                 if tipo_ruteo == "ospf":
                     print(f"✅ Router-ID asignado: {router_id}")
                 
@@ -1711,8 +4795,8 @@ def main():
                     swc3_router_ids[r] = swc3_router_id
                     
                     # Asignar IPs para la conexión Router ↔ SWC3
-                    if redes_routers:
-                        red_router_swc3 = redes_routers.pop(0)  # Tomar una red /30
+                    red_router_swc3 = registro.tomar_red_30()  # Pedir una red /30
+                    if red_router_swc3:
                         network_r_swc3, mask_r_swc3 = red_router_swc3
                         
                         # Router toma primera IP, SWC3 toma segunda IP
@@ -1738,9 +4822,6 @@ def main():
                         print(f"   📍 IP Router: {ip_router_hacia_swc3}")
                         print(f"   📍 IP SWC3: {ip_swc3_hacia_router}")
                         print(f"   🏠 IP Admin: {ip_admin_swc3}")
-                        
-                        f.write(f"! SWC3 Router-ID: {swc3_router_id}\n")
-                        f.write(f"! Conexión Router-SWC3: {network_r_swc3}/{mask_r_swc3}\n")
                     else:
                         print("❌ No hay redes /30 disponibles para SWC3")
                         tiene_swc3 = False
@@ -1783,7 +4864,7 @@ def main():
                 
                 # Primero, detectar conexiones ya configuradas con otros routers
                 conexiones_previas, conexiones_ospf_previas = detectar_conexiones_previas(
-                    r, conexiones_mapa, areas_ospf, configuracion_orden)
+                    r, registro, areas_ospf)
                 
                 # Mostrar las conexiones ya configuradas
                 if conexiones_previas:
@@ -1830,15 +4911,15 @@ def main():
                         
                         # Determinar a qué área pertenece esta red
                         # Si el router destino ya está configurado, usar su área
-                        if hacia_router in configuracion_orden and configuracion_orden.index(hacia_router) < configuracion_orden.index(r):
+                        if registro.configurado_antes(hacia_router, r):
                             area_red = areas_ospf[hacia_router]
                         else:
                             area_red = area_ospf
                     else:
-                        # Asignar una red de la lista de redes entre routers
-                        if redes_routers:
-                            network, mask = redes_routers.pop(0)
-                            conexiones_mapa[conexion_key] = (network, mask)
+                        # Pedir una red /30 para el nuevo enlace
+                        red = registro.conectar(r, hacia_router)
+                        if red:
+                            network, mask = red
                             # Si este router tiene el número más bajo, es el "primer router" en la conexión
                             es_primer_router = r < hacia_router
                             # La red pertenece al área de este router ya que se está configurando primero
@@ -1871,116 +4952,108 @@ def main():
                 # Permitir al usuario confirmar o modificar la configuración del router
                 confirmar_o_modificar_router(r, vlans_router, conexiones_router, conexiones_ospf, 
                                            vlans_combos, router_vlans_asignadas, num_routers, 
-                                           conexiones_registradas, redes_routers, conexiones_mapa, area_ospf)
-                
-                # Generar comandos para este router
-                rutas_estaticas_router = None
-                
-                # Si es ruteo estático, calcular rutas después de configurar todos los routers
-                # Por ahora, generar comandos básicos
-                if tiene_swc3 and swc3_config:
-                    # Router se conecta al SWC3, no directamente al switch
-                    comandos_router = generar_comandos_router_con_swc3(r, vlans_router, conexiones_router, area_ospf, conexiones_ospf, router_id, tipo_ruteo, rutas_estaticas_router, swc3_config)
-                else:
-                    # Router normal (sin SWC3)
-                    comandos_router = generar_comandos_router(r, vlans_router, conexiones_router, area_ospf, conexiones_ospf, router_id, tipo_ruteo, rutas_estaticas_router)
-                
-                # Escribir comandos del router en el archivo
-                f.write("\n! -- CONFIGURACIÓN DE ROUTER --\n")
-                for comando in comandos_router:
-                    f.write(f"{comando}\n")
+                                           conexiones_registradas, registro, area_ospf)
                 
-                # Si tiene SWC3, escribir también su configuración
-                if tiene_swc3 and swc3_config:
-                    f.write(f"\n! -- CONFIGURACIÓN DEL SWC3_R{r} --\n")
-                    comandos_swc3 = generar_comandos_swc3(r, vlans_router, area_ospf, swc3_config['router_id'], 
-                                                        swc3_config['ip_hacia_router'], swc3_config['ip_admin'], 
-                                                        tipo_ruteo, rutas_estaticas_router)
-                    for comando in comandos_swc3:
-                        f.write(f"{comando}\n")
-                
-                # Generar y escribir comandos para el switch asociado
-                f.write(f"\n! -- CONFIGURACIÓN DEL SWITCH{r} --\n")
-                comandos_switch = generar_comandos_switch(r, vlans_combos)
-                for comando in comandos_switch:
-                    f.write(f"{comando}\n")
+                # Registrar el área de cada red entre routers de este router
+                for hacia_router, (network, mask, es_primer_router, area_red) in conexiones_ospf.items():
+                    areas_conexiones[tuple(sorted([r, hacia_router]))] = area_red
                 
                 print(f"✅ Router {r} configurado correctamente")
+        
+        # Enlaces que no son de 10 Mbps (sin ellos la variance de EIGRP queda en 1)
+        anchos_banda = pedir_anchos_banda(conexiones_mapa)
+        
+        # NUEVA FUNCIONALIDAD: Calcular y agregar rutas estáticas si es necesario
+        if tipo_ruteo == "estatico":
+            print(f"\n" + "="*70)
+            print("🔄 CALCULANDO Y AGREGANDO RUTAS ESTÁTICAS")
+            print("="*70)
             
-            # NUEVA FUNCIONALIDAD: Calcular y agregar rutas estáticas si es necesario
-            if tipo_ruteo == "estatico":
-                print(f"\n" + "="*70)
-                print("🔄 CALCULANDO Y AGREGANDO RUTAS ESTÁTICAS")
-                print("="*70)
-                
-                # Calcular rutas estáticas para todos los routers
-                rutas_estaticas_por_router, rutas_estaticas_por_swc3 = calcular_rutas_estaticas(
-                    conexiones_mapa, router_vlans_asignadas, num_routers, 
-                    routers_con_swc3, swc3_configuraciones
-                )
-                
-                # Agregar las rutas estáticas al final del archivo
-                f.write(f"\n\n! ======================================\n")
-                f.write(f"! RUTAS ESTÁTICAS CALCULADAS AUTOMÁTICAMENTE\n")
-                f.write(f"! ======================================\n\n")
-                
-                for router_num in range(1, num_routers + 1):
-                    if router_num in rutas_estaticas_por_router and rutas_estaticas_por_router[router_num]:
-                        f.write(f"! ---- RUTAS ESTÁTICAS PARA ROUTER {router_num} ----\n")
-                        f.write(f"! Configurar en Router{router_num}:\n")
-                        
-                        comandos_rutas = generar_comandos_rutas_estaticas(rutas_estaticas_por_router[router_num])
-                        for comando in comandos_rutas:
-                            f.write(f"{comando}\n")
-                        f.write(f"\n")
-                        
-                        # También agregar rutas para SWC3 si existe - USAR RUTAS ESPECÍFICAS
-                        if router_num in routers_con_swc3 and routers_con_swc3[router_num]:
-                            f.write(f"! ---- RUTAS ESTÁTICAS PARA SWC3_R{router_num} ----\n")
-                            f.write(f"! Configurar en SWC3_R{router_num}:\n")
-                            
-                            # Usar las rutas específicas del SWC3, no las del router
-                            if router_num in rutas_estaticas_por_swc3:
-                                comandos_rutas_swc3 = generar_comandos_rutas_estaticas(rutas_estaticas_por_swc3[router_num])
-                                for comando in comandos_rutas_swc3:
-                                    f.write(f"{comando}\n")
-                            f.write(f"\n")
+            # Opcional: repartir el tráfico entre caminos alternativos en lugar de usar siempre el más corto
+            primer_salto_destinos = None
+            if validar_si_no("⚖️ ¿Planificar las rutas según la carga (tráfico uniforme entre routers)? (s/n): "):
+                kbps = validar_numero_positivo(f"📶 Tráfico entre cada par de routers en kbps (p. ej. {TRAFICO_UNIFORME_KBPS}): ")
+                primer_salto_destinos, reporte_carga = planificar_rutas_por_carga(
+                    conexiones_mapa, num_routers, matriz_trafico(num_routers, uniforme=kbps), anchos_banda)
+                mostrar_reporte_carga(reporte_carga)
+            
+            # Calcular rutas estáticas para todos los routers
+            rutas_estaticas_por_router, rutas_estaticas_por_swc3 = calcular_rutas_estaticas(
+                conexiones_mapa, router_vlans_asignadas, num_routers, 
+                routers_con_swc3, swc3_configuraciones, primer_salto_destinos
+            )
+        
+        # Escribir el archivo .CISCO una vez configurados todos los routers,
+        # así cada router incluye también las conexiones declaradas por routers posteriores
+        plan = {
+            'semilla': semilla,
+            'base_ip': base_ip,
+            'tipo_ruteo': tipo_ruteo,
+            'num_routers': num_routers,
+            'vlans_combos': vlans_combos,
+            'redes_30': registro.redes_30,
+            'conexiones_mapa': conexiones_mapa,
+            'areas_conexiones': areas_conexiones,
+            'router_vlans_asignadas': router_vlans_asignadas,
+            'areas_ospf': areas_ospf,
+            'router_ids': router_ids,
+            'routers_con_swc3': routers_con_swc3,
+            'swc3_configuraciones': swc3_configuraciones,
+            'rutas_estaticas': rutas_estaticas_por_router,
+            'rutas_estaticas_swc3': rutas_estaticas_por_swc3,
+            'base_ipv6': None,
+            'redes6': {},
+            'minimizar_ospf': minimizar_ospf,
+            'rangos_area': {},
+            'areas_stub': {},
+            'timers_ospf': timers_ospf,
+            'anchos_banda': anchos_banda,
+            'variance_eigrp': {},
+            'reporte_carga': reporte_carga,
+            'miembros_etherchannel': miembros_etherchannel,
+            'pcs_por_vlan': {r: {vlan_id: pcs_por_vlan for vlan_id in vlans} for r, vlans in router_vlans_asignadas.items()}
+                            if pcs_por_vlan else {}
+        }
+        
+        if tipo_ruteo == "eigrp":
+            plan['variance_eigrp'] = calcular_variance_eigrp(plan)
+        
+        # Resúmenes "area X range" en los ABR cuando hay más de un área
+        if tipo_ruteo == "ospf" and len(set(areas_ospf.values()) | set(areas_conexiones.values())) > 1:
+            if validar_si_no("📦 ¿Resumir las redes de cada área en los ABR (area X range)? (s/n): "):
+                plan['rangos_area'] = calcular_rangos_area(plan)
+            if validar_si_no("🌵 ¿Configurar como stub las áreas no troncales sin rutas externas? (s/n): "):
+                sin_resumen = validar_si_no("🌵 ¿Totally stubby (solo ruta por defecto desde el ABR)? (s/n): ")
+                plan['areas_stub'] = clasificar_areas_stub(plan, sin_resumen)
+                for area, totalmente in plan['areas_stub'].items():
+                    print(f"   🌵 Área {area}: {'totally stubby' if totalmente else 'stub'}")
+        if base_ipv6:
+            asignar_ipv6_plan(plan, base_ipv6, prefijo_ipv6)
+        
+        with open(filename, 'w') as f:
+            f.write(renderizar_plan(plan))
         
         print(f"\n🎉 ¡Configuraciones guardadas exitosamente en {filename}!")
         
+        # Instantánea binaria del plan para recargarlo sin repetir las preguntas
+        filename_plan = filename.replace('.CISCO', '.plan')
+        guardar_instantanea(plan, filename_plan)
+        print(f"💾 Instantánea del plan guardada en {filename_plan}")
+        
         # ==========================================
         # GENERAR CÓDIGO PTBUILDER V2
         # ==========================================
         
         # Crear mapa dinámico de interfaces basado en la configuración real
-        mapa_interfaces_dinamico = crear_mapa_interfaces_dinamico(conexiones_mapa, router_vlans_asignadas, routers_con_swc3)
+        capa_acceso = capa_acceso_de_plan(plan)
+        mapa_interfaces_dinamico = crear_mapa_interfaces_dinamico(conexiones_mapa, router_vlans_asignadas, routers_con_swc3,
+                                                                  miembros_etherchannel, capa_acceso)
         
         # Mostrar el mapa de interfaces generado
         mostrar_mapa_interfaces(mapa_interfaces_dinamico)
         
-        # Preparar datos de red para PTBuilder
-        datos_red = []
-        
-        # Agregar routers
-        for r in range(1, num_routers + 1):
-            datos_red.append({'nombre': f'Router{r}', 'tipo': 'R'})
-        
-        # Agregar SWC3
-        for r in range(1, num_routers + 1):
-            if routers_con_swc3.get(r, False):
-                datos_red.append({'nombre': f'SWC3_R{r}', 'tipo': 'SWC3'})
-        
-        # Agregar switches
-        for r in range(1, num_routers + 1):
-            datos_red.append({'nombre': f'SWITCH{r}', 'tipo': 'SW'})
-        
-        # Agregar PCs (3 PCs por switch)
-        for r in range(1, num_routers + 1):
-            for pc_num in range(1, 4):  # PC1, PC2, PC3 por cada switch
-                datos_red.append({'nombre': f'PC{r}_{pc_num}', 'tipo': 'PC', 'switch': r})
-        
         # Generar código JavaScript para PTBuilder
-        codigo_js = generar_codigo_ptbuilder(datos_red, mapa_interfaces_dinamico)
+        codigo_js = generar_ptbuilder_de_plan(plan)
         
         # Guardar archivo JavaScript
         filename_base = filename.replace('.CISCO', '')
@@ -1989,7 +5062,7 @@ def main():
         if filename_js:
             # Mostrar resumen de PTBuilder
             num_swc3_creados = sum(1 for asignado in routers_con_swc3.values() if asignado)
-            mostrar_resumen_ptbuilder(filename_js, num_routers, num_swc3_creados)
+            mostrar_resumen_ptbuilder(filename_js, num_routers, num_swc3_creados, capa_acceso)
         
         # Mostrar resumen de los router-IDs asignados por área (solo para OSPF)
         if tipo_ruteo == "ospf":
@@ -2016,6 +5089,14 @@ def main():
             else:
                 print(f"🖥️ Router {r}: Sin conexiones adicionales")
         
+        resumen_topologia = resumir_topologia(calcular_matrices_topologia(construir_grafo_topologia(conexiones_mapa, num_routers)))
+        print(f"📐 Diámetro: {resumen_topologia['diametro']} saltos | "
+              f"Promedio entre routers alcanzables: {resumen_topologia['saltos_promedio']:.2f} saltos")
+        if len(resumen_topologia['particiones']) > 1:
+            print(f"⚠️ La topología está partida en {len(resumen_topologia['particiones'])} partes sin conexión entre sí:")
+            for particion in resumen_topologia['particiones']:
+                print(f"   🧩 Routers {particion}")
+        
         # Mostrar resumen de SWC3
         if any(routers_con_swc3.values()):
             print(f"\n" + "="*50)
@@ -2034,18 +5115,24 @@ def main():
         print(f"\n" + "="*50)
         print(f"🔄 RESUMEN DE CONFIGURACIÓN DE RUTEO")
         print("="*50)
-        print(f"📊 Tipo de ruteo utilizado: {'OSPF' if tipo_ruteo == 'ospf' else 'Ruteo Estático'}")
+        print(f"📊 Tipo de ruteo utilizado: {NOMBRES_TIPO_RUTEO[tipo_ruteo]}")
         
         if tipo_ruteo == "estatico":
             total_rutas = sum(len(rutas) for rutas in rutas_estaticas_por_router.values())
             print(f"📍 Total de rutas estáticas calculadas: {total_rutas}")
             print(f"🤖 Rutas calculadas automáticamente por algoritmo BFS")
-            print(f"✅ Todas las redes son alcanzables entre routers")
-        else:
+            # Comprobar las tablas generadas simulando el reenvío salto a salto
+            mostrar_reporte_reenvio(verificar_reenvio(plan))
+        elif tipo_ruteo == "ospf":
             areas_unicas = set(areas_ospf.values())
             print(f"🌐 Áreas OSPF configuradas: {sorted(areas_unicas)}")
             print(f"🔄 Protocolo de ruteo dinámico activado")
             print(f"📊 Router-IDs asignados automáticamente")
+        else:
+            print(f"🔄 Protocolo de ruteo dinámico activado (sentencias network calculadas de las subredes asignadas)")
+            for r, variance in sorted(plan['variance_eigrp'].items()):
+                if variance > 1:
+                    print(f"   ⚖️ Router {r}: variance {variance} (balanceo por costos desiguales)")
         
         print(f"\n" + "="*50)
         print("🌐 RESUMEN DE DIRECCIONES IP DE ADMINISTRACIÓN")
@@ -2063,7 +5150,7 @@ def main():
         print("🔧 Por favor, verifica los datos introducidos e intenta nuevamente.")
 
 # Función para generar comandos para un router CON SWC3
-def generar_comandos_router_con_swc3(router_num, vlans_asignadas, conexiones_routers, area_ospf, conexiones_ospf, router_id, tipo_ruteo="ospf", rutas_estaticas=None, swc3_config=None):
+def generar_comandos_router_con_swc3(router_num, vlans_asignadas, conexiones_routers, area_ospf, conexiones_ospf, router_id, tipo_ruteo="ospf", rutas_estaticas=None, swc3_config=None, redes6=None, redes_plan=None, rangos_area=None, areas_stub=None, timers_ospf=None, variance=None, anchos_banda=None):
     """
     Genera comandos para un router que tiene SWC3 intermedio
     El router NO configura VLANs directamente, se conecta al SWC3
@@ -2082,6 +5169,10 @@ def generar_comandos_router_con_swc3(router_num, vlans_asignadas, conexiones_rou
         "username admin privilege 15 password cisco"
     ]
     
+    # Dual-stack: habilitar el ruteo IPv6 antes de configurar las interfaces
+    if redes6:
+        comandos.append("ipv6 unicast-routing")
+    
     # Interfaz hacia el SWC3 - Configurar IP correcta
     if swc3_config:
         # Calcular la IP del router hacia el SWC3 (primera IP usable de la red /30)
@@ -2094,6 +5185,7 @@ def generar_comandos_router_con_swc3(router_num, vlans_asignadas, conexiones_rou
             f"ip add {ip_router_hacia_swc3} {mascara_decimal}",
             "no shut"
         ])
+        comandos.extend(comandos_ipv6_interfaz(redes6, network, 0, tipo_ruteo, area_ospf))
     else:
         # Fallback si no hay configuración SWC3
         comandos.extend([
@@ -2112,8 +5204,17 @@ def generar_comandos_router_con_swc3(router_num, vlans_asignadas, conexiones_rou
         ip_usable = obtener_ip_usable(network, mask, ip_offset)
         mascara_decimal = convertir_mascara(mask)
         comandos.extend(configurar_interface(interface, ip_usable, mascara_decimal))
+        area_enlace = conexiones_ospf[hacia_router][3] if hacia_router in conexiones_ospf else area_ospf
+        comandos.extend(comandos_ipv6_interfaz(redes6, network, 0 if es_primer_router else 1, tipo_ruteo, area_enlace))
+        if tipo_ruteo == "ospf":
+            comandos.extend(comandos_timers_ospf(timers_ospf, redes6, network))
+        if anchos_banda and hacia_router in anchos_banda:
+            comandos.append(f"bandwidth {anchos_banda[hacia_router]}")
         interface_idx += 1
 
+    # Todas las interfaces del router tienen vecinos (SWC3 y Ethernet1/x): ninguna es pasiva
+    interfaces_pasivas = []
+    
     # Configuración de ruteo según el tipo elegido
     if tipo_ruteo == "ospf":
         # Configuración OSPF
@@ -2121,18 +5222,47 @@ def generar_comandos_router_con_swc3(router_num, vlans_asignadas, conexiones_rou
             f"router ospf 1",
             f"router-id {router_id}"
         ])
+        comandos.extend(comandos_ajustes_ospf(interfaces_pasivas))
         
         # Agregar red hacia SWC3 si está configurada
+        redes_ospf = []
         if swc3_config:
             network, mask = swc3_config['red_conexion']
-            wildcard = convertir_a_wildcard(convertir_mascara(mask))
-            comandos.append(f"network {network} {wildcard} area {area_ospf}")
+            redes_ospf.append((network, mask, area_ospf))
         
         # Agregar redes entre routers al área correspondiente - Ordenados
         conexiones_ospf_ordenadas = sorted(conexiones_ospf.items(), key=lambda x: x[0])
         for hacia_router, (network, mask, es_primer_router, area) in conexiones_ospf_ordenadas:
-            wildcard = convertir_a_wildcard(convertir_mascara(mask))
-            comandos.append(f"network {network} {wildcard} area {area}")
+            redes_ospf.append((network, mask, area))
+        
+        comandos.extend(comandos_network_ospf(redes_ospf, redes_plan))
+        
+        # ABR: resumir las redes de cada área a la que pertenece
+        if rangos_area:
+            comandos.extend(comandos_rangos_area(rangos_area))
+        
+        # Áreas stub: todos los routers del área deben declararlas igual
+        if areas_stub:
+            comandos.extend(comandos_areas_stub(areas_stub))
+        
+        # OSPFv3: las interfaces ya se asignaron a su área con "ipv6 ospf 1 area X"
+        if redes6:
+            comandos.extend([
+                "ipv6 router ospf 1",
+                f"router-id {router_id}"
+            ])
+            comandos.extend(comandos_ajustes_ospf(interfaces_pasivas))
+            if areas_stub:
+                comandos.extend(comandos_areas_stub(areas_stub))
+    
+    elif tipo_ruteo in ("eigrp", "rip"):
+        # Red hacia el SWC3 y enlaces entre routers (las VLANs las anuncia el SWC3)
+        redes = [tuple(swc3_config['red_conexion'])] if swc3_config else []
+        redes += [(network, mask) for _, (network, mask, _) in sorted(conexiones_routers.items())]
+        if tipo_ruteo == "eigrp":
+            comandos.extend(comandos_eigrp(redes, redes_plan, router_id, interfaces_pasivas, variance, redes6))
+        else:
+            comandos.extend(comandos_rip(redes, interfaces_pasivas, redes6))
     
     elif tipo_ruteo == "estatico":
         # Configuración de rutas estáticas
@@ -2142,12 +5272,15 @@ def generar_comandos_router_con_swc3(router_num, vlans_asignadas, conexiones_rou
 
     return comandos
 
-def crear_mapa_interfaces_dinamico(conexiones_mapa, router_vlans_asignadas, routers_con_swc3):
+def crear_mapa_interfaces_dinamico(conexiones_mapa, router_vlans_asignadas, routers_con_swc3, miembros_etherchannel=1,
+                                   capa_acceso=None):
     """
     Crea un mapa dinámico de interfaces basado en:
     1. Conexiones entre routers (GigabitEthernet0/X/0 secuencial)
     2. Conexiones Router-SWC3 (Router: FastEthernet0/0, SWC3: GigabitEthernet1/0/1)
     3. Conexiones SWC3-Switch (SWC3: GigabitEthernet1/0/2, Switch: GigabitEthernet0/1)
+       Con EtherChannel, un cable más por miembro (ver puertos_troncal_swc3)
+    4. Conexiones PC-Switch; con capa_acceso ({router: planificar_capa_acceso}) también la cadena de switches
     """
     mapa_interfaces = {}
     
@@ -2194,15 +5327,18 @@ def crear_mapa_interfaces_dinamico(conexiones_mapa, router_vlans_asignadas, rout
                 'link_type': 'straight'
             }
             
-            # Conexión SWC3 → Switch
-            swc3_switch_key = f"SWC3_R{router_num}_SWITCH{router_num}"
-            mapa_interfaces[swc3_switch_key] = {
-                'device1': f"SWC3_R{router_num}",
-                'device2': f"SWITCH{router_num}",
-                'interface1': "GigabitEthernet1/0/2",  # SWC3 usa gi1/0/2 para switch
-                'interface2': "FastEthernet0/1",  # Switch usa fa0/1 (consistente con .CISCO)
-                'link_type': 'cross'  # SWC3 a Switch requiere cable cross
-            }
+            # Conexión SWC3 → Switch (el primer cable usa gi1/0/2 ↔ fa0/1, consistente con .CISCO)
+            for miembro, (puerto_swc3, puerto_switch) in enumerate(puertos_troncal_swc3(miembros_etherchannel), start=1):
+                swc3_switch_key = f"SWC3_R{router_num}_SWITCH{router_num}"
+                if miembro > 1:
+                    swc3_switch_key += f"_{miembro}"
+                mapa_interfaces[swc3_switch_key] = {
+                    'device1': f"SWC3_R{router_num}",
+                    'device2': f"SWITCH{router_num}",
+                    'interface1': f"GigabitEthernet1/0/{puerto_swc3}",
+                    'interface2': f"FastEthernet0/{puerto_switch}",
+                    'link_type': 'cross'  # SWC3 a Switch requiere cable cross
+                }
         else:
             # Conexión directa Router → Switch (sin SWC3)
             router_switch_key = f"Router{router_num}_SWITCH{router_num}"
@@ -2227,8 +5363,29 @@ def crear_mapa_interfaces_dinamico(conexiones_mapa, router_vlans_asignadas, rout
                     'link_type': 'straight'
                 }
     
-    # 4. AGREGAR CONEXIONES PC ↔ SWITCH (3 PCs por switch)
+    # 4. AGREGAR CONEXIONES PC ↔ SWITCH (3 PCs por switch, o los de la capa de acceso del plan)
     for router_num in router_vlans_asignadas.keys():
+        if capa_acceso is not None:
+            switches = capa_acceso.get(router_num, [])
+            # Cadena de switches: gi0/1 del anterior al gi0/2 del siguiente
+            for anterior, siguiente in zip(switches, switches[1:]):
+                mapa_interfaces[f"{anterior['nombre']}_{siguiente['nombre']}"] = {
+                    'device1': anterior['nombre'],
+                    'device2': siguiente['nombre'],
+                    'interface1': "GigabitEthernet0/1",
+                    'interface2': "GigabitEthernet0/2",
+                    'link_type': 'cross'  # Switch a Switch requiere cable cross
+                }
+            for switch in switches:
+                for pc_nombre, puerto, _ in switch['pcs']:
+                    mapa_interfaces[f"{pc_nombre}_{switch['nombre']}"] = {
+                        'device1': pc_nombre,
+                        'device2': switch['nombre'],
+                        'interface1': "FastEthernet0",
+                        'interface2': f"FastEthernet0/{puerto}",
+                        'link_type': 'straight'
+                    }
+            continue
         switch_interfaces = ["FastEthernet0/2", "FastEthernet0/3", "FastEthernet0/4"]
         for pc_num in range(1, 4):  # PC 1, 2, 3
             pc_switch_key = f"PC{router_num}_{pc_num}_SWITCH{router_num}"
@@ -0,0 +1,508 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import random
+import re
+import time
+
+from RedesV5 import (
+    cargar_especificacion,
+    cargar_instantanea,
+    generar_comandos_dispositivos,
+    generar_comandos_rutas_estaticas,
+    generar_plan_desde_especificacion,
+    ip_admin_switch_acceso,
+)
+
+try:
+    import asyncssh
+except ImportError:
+    asyncssh = None
+
+# Despliegue de un plan en los equipos: cada dispositivo recibe su bloque de comandos por SSH (o Telnet)
+# de forma concurrente. Un pool acotado limita cuántas sesiones hay abiertas a la vez; cada dispositivo
+# se reintenta con espera exponencial si se cae la conexión y se mide cuánto tardó en conectar y en recibir
+# su configuración. Para probar sin equipos está ios_simulado.py:
+#   python ios_simulado.py -p 2323 &
+#   python desplegar_configuraciones.py plan.plan --simulado 127.0.0.1:2323 -c 500
+
+# Credenciales que dejan configuradas los bloques de RedesV5.py
+USUARIO_POR_DEFECTO = "admin"
+CLAVE_POR_DEFECTO = "cisco"
+SECRETO_POR_DEFECTO = "cisco"
+PUERTOS_PROTOCOLO = {"ssh": 22, "telnet": 23}
+
+# IP administrativa de cada tipo de dispositivo en la red 192.168.R.0/24 de su router
+HOST_ADMIN = {"Router": 1, "SWITCH": 2, "SWC3_R": 3}
+PATRON_SWITCH_ENCADENADO = re.compile(r"^SWITCH\d+_(\d+)$")
+
+PATRON_PROMPT = re.compile(r"[\w.\-]+(\([\w\-]+\))?[>#]\s*$")
+PATRON_USUARIO = re.compile(r"(Username|login): ?$", re.I)
+PATRON_CLAVE = re.compile(r"Password: ?$", re.I)
+ERRORES_IOS = ("% Invalid", "% Incomplete", "% Ambiguous", "% Unknown", "% Bad")
+PERCENTILES = (50, 95, 99)
+
+# Caídas de conexión o equipos que no responden: se reintentan
+ERRORES_REINTENTABLES = (OSError, EOFError, asyncio.TimeoutError) + ((asyncssh.Error,) if asyncssh else ())
+
+IAC, DONT, DO, WONT, WILL, SB, SE = 255, 254, 253, 252, 251, 250, 240
+OPCIONES_ACEPTADAS = (1, 3)  # Eco del servidor y supresión de go-ahead
+
+class ErrorAutenticacion(Exception):
+    """
+    Credenciales rechazadas: no tiene sentido reintentar
+    """
+
+class SesionIOS:
+    """
+    Diálogo con el CLI de IOS guiado por el prompt: cada comando se envía cuando
+    el equipo terminó el anterior, así no se pierden líneas aunque el equipo sea lento
+    Las subclases solo implementan _leer, _escribir y cerrar
+    """
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.buffer = ""
+        self.errores = []
+
+    async def _leer(self):
+        raise NotImplementedError
+
+    async def _escribir(self, texto):
+        raise NotImplementedError
+
+    async def cerrar(self):
+        raise NotImplementedError
+
+    async def esperar(self, *patrones):
+        """
+        Lee hasta que el final de la salida coincida con algún patrón
+        Retorna (índice del patrón, salida acumulada)
+        """
+        fin = time.monotonic() + self.timeout
+        while True:
+            for indice, patron in enumerate(patrones):
+                if patron.search(self.buffer):
+                    salida, self.buffer = self.buffer, ""
+                    return indice, salida
+            restante = fin - time.monotonic()
+            if restante <= 0:
+                raise asyncio.TimeoutError(f"Sin respuesta del equipo tras {self.timeout} s")
+            fragmento = await asyncio.wait_for(self._leer(), restante)
+            if not fragmento:
+                raise ConnectionResetError("El equipo cerró la sesión")
+            self.buffer += fragmento
+
+    async def iniciar(self, usuario, clave, secreto):
+        """
+        Login local (si el equipo lo pide), enable y paginación desactivada
+        """
+        indice, _ = await self.esperar(PATRON_PROMPT, PATRON_USUARIO, PATRON_CLAVE)
+        if indice == 1:
+            await self._escribir(f"{usuario}\n")
+            await self.esperar(PATRON_CLAVE)
+            indice = 2
+        if indice == 2:
+            await self._escribir(f"{clave}\n")
+            indice, salida = await self.esperar(PATRON_PROMPT, PATRON_USUARIO, PATRON_CLAVE)
+            if indice != 0:
+                raise ErrorAutenticacion("Usuario o contraseña rechazados")
+
+        await self._escribir("\n")
+        _, salida = await self.esperar(PATRON_PROMPT)
+        if salida.rstrip().endswith(">"):
+            await self._escribir("enable\n")
+            indice, _ = await self.esperar(PATRON_PROMPT, PATRON_CLAVE)
+            if indice == 1:
+                await self._escribir(f"{secreto}\n")
+                _, salida = await self.esperar(PATRON_PROMPT, PATRON_CLAVE)
+                if not salida.rstrip().endswith("#"):
+                    raise ErrorAutenticacion("Enable secret rechazado")
+        await self.ejecutar("terminal length 0")
+
+    async def ejecutar(self, comando):
+        """
+        Envía un comando y espera el prompt; los errores de IOS quedan registrados en self.errores
+        """
+        await self._escribir(f"{comando}\n")
+        _, salida = await self.esperar(PATRON_PROMPT)
+        if any(error in salida for error in ERRORES_IOS):
+            self.errores.append({'comando': comando, 'salida': salida.strip()})
+        return salida
+
+class SesionTelnet(SesionIOS):
+    """
+    Telnet sobre los streams de asyncio; las negociaciones se rechazan salvo eco y supresión de go-ahead
+    """
+    def __init__(self, lector, escritor, timeout):
+        super().__init__(timeout)
+        self.lector = lector
+        self.escritor = escritor
+        self.pendiente = b""
+
+    @classmethod
+    async def abrir(cls, host, puerto, timeout_conexion, timeout):
+        lector, escritor = await asyncio.wait_for(asyncio.open_connection(host, puerto), timeout_conexion)
+        return cls(lector, escritor, timeout)
+
+    def _filtrar_iac(self, datos):
+        """
+        Quita las secuencias IAC de los datos y responde las negociaciones
+        Una secuencia cortada entre dos lecturas queda pendiente para la siguiente
+        """
+        datos = self.pendiente + datos
+        self.pendiente = b""
+        texto = bytearray()
+        respuesta = bytearray()
+        i = 0
+        while i < len(datos):
+            byte = datos[i]
+            if byte != IAC:
+                texto.append(byte)
+                i += 1
+                continue
+            if i + 1 >= len(datos):
+                self.pendiente = datos[i:]
+                break
+            orden = datos[i + 1]
+            if orden == IAC:
+                texto.append(IAC)
+                i += 2
+            elif orden in (DO, DONT, WILL, WONT):
+                if i + 2 >= len(datos):
+                    self.pendiente = datos[i:]
+                    break
+                opcion = datos[i + 2]
+                if orden == WILL:
+                    respuesta += bytes([IAC, DO if opcion in OPCIONES_ACEPTADAS else DONT, opcion])
+                elif orden == DO:
+                    respuesta += bytes([IAC, WONT, opcion])
+                i += 3
+            elif orden == SB:
+                fin = datos.find(bytes([IAC, SE]), i)
+                if fin < 0:
+                    self.pendiente = datos[i:]
+                    break
+                i = fin + 2
+            else:
+                i += 2
+        if respuesta:
+            self.escritor.write(bytes(respuesta))
+        return texto.decode(errors="replace")
+
+    async def _leer(self):
+        while True:
+            datos = await self.lector.read(4096)
+            if not datos:
+                return ""
+            texto = self._filtrar_iac(datos)
+            if texto:
+                return texto
+
+    async def _escribir(self, texto):
+        self.escritor.write(texto.replace("\n", "\r\n").encode())
+        await self.escritor.drain()
+
+    async def cerrar(self):
+        self.escritor.close()
+        with contextlib.suppress(OSError):
+            await self.escritor.wait_closed()
+
+class SesionSSH(SesionIOS):
+    """
+    SSH con asyncssh (opcional): shell interactivo con terminal, igual que una sesión de consola
+    """
+    def __init__(self, conexion, proceso, timeout):
+        super().__init__(timeout)
+        self.conexion = conexion
+        self.proceso = proceso
+
+    @classmethod
+    async def abrir(cls, host, puerto, timeout_conexion, timeout, usuario, clave):
+        if asyncssh is None:
+            raise RuntimeError("El despliegue por SSH necesita asyncssh (pip install asyncssh) o usar --protocolo telnet")
+        conexion = await asyncio.wait_for(
+            asyncssh.connect(host, puerto, username=usuario, password=clave, known_hosts=None),
+            timeout_conexion)
+        proceso = await conexion.create_process(term_type="vt100")
+        return cls(conexion, proceso, timeout)
+
+    async def _leer(self):
+        return await self.proceso.stdout.read(4096)
+
+    async def _escribir(self, texto):
+        self.proceso.stdin.write(texto)
+
+    async def cerrar(self):
+        self.conexion.close()
+        with contextlib.suppress(OSError):
+            await self.conexion.wait_closed()
+
+class PoolSesiones:
+    """
+    Pool acotado de sesiones: como mucho max_sesiones abiertas a la vez
+    Los dispositivos que esperan un lugar no ocupan sockets
+    """
+    def __init__(self, max_sesiones, protocolo, usuario, clave, secreto, timeout_conexion, timeout):
+        self.semaforo = asyncio.Semaphore(max_sesiones)
+        self.protocolo = protocolo
+        self.usuario = usuario
+        self.clave = clave
+        self.secreto = secreto
+        self.timeout_conexion = timeout_conexion
+        self.timeout = timeout
+        self.activas = 0
+        self.max_activas = 0
+
+    @contextlib.asynccontextmanager
+    async def sesion(self, host, puerto, tiempos):
+        """
+        Abre una sesión lista para configurar (logueada y en enable) y la cierra al salir
+        Deja en tiempos['conexion_s'] lo que tardó el login
+        """
+        async with self.semaforo:
+            self.activas += 1
+            self.max_activas = max(self.max_activas, self.activas)
+            sesion = None
+            try:
+                inicio = time.perf_counter()
+                if self.protocolo == "ssh":
+                    sesion = await SesionSSH.abrir(host, puerto, self.timeout_conexion, self.timeout,
+                                                   self.usuario, self.clave)
+                else:
+                    sesion = await SesionTelnet.abrir(host, puerto, self.timeout_conexion, self.timeout)
+                await sesion.iniciar(self.usuario, self.clave, self.secreto)
+                tiempos['conexion_s'] = time.perf_counter() - inicio
+                yield sesion
+            finally:
+                self.activas -= 1
+                if sesion:
+                    await sesion.cerrar()
+
+# ============================================================================
+# BLOQUES E INVENTARIO
+# ============================================================================
+
+def bloques_de_despliegue(plan, guardar=False):
+    """
+    Bloque de comandos de cada dispositivo del plan, listo para enviar por CLI
+    Con ruteo estático se agregan al final las rutas del router y del SWC3 (en el .CISCO van aparte)
+    Retorna una lista de (nombre_dispositivo, router, comandos)
+    """
+    rutas = plan.get('rutas_estaticas') if plan['tipo_ruteo'] == "estatico" else None
+    rutas_swc3 = plan.get('rutas_estaticas_swc3') if rutas else None
+    bloques = []
+    for r in range(1, plan['num_routers'] + 1):
+        for nombre, comandos in generar_comandos_dispositivos(plan, r):
+            comandos = [comando for comando in comandos if comando and not comando.startswith("!")]
+            comandos.append("end")
+            if rutas:
+                rutas_dispositivo = rutas.get(r) if nombre.startswith("Router") else (
+                    rutas_swc3.get(r) if nombre.startswith("SWC3") else None)
+                if rutas_dispositivo:
+                    comandos.append("conf t")
+                    comandos.extend(comando for comando in generar_comandos_rutas_estaticas(rutas_dispositivo)
+                                    if not comando.startswith("!"))
+                    comandos.append("end")
+            if guardar:
+                comandos.append("write memory")
+            bloques.append((nombre, r, comandos))
+    return bloques
+
+def direccion_admin(nombre, router):
+    """
+    IP administrativa del dispositivo (192.168.R.1 router, .2 switch, .3 SWC3, .4... switches encadenados)
+    """
+    encadenado = PATRON_SWITCH_ENCADENADO.match(nombre)
+    if encadenado:
+        return ip_admin_switch_acceso(router, int(encadenado.group(1)))
+    for prefijo, host in HOST_ADMIN.items():
+        if nombre.startswith(prefijo):
+            return f"192.168.{router}.{host}"
+    raise ValueError(f"Dispositivo desconocido: {nombre}")
+
+def separar_destino(destino, puerto_por_defecto):
+    host, _, puerto = destino.rpartition(":") if ":" in destino else (destino, "", "")
+    return host, int(puerto) if puerto else puerto_por_defecto
+
+def construir_inventario(bloques, puerto, inventario=None, simulado=None):
+    """
+    Destino (host, puerto) de cada dispositivo: la IP administrativa del plan,
+    lo que indique el inventario JSON ({"Router1": "10.0.0.1:22", ...})
+    o, con simulado, el mismo servidor para todos
+    """
+    destinos = {}
+    for nombre, router, _ in bloques:
+        if simulado:
+            destinos[nombre] = separar_destino(simulado, puerto)
+        elif inventario and nombre in inventario:
+            destinos[nombre] = separar_destino(inventario[nombre], puerto)
+        else:
+            destinos[nombre] = (direccion_admin(nombre, router), puerto)
+    return destinos
+
+# ============================================================================
+# DESPLIEGUE CONCURRENTE
+# ============================================================================
+
+async def desplegar_dispositivo(pool, nombre, host, puerto, comandos, reintentos, espera_base):
+    """
+    Envía el bloque de un dispositivo reintentando las caídas de conexión con espera exponencial
+    Los errores de IOS (comando inválido) no se reintentan: se reportan
+    """
+    resultado = {'dispositivo': nombre, 'host': host, 'puerto': puerto, 'comandos': len(comandos),
+                 'ok': False, 'intentos': 0, 'conexion_s': None, 'envio_s': None, 'total_s': None,
+                 'errores_ios': [], 'error': None}
+    inicio = time.perf_counter()
+    for intento in range(1, reintentos + 2):
+        resultado['intentos'] = intento
+        tiempos = {}
+        try:
+            async with pool.sesion(host, puerto, tiempos) as sesion:
+                inicio_envio = time.perf_counter()
+                for comando in comandos:
+                    await sesion.ejecutar(comando)
+                resultado['envio_s'] = time.perf_counter() - inicio_envio
+                resultado['conexion_s'] = tiempos['conexion_s']
+                resultado['errores_ios'] = sesion.errores
+                resultado['ok'] = not sesion.errores
+                resultado['error'] = None
+                break
+        except ErrorAutenticacion as e:
+            resultado['error'] = str(e)
+            break
+        except ERRORES_REINTENTABLES as e:
+            resultado['error'] = f"{type(e).__name__}: {e}"
+            if intento <= reintentos:
+                # Espera exponencial con jitter para no reconectar todos a la vez
+                await asyncio.sleep(espera_base * 2 ** (intento - 1) * random.uniform(0.5, 1.5))
+    resultado['total_s'] = time.perf_counter() - inicio
+    return resultado
+
+async def desplegar(bloques, destinos, pool, reintentos=3, espera_base=0.5, mostrar_progreso=True):
+    """
+    Despliega todos los bloques en paralelo (acotado por el pool) y retorna el resultado de cada dispositivo
+    """
+    tareas = [asyncio.create_task(desplegar_dispositivo(pool, nombre, *destinos[nombre], comandos,
+                                                        reintentos, espera_base))
+              for nombre, _, comandos in bloques]
+    resultados = []
+    for tarea in asyncio.as_completed(tareas):
+        resultado = await tarea
+        resultados.append(resultado)
+        if mostrar_progreso and not resultado['ok']:
+            detalle = resultado['error'] or f"{len(resultado['errores_ios'])} comandos rechazados"
+            print(f"   ❌ {resultado['dispositivo']} ({resultado['host']}:{resultado['puerto']}): {detalle}")
+    resultados.sort(key=lambda resultado: [int(parte) if parte.isdigit() else parte
+                                           for parte in re.split(r"(\d+)", resultado['dispositivo'])])
+    return resultados
+
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return 0.0
+    return valores_ordenados[min(len(valores_ordenados) - 1, int(len(valores_ordenados) * p / 100))]
+
+def resumir(resultados, duracion, pool):
+    exitosos = [resultado for resultado in resultados if resultado['ok']]
+    resumen = {
+        'dispositivos': len(resultados),
+        'exitosos': len(exitosos),
+        'fallidos': len(resultados) - len(exitosos),
+        'reintentados': sum(1 for resultado in resultados if resultado['intentos'] > 1),
+        'sesiones_simultaneas_max': pool.max_activas,
+        'duracion_s': duracion
+    }
+    for campo in ('conexion_s', 'envio_s', 'total_s'):
+        valores = sorted(resultado[campo] for resultado in exitosos)
+        resumen[campo] = {f"p{p}": percentil(valores, p) for p in PERCENTILES}
+    return resumen
+
+def mostrar_resumen(resumen):
+    print("\n" + "=" * 60)
+    print("📊 RESUMEN DEL DESPLIEGUE")
+    print("=" * 60)
+    print(f"✅ Exitosos: {resumen['exitosos']}/{resumen['dispositivos']}")
+    if resumen['fallidos']:
+        print(f"❌ Fallidos: {resumen['fallidos']}")
+    print(f"🔁 Dispositivos reintentados: {resumen['reintentados']}")
+    print(f"🔗 Sesiones simultáneas (máximo): {resumen['sesiones_simultaneas_max']}")
+    print(f"⏱️ Duración total: {resumen['duracion_s']:.2f} s")
+    if not resumen['exitosos']:
+        return
+    for campo, titulo in (('conexion_s', "Conexión y login"), ('envio_s', "Envío del bloque"), ('total_s', "Total por dispositivo")):
+        valores = " - ".join(f"{p} {segundos * 1000:.0f} ms" for p, segundos in resumen[campo].items())
+        print(f"   {titulo}: {valores}")
+
+async def ejecutar_despliegue(argumentos, bloques, destinos):
+    pool = PoolSesiones(argumentos.concurrencia, argumentos.protocolo, argumentos.usuario, argumentos.clave,
+                        argumentos.secreto, argumentos.timeout_conexion, argumentos.timeout)
+    inicio = time.perf_counter()
+    resultados = await desplegar(bloques, destinos, pool, argumentos.reintentos, argumentos.espera)
+    return resultados, resumir(resultados, time.perf_counter() - inicio, pool)
+
+def main():
+    parser = argparse.ArgumentParser(description="Despliega en paralelo la configuración de cada dispositivo de un plan")
+    parser.add_argument("especificacion", help="Archivo JSON con la especificación (ver cargar_especificacion en RedesV5.py) "
+                                               "o instantánea .plan de un plan ya generado")
+    parser.add_argument("-s", "--semilla", type=int, default=1, help="Semilla del plan")
+    parser.add_argument("--protocolo", choices=sorted(PUERTOS_PROTOCOLO), default="ssh", help="Protocolo de acceso a los equipos")
+    parser.add_argument("--puerto", type=int, help="Puerto por defecto (22 para SSH, 23 para Telnet)")
+    parser.add_argument("--inventario", help="JSON con el destino de cada dispositivo: {\"Router1\": \"10.0.0.1:22\"}")
+    parser.add_argument("--simulado", help="host:puerto de ios_simulado.py; todos los dispositivos van ahí por Telnet")
+    parser.add_argument("--solo", help="Dispositivos a desplegar, separados por coma (ej: Router1,SWITCH1)")
+    parser.add_argument("-c", "--concurrencia", type=int, default=50, help="Sesiones abiertas a la vez como máximo")
+    parser.add_argument("--reintentos", type=int, default=3, help="Reintentos por dispositivo si se cae la conexión")
+    parser.add_argument("--espera", type=float, default=0.5, help="Espera base (s) entre reintentos, se duplica en cada uno")
+    parser.add_argument("--timeout-conexion", type=float, default=10.0, help="Segundos para establecer la conexión")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Segundos de espera por la respuesta de cada comando")
+    parser.add_argument("--usuario", default=USUARIO_POR_DEFECTO)
+    parser.add_argument("--clave", default=CLAVE_POR_DEFECTO)
+    parser.add_argument("--secreto", default=SECRETO_POR_DEFECTO, help="Enable secret")
+    parser.add_argument("--guardar", action="store_true", help="Termina cada bloque con write memory")
+    parser.add_argument("-o", "--salida", help="Archivo JSON con el resultado y los tiempos de cada dispositivo")
+    argumentos = parser.parse_args()
+
+    if argumentos.simulado:
+        argumentos.protocolo = "telnet"
+    if argumentos.protocolo == "ssh" and asyncssh is None:
+        print("❌ El despliegue por SSH necesita asyncssh (pip install asyncssh); con --protocolo telnet no hace falta")
+        return
+    if argumentos.especificacion.endswith(".plan"):
+        plan = cargar_instantanea(argumentos.especificacion)
+    else:
+        espec = cargar_especificacion(argumentos.especificacion)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                plan = generar_plan_desde_especificacion(espec, argumentos.semilla)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+
+    bloques = bloques_de_despliegue(plan, argumentos.guardar)
+    if argumentos.solo:
+        seleccion = set(argumentos.solo.split(","))
+        bloques = [bloque for bloque in bloques if bloque[0] in seleccion]
+    inventario = None
+    if argumentos.inventario:
+        with open(argumentos.inventario) as f:
+            inventario = json.load(f)
+    destinos = construir_inventario(bloques, argumentos.puerto or PUERTOS_PROTOCOLO[argumentos.protocolo],
+                                    inventario, argumentos.simulado)
+
+    print("=" * 60)
+    print("🚀 DESPLIEGUE DE CONFIGURACIONES")
+    print("=" * 60)
+    print(f"📋 {len(bloques)} dispositivos, {sum(len(comandos) for _, _, comandos in bloques)} comandos "
+          f"por {argumentos.protocolo.upper()} - hasta {argumentos.concurrencia} sesiones a la vez")
+
+    resultados, resumen = asyncio.run(ejecutar_despliegue(argumentos, bloques, destinos))
+    mostrar_resumen(resumen)
+
+    if argumentos.salida:
+        with open(argumentos.salida, 'w') as f:
+            json.dump({'resumen': resumen, 'dispositivos': resultados}, f, indent=2, ensure_ascii=False)
+        print(f"📋 Resultado por dispositivo: {argumentos.salida}")
+
+if __name__ == "__main__":
+    main()
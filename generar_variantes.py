@@ -0,0 +1,119 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from RedesV5 import (
+    activar_cache_rutas,
+    cargar_especificacion,
+    generar_plan_desde_especificacion,
+    generar_ptbuilder_de_plan,
+    guardar_instantanea,
+    renderizar_plan,
+)
+
+# Generación por lotes de variantes de una misma especificación (una por alumno o por mesa de laboratorio).
+# Cada variante usa su propia semilla, su propia asignación de subredes y sus propios archivos,
+# y todas se reparten entre varios procesos. Al final se escribe un índice semilla → direccionamiento.
+
+def resumir_direccionamiento(plan):
+    """
+    Resumen compacto del direccionamiento de un plan para el índice
+    """
+    routers = {}
+    for r in range(1, plan['num_routers'] + 1):
+        resumen_router = {
+            'vlans': {str(vlan_id): f"{network}/{mask}" for vlan_id, (network, mask) in plan['router_vlans_asignadas'].get(r, {}).items()}
+        }
+        swc3_config = plan['swc3_configuraciones'].get(r)
+        if swc3_config:
+            network, mask = swc3_config['red_conexion']
+            resumen_router['swc3'] = f"{network}/{mask}"
+        routers[str(r)] = resumen_router
+
+    enlaces = {f"{r1}-{r2}": f"{network}/{mask}" for (r1, r2), (network, mask) in sorted(plan['conexiones_mapa'].items())}
+    return {'routers': routers, 'enlaces': enlaces}
+
+def generar_variante(tarea):
+    """
+    Genera una variante completa (.CISCO, PTBuilder e instantánea .plan) en un proceso del pool
+    """
+    espec, semilla, numero, carpeta = tarea
+
+    # Los mensajes del generador se descartan: con cientos de variantes solo estorban
+    with contextlib.redirect_stdout(io.StringIO()):
+        plan = generar_plan_desde_especificacion(espec, semilla)
+        contenido = renderizar_plan(plan)
+        codigo_js = generar_ptbuilder_de_plan(plan)
+
+    nombre_base = f"variante_{numero:03d}_s{semilla}"
+    archivo_cisco = os.path.join(carpeta, f"{nombre_base}.CISCO")
+    archivo_js = os.path.join(carpeta, f"{nombre_base}_PTBuilder.js")
+    archivo_plan = os.path.join(carpeta, f"{nombre_base}.plan")
+    with open(archivo_cisco, 'w') as f:
+        f.write(contenido)
+    with open(archivo_js, 'w') as f:
+        f.write(codigo_js)
+    guardar_instantanea(plan, archivo_plan)
+
+    return {
+        'variante': numero,
+        'semilla': semilla,
+        'archivo': os.path.basename(archivo_cisco),
+        'ptbuilder': os.path.basename(archivo_js),
+        'instantanea': os.path.basename(archivo_plan),
+        **resumir_direccionamiento(plan)
+    }
+
+def generar_variantes(espec, num_variantes, semilla_inicial, carpeta, procesos=None, cache_rutas=False):
+    """
+    Genera num_variantes variantes con semillas consecutivas desde semilla_inicial
+    cache_rutas=True activa la caché de rutas en disco en cada proceso del pool
+    Retorna el índice (lista ordenada por número de variante)
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    tareas = [(espec, semilla_inicial + i, i + 1, carpeta) for i in range(num_variantes)]
+
+    # chunksize agrupa tareas pequeñas para no pagar un viaje al pool por variante
+    chunksize = max(1, num_variantes // ((procesos or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=procesos, initializer=activar_cache_rutas if cache_rutas else None) as pool:
+        indice = list(pool.map(generar_variante, tareas, chunksize=chunksize))
+
+    with open(os.path.join(carpeta, "indice.json"), 'w') as f:
+        json.dump(indice, f, indent=2, ensure_ascii=False)
+
+    return indice
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera variantes sembradas de una especificación de red en paralelo")
+    parser.add_argument("especificacion", help="Archivo JSON con la especificación (ver cargar_especificacion en RedesV5.py)")
+    parser.add_argument("-n", "--variantes", type=int, default=10, help="Número de variantes a generar")
+    parser.add_argument("-s", "--semilla-inicial", type=int, default=1, help="Semilla de la primera variante (las demás son consecutivas)")
+    parser.add_argument("-o", "--salida", default="variantes", help="Carpeta de salida")
+    parser.add_argument("-p", "--procesos", type=int, default=None, help="Número de procesos (por defecto, uno por núcleo)")
+    argumentos = parser.parse_args()
+
+    espec = cargar_especificacion(argumentos.especificacion)
+
+    inicio = time.perf_counter()
+    try:
+        indice = generar_variantes(espec, argumentos.variantes, argumentos.semilla_inicial,
+                                   argumentos.salida, argumentos.procesos, cache_rutas=True)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+    duracion = time.perf_counter() - inicio
+
+    print("=" * 60)
+    print(f"🎲 {len(indice)} VARIANTES GENERADAS EN {duracion:.2f} s")
+    print("=" * 60)
+    for variante in indice:
+        enlaces = ", ".join(f"R{k}: {v}" for k, v in variante['enlaces'].items())
+        print(f"   #{variante['variante']:03d} semilla {variante['semilla']}: {variante['archivo']} [{enlaces}]")
+    print(f"📋 Índice de semillas y direccionamiento: {os.path.join(argumentos.salida, 'indice.json')}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+import argparse
+import asyncio
+import os
+import random
+import re
+
+# Dispositivo IOS simulado para probar desplegar_configuraciones.py sin equipos reales.
+# Un solo puerto TCP atiende a cualquier cantidad de sesiones Telnet a la vez; cada sesión se comporta
+# como un equipo recién arrancado (hostname Router, login local, privilegio 15) que va adoptando
+# el hostname que le llega. Guarda los comandos recibidos en modo configuración por hostname,
+# así se puede comparar lo que llegó con los bloques del .CISCO.
+# Opcionalmente agrega latencia por comando y corta sesiones al azar para ejercitar los reintentos.
+
+IAC, WILL = 255, 251
+OPCION_ECO, OPCION_SIN_GO_AHEAD = 1, 3
+MAX_INTENTOS_LOGIN = 3
+
+# Submodo de configuración según la primera palabra del comando (el resto de comandos no cambia de modo)
+SUBMODOS = (
+    (re.compile(r"^int(erface)?\s+\S+\.\d+", re.I), "config-subif"),
+    (re.compile(r"^int(erface)?\s", re.I), "config-if"),
+    (re.compile(r"^ipv6 router\s", re.I), "config-rtr"),
+    (re.compile(r"^router\s", re.I), "config-router"),
+    (re.compile(r"^line\s", re.I), "config-line"),
+    (re.compile(r"^vlan\s+\d+$", re.I), "config-vlan"),
+)
+COMANDOS_EXEC = ("en", "enable", "terminal length 0", "disable")
+
+class EquipoSimulado:
+    """
+    Estado de una sesión: modo actual, hostname y comandos aplicados
+    """
+    def __init__(self, usuario, clave):
+        self.usuario = usuario
+        self.clave = clave
+        self.hostname = "Router"
+        self.modo = None  # None = EXEC privilegiado, "config" o un submodo
+        self.configuracion = []
+        self.guardada = False
+
+    def prompt(self):
+        return f"{self.hostname}({self.modo})#" if self.modo else f"{self.hostname}#"
+
+    def procesar(self, linea):
+        """
+        Aplica una línea y retorna (salida, seguir_conectado)
+        """
+        comando = linea.strip()
+        if not comando or comando.startswith("!"):
+            return "", True
+
+        if self.modo is None:
+            if comando in COMANDOS_EXEC:
+                return "", True
+            if comando in ("conf t", "configure terminal"):
+                self.modo = "config"
+                return "Enter configuration commands, one per line.  End with CNTL/Z.\r\n", True
+            if comando in ("wr", "write memory", "copy running-config startup-config"):
+                self.guardada = True
+                return "Building configuration...\r\n[OK]\r\n", True
+            if comando in ("show running-config", "show run"):
+                return "".join(f"{linea}\r\n" for linea in self.configuracion), True
+            if comando in ("exit", "logout", "quit"):
+                return "", False
+            return "                ^\r\n% Invalid input detected at '^' marker.\r\n", True
+
+        if comando == "end":
+            self.modo = None
+            return "", True
+        if comando == "exit":
+            self.modo = "config" if self.modo != "config" else None
+            return "", True
+
+        self.configuracion.append(comando)
+        if comando.lower().startswith("hostname "):
+            self.hostname = comando.split(None, 1)[1]
+        for patron, submodo in SUBMODOS:
+            if patron.match(comando):
+                self.modo = submodo
+                break
+        return "", True
+
+async def leer_linea(lector):
+    """
+    Lee una línea ignorando las negociaciones Telnet (IAC) que mande el cliente
+    """
+    linea = await lector.readline()
+    if not linea:
+        return None
+    datos = bytearray()
+    i = 0
+    while i < len(linea):
+        if linea[i] == IAC and i + 1 < len(linea):
+            i += 3 if 251 <= linea[i + 1] <= 254 else 2
+            continue
+        datos.append(linea[i])
+        i += 1
+    return datos.decode(errors="replace").rstrip("\r\n")
+
+async def atender_sesion(servidor, lector, escritor):
+    equipo = EquipoSimulado(servidor['usuario'], servidor['clave'])
+    servidor['sesiones'] += 1
+
+    async def enviar(texto):
+        escritor.write(texto.encode())
+        await escritor.drain()
+
+    try:
+        # Como IOS: el servidor hace el eco y suprime go-ahead
+        escritor.write(bytes([IAC, WILL, OPCION_ECO, IAC, WILL, OPCION_SIN_GO_AHEAD]))
+        await enviar("\r\n\r\nUser Access Verification\r\n\r\n")
+
+        for intento in range(MAX_INTENTOS_LOGIN):
+            await enviar("Username: ")
+            usuario = await leer_linea(lector)
+            await enviar("Password: ")
+            clave = await leer_linea(lector)
+            if usuario is None or clave is None:
+                return
+            if (usuario, clave) == (equipo.usuario, equipo.clave):
+                break
+            await enviar("% Login invalid\r\n\r\n")
+        else:
+            return
+
+        await enviar(f"\r\n{equipo.prompt()}")
+        while True:
+            linea = await leer_linea(lector)
+            if linea is None:
+                break
+            if servidor['latencia']:
+                await asyncio.sleep(servidor['latencia'])
+            if random.random() < servidor['fallos']:
+                servidor['cortes'] += 1
+                break  # Corte simulado: el cliente debe reintentar
+            salida, seguir = equipo.procesar(linea)
+            if not seguir:
+                break
+            await enviar(f"{salida}{equipo.prompt()}")
+    except ConnectionError:
+        pass
+    finally:
+        escritor.close()
+        if equipo.configuracion:
+            servidor['configuraciones'][equipo.hostname] = equipo.configuracion
+            if servidor['carpeta']:
+                with open(os.path.join(servidor['carpeta'], f"{equipo.hostname}.cfg"), 'w') as f:
+                    f.write("".join(f"{linea}\n" for linea in equipo.configuracion))
+
+async def iniciar_simulador(host="127.0.0.1", puerto=2323, usuario="admin", clave="cisco",
+                            latencia=0.0, fallos=0.0, carpeta=None):
+    """
+    Arranca el servidor y retorna (servidor asyncio, estado compartido de las sesiones)
+    """
+    estado = {
+        'usuario': usuario, 'clave': clave, 'latencia': latencia, 'fallos': fallos,
+        'carpeta': carpeta, 'sesiones': 0, 'cortes': 0, 'configuraciones': {}
+    }
+    if carpeta:
+        os.makedirs(carpeta, exist_ok=True)
+
+    def manejador(lector, escritor):
+        return atender_sesion(estado, lector, escritor)
+
+    servidor = await asyncio.start_server(manejador, host, puerto, backlog=1024)
+    return servidor, estado
+
+async def ejecutar_simulador(argumentos):
+    servidor, estado = await iniciar_simulador(argumentos.host, argumentos.puerto, argumentos.usuario, argumentos.clave,
+                                               argumentos.latencia / 1000, argumentos.fallos, argumentos.salida)
+    print("=" * 60)
+    print(f"🖥️ IOS SIMULADO EN {argumentos.host}:{argumentos.puerto} (Telnet)")
+    print("=" * 60)
+    print(f"🔑 Usuario: {argumentos.usuario} - latencia {argumentos.latencia} ms - cortes {argumentos.fallos:.1%}")
+    if argumentos.salida:
+        print(f"📋 Configuraciones recibidas en: {argumentos.salida}")
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        print(f"\n📊 {estado['sesiones']} sesiones, {len(estado['configuraciones'])} equipos configurados, "
+              f"{estado['cortes']} cortes simulados")
+
+def main():
+    parser = argparse.ArgumentParser(description="Equipo IOS simulado (Telnet) para probar el despliegue de configuraciones")
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección de escucha")
+    parser.add_argument("-p", "--puerto", type=int, default=2323, help="Puerto TCP")
+    parser.add_argument("--usuario", default="admin", help="Usuario de login local")
+    parser.add_argument("--clave", default="cisco", help="Contraseña de login local")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Milisegundos de espera por comando")
+    parser.add_argument("--fallos", type=float, default=0.0, help="Probabilidad de cortar la sesión en cada comando")
+    parser.add_argument("-o", "--salida", help="Carpeta donde guardar la configuración recibida por cada hostname")
+    argumentos = parser.parse_args()
+
+    try:
+        asyncio.run(ejecutar_simulador(argumentos))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
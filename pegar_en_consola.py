@@ -0,0 +1,249 @@
+import argparse
+import contextlib
+import io
+import os
+import re
+import sys
+import time
+
+from RedesV5 import cargar_especificacion, cargar_instantanea, generar_plan_desde_especificacion
+from desplegar_configuraciones import bloques_de_despliegue
+
+try:
+    import termios
+except ImportError:
+    termios = None
+
+# Emisor de configuraciones a ritmo de consola: en lugar de pegar el bloque entero de un dispositivo
+# (el buffer de entrada de la consola se desborda y se pierden comandos, sobre todo detrás de
+# "crypto key generate rsa"), cada línea sale a la velocidad del puerto serie más una pausa, las líneas
+# se agrupan en tandas que caben en el buffer con una pausa entre tandas para que el equipo las procese,
+# y los comandos pesados llevan su propia espera. Escribe en stdout o en una terminal (pty o puerto serie).
+#   python pegar_en_consola.py test1.CISCO --solo Router1 --tty /dev/ttyUSB0
+#   python pegar_en_consola.py test1.CISCO --estimar
+
+# Espera después de los comandos que dejan el CLI ocupado (segundos)
+COMANDOS_PESADOS = [
+    (re.compile(r"^crypto key generate rsa"), 5.0),
+    (re.compile(r"^(write memory|wr|copy run\S* start\S*)$"), 3.0),
+    (re.compile(r"^ip routing$"), 1.0),
+    (re.compile(r"^(router|ipv6 router) "), 0.5),
+]
+BAUDIOS_POR_DEFECTO = 9600
+BITS_POR_CARACTER = 10  # 8N1: bit de inicio + 8 de datos + bit de parada
+
+PATRON_ROUTER = re.compile(r"^! ---- ROUTER (\d+) ----")
+PATRON_DISPOSITIVO = re.compile(r"^! -- CONFIGURACIÓN DEL (\S+) --")
+PATRON_RUTAS = re.compile(r"^! Configurar en (\S+):")
+
+def bloques_de_archivo_cisco(ruta):
+    """
+    Separa un .CISCO generado en el bloque de comandos de cada dispositivo
+    Las rutas estáticas (al final del archivo) se agregan al bloque de su dispositivo
+    Retorna una lista de (nombre_dispositivo, comandos)
+    """
+    bloques = {}
+    rutas = {}
+    actual = None
+    router = None
+    with open(ruta, encoding="utf-8") as f:
+        for linea in f:
+            linea = linea.rstrip("\n")
+            if linea.startswith("! -- CONFIGURACIÓN DE ROUTER --"):
+                actual = bloques.setdefault(f"Router{router}", [])
+            elif PATRON_DISPOSITIVO.match(linea):
+                actual = bloques.setdefault(PATRON_DISPOSITIVO.match(linea).group(1), [])
+            elif PATRON_RUTAS.match(linea):
+                actual = rutas.setdefault(PATRON_RUTAS.match(linea).group(1), [])
+            elif linea.startswith(("! ----", "! ====")):
+                coincidencia = PATRON_ROUTER.match(linea)
+                router = coincidencia.group(1) if coincidencia else router
+                actual = None
+            elif actual is not None and linea.strip() and not linea.startswith("!"):
+                actual.append(linea)
+
+    resultado = []
+    for nombre, comandos in bloques.items():
+        comandos = comandos + ["end"]
+        if rutas.get(nombre):
+            comandos += ["conf t"] + rutas[nombre] + ["end"]
+        resultado.append((nombre, comandos))
+    return resultado
+
+def pausa_pesada(comando, pesados=COMANDOS_PESADOS):
+    for patron, segundos in pesados:
+        if patron.search(comando):
+            return segundos
+    return 0.0
+
+def es_pesado(comando):
+    # Cuenta como pesado aunque --pausa-pesado deje su pausa en 0
+    return any(patron.search(comando) for patron, _ in COMANDOS_PESADOS)
+
+def planificar_pegado(comandos, tamano_tanda, pausa_tanda, pesados=COMANDOS_PESADOS):
+    """
+    Reparte los comandos en tandas que caben en el buffer de la consola
+    Retorna una lista de (líneas de la tanda, pausa al terminarla)
+    Un comando pesado cierra su tanda y la pausa es la suya (si es mayor que la de tanda)
+    """
+    tandas = []
+    tanda = []
+    bytes_tanda = 0
+    for comando in comandos:
+        tamano = len(comando) + 1
+        if tanda and bytes_tanda + tamano > tamano_tanda:
+            tandas.append((tanda, pausa_tanda))
+            tanda, bytes_tanda = [], 0
+        tanda.append(comando)
+        bytes_tanda += tamano
+        pausa = pausa_pesada(comando, pesados)
+        if pausa:
+            tandas.append((tanda, max(pausa, pausa_tanda)))
+            tanda, bytes_tanda = [], 0
+    if tanda:
+        tandas.append((tanda, 0.0))
+    return tandas
+
+def tiempo_linea(comando, baudios, retardo_linea):
+    """
+    Lo que tarda en salir una línea por el puerto serie (con el fin de línea) más la pausa entre líneas
+    """
+    return (len(comando) + 1) * BITS_POR_CARACTER / baudios + retardo_linea
+
+def estimar_pegado(tandas, baudios, retardo_linea):
+    """
+    Tiempo total de pegado de un dispositivo (segundos)
+    """
+    return sum(sum(tiempo_linea(comando, baudios, retardo_linea) for comando in tanda) + pausa
+               for tanda, pausa in tandas)
+
+def configurar_terminal(descriptor, baudios, control_flujo):
+    """
+    Modo crudo, velocidad y (opcional) control de flujo XON/XOFF en una terminal serie o pty
+    """
+    if termios is None or not os.isatty(descriptor):
+        return
+    atributos = termios.tcgetattr(descriptor)
+    atributos[0] &= ~(termios.ICRNL | termios.INLCR | termios.IXON | termios.IXOFF)
+    if control_flujo:
+        atributos[0] |= termios.IXON | termios.IXOFF
+    atributos[1] &= ~termios.OPOST
+    atributos[3] &= ~(termios.ICANON | termios.ECHO | termios.ISIG)
+    velocidad = getattr(termios, f"B{baudios}", None)
+    if velocidad is not None:
+        atributos[4] = atributos[5] = velocidad
+    termios.tcsetattr(descriptor, termios.TCSADRAIN, atributos)
+
+def emitir(tandas, escribir, baudios, retardo_linea, fin_linea):
+    """
+    Escribe las tandas respetando los tiempos: cada línea espera su transmisión
+    más el retardo entre líneas y cada tanda espera su pausa antes de la siguiente
+    """
+    for tanda, pausa in tandas:
+        for comando in tanda:
+            escribir(f"{comando}{fin_linea}")
+            time.sleep(tiempo_linea(comando, baudios, retardo_linea))
+        if pausa:
+            time.sleep(pausa)
+
+def formatear_duracion(segundos):
+    minutos, segundos = divmod(segundos, 60)
+    return f"{int(minutos)}m {segundos:04.1f}s" if minutos else f"{segundos:.1f}s"
+
+def mostrar_estimacion(estimaciones, salida):
+    print("=" * 60, file=salida)
+    print("⏱️ TIEMPO ESTIMADO DE PEGADO POR DISPOSITIVO", file=salida)
+    print("=" * 60, file=salida)
+    for nombre, lineas, tandas, pesados, segundos in estimaciones:
+        print(f"   {nombre:<12} {lineas:>5} líneas - {tandas:>4} tandas - {pesados} pesados - {formatear_duracion(segundos)}",
+              file=salida)
+    total = sum(estimacion[-1] for estimacion in estimaciones)
+    print(f"📊 Total: {len(estimaciones)} dispositivos, {formatear_duracion(total)} pegando de a uno", file=salida)
+
+def main():
+    parser = argparse.ArgumentParser(description="Emite la configuración de cada dispositivo a ritmo de consola (pegado con control de flujo)")
+    parser.add_argument("entrada", help="Archivo .CISCO generado, instantánea .plan o especificación JSON")
+    parser.add_argument("-s", "--semilla", type=int, default=1, help="Semilla del plan (solo con especificación)")
+    parser.add_argument("--solo", help="Dispositivos a emitir, separados por coma (ej: Router1,SWITCH1)")
+    parser.add_argument("--tty", help="Terminal de destino (puerto serie o pty); por defecto stdout")
+    parser.add_argument("--baudios", type=int, default=BAUDIOS_POR_DEFECTO, help="Velocidad de la consola")
+    parser.add_argument("--retardo-linea", type=float, default=0.05, help="Segundos de espera después de cada línea")
+    parser.add_argument("--tanda", type=int, default=256, help="Bytes por tanda (menos que el buffer de entrada de la consola)")
+    parser.add_argument("--pausa-tanda", type=float, default=0.5, help="Segundos de espera entre tandas")
+    parser.add_argument("--pausa-pesado", type=float, help="Segundos de espera tras cada comando pesado (reemplaza los de la tabla)")
+    parser.add_argument("--xonxoff", action="store_true", help="Activa el control de flujo XON/XOFF en la terminal")
+    parser.add_argument("--estimar", action="store_true", help="Solo muestra el tiempo estimado, sin emitir nada")
+    argumentos = parser.parse_args()
+
+    if argumentos.entrada.upper().endswith(".CISCO"):
+        bloques = bloques_de_archivo_cisco(argumentos.entrada)
+    else:
+        if argumentos.entrada.endswith(".plan"):
+            plan = cargar_instantanea(argumentos.entrada)
+        else:
+            espec = cargar_especificacion(argumentos.entrada)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    plan = generar_plan_desde_especificacion(espec, argumentos.semilla)
+            except ValueError as e:
+                print(f"❌ {e}", file=sys.stderr)
+                return
+        bloques = [(nombre, comandos) for nombre, _, comandos in bloques_de_despliegue(plan)]
+    if argumentos.solo:
+        seleccion = argumentos.solo.split(",")
+        bloques = [bloque for bloque in bloques if bloque[0] in seleccion]
+        faltantes = set(seleccion) - {nombre for nombre, _ in bloques}
+        if faltantes:
+            print(f"❌ Dispositivos que no están en {argumentos.entrada}: {', '.join(sorted(faltantes))}", file=sys.stderr)
+            return
+
+    pesados = COMANDOS_PESADOS
+    if argumentos.pausa_pesado is not None:
+        pesados = [(patron, argumentos.pausa_pesado) for patron, _ in COMANDOS_PESADOS]
+
+    planes = []
+    for nombre, comandos in bloques:
+        tandas = planificar_pegado(comandos, argumentos.tanda, argumentos.pausa_tanda, pesados)
+        planes.append((nombre, tandas))
+
+    # Con stdout ocupado por los comandos, la estimación va por stderr
+    salida_informe = sys.stdout if argumentos.estimar else sys.stderr
+    mostrar_estimacion([(nombre, len(comandos), len(tandas), sum(1 for comando in comandos if es_pesado(comando)),
+                         estimar_pegado(tandas, argumentos.baudios, argumentos.retardo_linea))
+                        for (nombre, comandos), (_, tandas) in zip(bloques, planes)], salida_informe)
+    if argumentos.estimar:
+        return
+
+    if argumentos.tty:
+        descriptor = os.open(argumentos.tty, os.O_WRONLY | os.O_NOCTTY)
+        configurar_terminal(descriptor, argumentos.baudios, argumentos.xonxoff)
+
+        def escribir(texto):
+            datos = texto.encode()
+            while datos:
+                datos = datos[os.write(descriptor, datos):]
+        fin_linea = "\r"
+    else:
+        descriptor = None
+
+        def escribir(texto):
+            sys.stdout.write(texto)
+            sys.stdout.flush()
+        fin_linea = "\n"
+
+    try:
+        for nombre, tandas in planes:
+            print(f"📤 Emitiendo {nombre}...", file=sys.stderr)
+            inicio = time.perf_counter()
+            emitir(tandas, escribir, argumentos.baudios, argumentos.retardo_linea, fin_linea)
+            print(f"✅ {nombre} emitido en {formatear_duracion(time.perf_counter() - inicio)}", file=sys.stderr)
+    except KeyboardInterrupt:
+        print("\n⚠️ Emisión interrumpida", file=sys.stderr)
+    finally:
+        if descriptor is not None:
+            if termios is not None and os.isatty(descriptor):
+                termios.tcdrain(descriptor)
+            os.close(descriptor)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+
+from RedesV5 import LibroIPAM, int_to_ip, ip_to_int
+
+# Servicio IPAM local para que varios generadores (personas o trabajos de CI)
+# compartan el mismo libro de asignaciones sin pisarse.
+# Protocolo: una petición JSON por línea y una respuesta JSON por línea, sobre TCP local o socket Unix.
+#   {"op": "asignar", "base": "17.0.0.0", "mascara": 30, "salto": 1, "propietario": "ana", "proyecto": "lab1"}
+#   {"op": "reservar", "red": "17.0.0.0", "mascara": 24, "propietario": "ana", "proyecto": "lab1"}
+#   {"op": "liberar", "red": "17.0.0.4", "mascara": 30}
+#   {"op": "consultar", "propietario": "ana", "proyecto": null}
+
+# Campo con la dirección de red que lleva cada operación
+CAMPO_RED = {'asignar': 'base', 'reservar': 'red', 'liberar': 'red'}
+
+def error_de_peticion(peticion):
+    """
+    Valida la dirección (4 octetos de 0 a 255), la máscara (0-32) y el salto (>= 1)
+    antes de tocar el libro. Retorna el mensaje de error o None si la petición es válida
+    """
+    campo = CAMPO_RED.get(peticion['op'])
+    if campo is None:
+        return None
+    direccion = peticion[campo]
+    octetos = direccion.split('.') if isinstance(direccion, str) else []
+    if len(octetos) != 4 or not all(octeto.isdecimal() and int(octeto) <= 255 for octeto in octetos):
+        return f"Dirección IPv4 inválida en '{campo}': {direccion!r}"
+    mascara = peticion['mascara']
+    if isinstance(mascara, bool) or not isinstance(mascara, int) or not 0 <= mascara <= 32:
+        return f"Máscara inválida: {mascara!r} (entero de 0 a 32)"
+    salto = peticion.get('salto', 1)
+    if isinstance(salto, bool) or not isinstance(salto, int) or salto < 1:
+        return f"Salto inválido: {salto!r} (entero mayor o igual a 1)"
+    return None
+
+def procesar_peticion(libro, peticion):
+    """
+    Ejecuta una petición sobre el libro IPAM y construye la respuesta
+    Cada operación es una transacción SQLite completa y el bucle de eventos
+    las ejecuta una a una, así que dos clientes nunca reciben la misma subred
+    """
+    op = peticion['op']
+    error = error_de_peticion(peticion)
+    if error:
+        return {'ok': False, 'error': error}
+
+    if op == 'asignar':
+        rango = libro.asignar(ip_to_int(peticion['base']), int(peticion['mascara']),
+                              int(peticion.get('salto', 1)),
+                              peticion.get('propietario'), peticion.get('proyecto'))
+        if rango is None:
+            return {'ok': False, 'error': 'No hay más espacio para subredes con esa máscara'}
+        return {'ok': True, 'red': int_to_ip(rango[0]), 'ultima': int_to_ip(rango[1])}
+
+    elif op == 'reservar':
+        if libro.reservar(peticion['red'], int(peticion['mascara']),
+                          peticion.get('propietario'), peticion.get('proyecto')):
+            return {'ok': True}
+        return {'ok': False, 'error': f"{peticion['red']}/{peticion['mascara']} se solapa con un bloque registrado"}
+
+    elif op == 'liberar':
+        return {'ok': libro.liberar(peticion['red'], int(peticion['mascara']))}
+
+    elif op == 'consultar':
+        return {'ok': True, 'bloques': libro.consultar_propietario(peticion['propietario'], peticion.get('proyecto'))}
+
+    return {'ok': False, 'error': f"Operación desconocida: {op}"}
+
+async def atender_cliente(libro, lector, escritor):
+    """
+    Atiende a un generador conectado hasta que cierre la conexión
+    """
+    try:
+        while True:
+            linea = await lector.readline()
+            if not linea:
+                break
+            try:
+                respuesta = procesar_peticion(libro, json.loads(linea))
+            except (ValueError, KeyError, TypeError, IndexError, sqlite3.Error) as e:
+                respuesta = {'ok': False, 'error': str(e)}
+            escritor.write(json.dumps(respuesta).encode() + b'\n')
+            await escritor.drain()
+    except ConnectionError:
+        pass
+    finally:
+        escritor.close()
+
+async def iniciar_servicio(libro, host="127.0.0.1", puerto=5050, ruta_socket=None):
+    """
+    Arranca el servidor asyncio en TCP local o en un socket Unix
+    """
+    def manejador(lector, escritor):
+        return atender_cliente(libro, lector, escritor)
+
+    if ruta_socket:
+        if os.path.exists(ruta_socket):
+            os.remove(ruta_socket)
+        return await asyncio.start_unix_server(manejador, path=ruta_socket)
+    return await asyncio.start_server(manejador, host, puerto)
+
+async def ejecutar_servicio(argumentos):
+    libro = LibroIPAM(argumentos.libro, argumentos.proyecto, argumentos.propietario)
+    servidor = await iniciar_servicio(libro, argumentos.host, argumentos.puerto, argumentos.socket)
+
+    direccion = argumentos.socket or f"{argumentos.host}:{argumentos.puerto}"
+    print(f"🌐 Servicio IPAM escuchando en {direccion} (libro: {argumentos.libro})")
+
+    try:
+        async with servidor:
+            await servidor.serve_forever()
+    finally:
+        libro.cerrar()
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio IPAM local compartido para RedesV5.py")
+    parser.add_argument("--libro", default="ipam.db", help="Ruta del libro SQLite (':memory:' para pruebas)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=5050)
+    parser.add_argument("--socket", help="Ruta de socket Unix (en lugar de TCP)")
+    parser.add_argument("--proyecto", default="default", help="Proyecto por defecto de las asignaciones")
+    parser.add_argument("--propietario", default="servicio", help="Propietario por defecto de las asignaciones")
+    argumentos = parser.parse_args()
+
+    try:
+        asyncio.run(ejecutar_servicio(argumentos))
+    except KeyboardInterrupt:
+        print("\n👋 Servicio IPAM detenido")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+import argparse
+import contextlib
+import copy
+import csv
+import heapq
+import io
+import json
+import random
+import time
+
+from RedesV5 import (
+    ANCHO_BANDA_ENLACE_KBPS,
+    calcular_rutas_estaticas,
+    capa_acceso_de_plan,
+    cargar_especificacion,
+    cargar_instantanea,
+    construir_tablas_reenvio,
+    crear_mapa_interfaces_dinamico,
+    decidir_salto,
+    generar_plan_desde_especificacion,
+    ip_to_int,
+    nombre_switch_acceso,
+    obtener_ip_usable,
+    planificar_capa_acceso,
+    primer_salto_ruteo_dinamico,
+)
+
+# Simulador de eventos discretos del tráfico entre los PCs de un plan, antes de montarlo.
+# Cada flujo se parte en segmentos que atraviesan los enlaces con colas FIFO (store-and-forward):
+# un segmento espera a que el enlace quede libre y lo ocupa bytes × 8 / velocidad segundos.
+# Los caminos salen de las tablas de reenvío del plan (rutas estáticas o, con ruteo dinámico,
+# las que converge el protocolo según el costo de los enlaces: OSPF, EIGRP o saltos de RIP).
+
+# Velocidad de cada tipo de interfaz según el modelo: 2811 (fa0/0 y Ethernet1/x del NM-4E),
+# 3650 (GigabitEthernet), 2960 y PCs (FastEthernet)
+VELOCIDADES_INTERFAZ_BPS = {
+    "GigabitEthernet": 1_000_000_000,
+    "FastEthernet": 100_000_000,
+    "Ethernet": ANCHO_BANDA_ENLACE_KBPS * 1000
+}
+TAMANO_SEGMENTO_BYTES = 64 * 1024
+PERCENTILES = (50, 95, 99)
+
+def velocidad_interfaz(interfaz):
+    """
+    Velocidad (bps) de una interfaz por su nombre; se compara el prefijo más largo primero
+    """
+    for tipo in sorted(VELOCIDADES_INTERFAZ_BPS, key=len, reverse=True):
+        if interfaz.startswith(tipo):
+            return VELOCIDADES_INTERFAZ_BPS[tipo]
+    raise ValueError(f"Tipo de interfaz desconocido: {interfaz}")
+
+def construir_enlaces(plan):
+    """
+    Enlaces físicos del plan con su velocidad, a partir del mapa de interfaces de PTBuilder
+    La velocidad de un enlace es la menor de sus dos extremos; plan['anchos_banda'] (kbps) tiene prioridad
+    Los cables de un EtherChannel suman su velocidad
+    Retorna {(dispositivo_a, dispositivo_b): bps} en ambos sentidos
+    """
+    mapa = crear_mapa_interfaces_dinamico(plan['conexiones_mapa'], plan['router_vlans_asignadas'], plan['routers_con_swc3'],
+                                          plan.get('miembros_etherchannel', 1), capa_acceso_de_plan(plan))
+    enlaces = {}
+    for clave, datos in mapa.items():
+        if isinstance(clave, tuple):
+            r1, r2 = clave
+            extremos = (f"Router{r1}", f"Router{r2}")
+            bps = min(velocidad_interfaz(datos['r1_interface']), velocidad_interfaz(datos['r2_interface']))
+            if clave in plan.get('anchos_banda', {}):
+                bps = plan['anchos_banda'][clave] * 1000
+        else:
+            extremos = (datos['device1'], datos['device2'])
+            bps = min(velocidad_interfaz(datos['interface1']), velocidad_interfaz(datos['interface2']))
+            bps += enlaces.get(extremos, 0)
+        enlaces[extremos] = bps
+        enlaces[extremos[::-1]] = bps
+    return enlaces
+
+def tablas_de_simulacion(plan):
+    """
+    Tablas de reenvío con las que se simula: las del plan si es estático; con ruteo dinámico,
+    rutas equivalentes a las que converge el protocolo (costos OSPF, métrica EIGRP o saltos RIP,
+    ver primer_salto_ruteo_dinamico); estas no se guardan en la caché de rutas
+    """
+    if plan['tipo_ruteo'] != "estatico":
+        primer_salto = primer_salto_ruteo_dinamico(plan)
+        plan = copy.copy(plan)
+        with contextlib.redirect_stdout(io.StringIO()):
+            plan['rutas_estaticas'], plan['rutas_estaticas_swc3'] = calcular_rutas_estaticas(
+                plan['conexiones_mapa'], plan['router_vlans_asignadas'], plan['num_routers'],
+                plan['routers_con_swc3'], plan['swc3_configuraciones'], primer_salto, cache=False)
+    tablas, propietarios, _, _ = construir_tablas_reenvio(plan)
+    return tablas, propietarios
+
+def listar_pcs(plan):
+    """
+    PCs que la capa de acceso del plan conecta a los switches de cada router (ver planificar_capa_acceso),
+    cada uno con el siguiente host libre de su VLAN
+    Retorna una lista de (pc, router, vlan_id, network, ip_int, indice_switch)
+    """
+    pcs = []
+    for r in range(1, plan['num_routers'] + 1):
+        vlans = plan['router_vlans_asignadas'].get(r, {})
+        hosts_usados = {}
+        for switch in planificar_capa_acceso(plan, r):
+            for pc, _, vlan_id in switch['pcs']:
+                if vlan_id is None:
+                    continue
+                network, mask = vlans[vlan_id]
+                indice_host = hosts_usados.get(vlan_id, 0)
+                hosts_usados[vlan_id] = indice_host + 1
+                pcs.append((pc, r, vlan_id, network, ip_to_int(obtener_ip_usable(network, mask, indice_host)), switch['indice']))
+    return pcs
+
+def cadena_switches(router_num, desde, hasta):
+    """
+    Switches de acceso recorridos entre dos posiciones de la cadena del router, ambas incluidas
+    """
+    paso = 1 if hasta >= desde else -1
+    return [nombre_switch_acceso(router_num, indice) for indice in range(desde, hasta + paso, paso)]
+
+def camino_entre_pcs(plan, tablas, propietarios, origen, destino, cache_caminos, cache_salidas):
+    """
+    Dispositivos recorridos de un PC a otro: switches de acceso hasta el primero de la cadena,
+    gateway de la VLAN, saltos L3 y el camino inverso en el destino.
+    Los saltos L3 solo dependen del gateway de origen y de la red destino.
+    Retorna None si el destino no es alcanzable (agujero negro o bucle)
+    """
+    pc_origen, r_origen, vlan_origen, red_origen, _, switch_origen = origen
+    pc_destino, r_destino, vlan_destino, red_destino, ip_destino, switch_destino = destino
+
+    if r_origen == r_destino and vlan_origen == vlan_destino:
+        return [pc_origen] + cadena_switches(r_origen, switch_origen, switch_destino) + [pc_destino]
+
+    gateway = f"SWC3_R{r_origen}" if r_origen in plan['swc3_configuraciones'] else f"Router{r_origen}"
+    clave = (gateway, red_destino)
+    if clave not in cache_caminos:
+        saltos = [gateway]
+        while True:
+            decision = decidir_salto(tablas, propietarios, saltos[-1], ip_destino, cache_salidas)
+            if decision[0] == 'entregado':
+                break
+            if decision[0] == 'agujero' or decision[1] in saltos:
+                saltos = None
+                break
+            saltos.append(decision[1])
+        cache_caminos[clave] = saltos
+
+    saltos = cache_caminos[clave]
+    if saltos is None:
+        return None
+    return ([pc_origen] + cadena_switches(r_origen, switch_origen, 1) + saltos
+            + cadena_switches(r_destino, 1, switch_destino) + [pc_destino])
+
+def generar_flujos(pcs, num_flujos, tamano_medio, tasa, rng):
+    """
+    Flujos sintéticos entre PCs distintos: llegadas de Poisson (tasa flujos/s) y tamaños exponenciales
+    Retorna una lista de (inicio_s, indice_origen, indice_destino, bytes)
+    """
+    flujos = []
+    instante = 0.0
+    for _ in range(num_flujos):
+        instante += rng.expovariate(tasa)
+        origen = rng.randrange(len(pcs))
+        destino = rng.randrange(len(pcs) - 1)
+        if destino >= origen:
+            destino += 1
+        flujos.append((instante, origen, destino, max(64, int(rng.expovariate(1 / tamano_medio)))))
+    return flujos
+
+def percentil(valores_ordenados, p):
+    if not valores_ordenados:
+        return 0.0
+    return valores_ordenados[min(len(valores_ordenados) - 1, int(len(valores_ordenados) * p / 100))]
+
+def simular(plan, flujos, pcs, tamano_segmento=TAMANO_SEGMENTO_BYTES):
+    """
+    Ejecuta la simulación de eventos discretos. Cada evento es la llegada de un segmento a un salto;
+    la cola de eventos es un heap ordenado por instante, así cada enlace atiende en orden FIFO
+    Retorna un diccionario con los resultados por enlace y por flujo
+    """
+    inicio_reloj = time.perf_counter()
+    enlaces = construir_enlaces(plan)
+    tablas, propietarios = tablas_de_simulacion(plan)
+
+    # Enlaces numerados para usar listas en el bucle de eventos
+    indice_enlace = {}
+    nombres_enlace = []
+    velocidad = []
+
+    def id_enlace(a, b):
+        if (a, b) not in indice_enlace:
+            indice_enlace[(a, b)] = len(nombres_enlace)
+            nombres_enlace.append((a, b))
+            velocidad.append(enlaces[(a, b)])
+        return indice_enlace[(a, b)]
+
+    cache_caminos, cache_salidas, caminos_enlaces = {}, {}, {}
+    caminos_flujo = []
+    descartados = 0
+    for _, origen, destino, _ in flujos:
+        if (origen, destino) not in caminos_enlaces:
+            camino = camino_entre_pcs(plan, tablas, propietarios, pcs[origen], pcs[destino], cache_caminos, cache_salidas)
+            if camino is None or any((a, b) not in enlaces for a, b in zip(camino, camino[1:])):
+                caminos_enlaces[(origen, destino)] = None
+            else:
+                caminos_enlaces[(origen, destino)] = tuple(id_enlace(a, b) for a, b in zip(camino, camino[1:]))
+        caminos_flujo.append(caminos_enlaces[(origen, destino)])
+
+    # Segmentos: todos los de un flujo llegan a la vez a la interfaz del PC y se serializan en ella
+    eventos = []
+    segmento_flujo, segmento_bytes = [], []
+    pendientes = [0] * len(flujos)
+    for f, ((inicio, _, _, tamano), camino) in enumerate(zip(flujos, caminos_flujo)):
+        if camino is None:
+            descartados += 1
+            continue
+        for desplazamiento in range(0, tamano, tamano_segmento):
+            eventos.append((inicio, len(segmento_flujo), 0))
+            segmento_flujo.append(f)
+            segmento_bytes.append(min(tamano_segmento, tamano - desplazamiento))
+            pendientes[f] += 1
+    heapq.heapify(eventos)
+
+    libre = [0.0] * len(nombres_enlace)
+    ocupado = [0.0] * len(nombres_enlace)
+    espera_total = [0.0] * len(nombres_enlace)
+    espera_maxima = [0.0] * len(nombres_enlace)
+    segmentos_enlace = [0] * len(nombres_enlace)
+    bytes_enlace = [0] * len(nombres_enlace)
+    fin_flujo = [None] * len(flujos)
+
+    heappop, heappush = heapq.heappop, heapq.heappush
+    while eventos:
+        instante, segmento, salto = heappop(eventos)
+        f = segmento_flujo[segmento]
+        camino = caminos_flujo[f]
+        if salto == len(camino):
+            pendientes[f] -= 1
+            if not pendientes[f]:
+                fin_flujo[f] = instante
+            continue
+        enlace = camino[salto]
+        comienzo = libre[enlace] if libre[enlace] > instante else instante
+        espera = comienzo - instante
+        transmision = segmento_bytes[segmento] * 8 / velocidad[enlace]
+        libre[enlace] = comienzo + transmision
+        ocupado[enlace] += transmision
+        espera_total[enlace] += espera
+        if espera > espera_maxima[enlace]:
+            espera_maxima[enlace] = espera
+        segmentos_enlace[enlace] += 1
+        bytes_enlace[enlace] += segmento_bytes[segmento]
+        heappush(eventos, (comienzo + transmision, segmento, salto + 1))
+
+    terminados = [(f, fin - flujos[f][0]) for f, fin in enumerate(fin_flujo) if fin is not None]
+    duracion = max((fin_flujo[f] for f, _ in terminados), default=0.0) - (flujos[0][0] if flujos else 0.0)
+
+    resultados_enlaces = []
+    for enlace, (a, b) in enumerate(nombres_enlace):
+        resultados_enlaces.append({
+            'enlace': f"{a}→{b}",
+            'bps': velocidad[enlace],
+            'bytes': bytes_enlace[enlace],
+            'utilizacion': ocupado[enlace] / duracion if duracion else 0.0,
+            'espera_media_ms': espera_total[enlace] / max(1, segmentos_enlace[enlace]) * 1000,
+            'espera_maxima_ms': espera_maxima[enlace] * 1000
+        })
+    resultados_enlaces.sort(key=lambda resultado: resultado['utilizacion'], reverse=True)
+
+    completados = sorted(tiempo for _, tiempo in terminados)
+    return {
+        'flujos': len(flujos),
+        'completados': len(terminados),
+        'descartados': descartados,
+        'segmentos': len(segmento_flujo),
+        'duracion_simulada_s': duracion,
+        'bytes_totales': sum(flujos[f][3] for f, _ in terminados),
+        'throughput_bps': sum(flujos[f][3] for f, _ in terminados) * 8 / duracion if duracion else 0.0,
+        'completado_ms': {f"p{p}": percentil(completados, p) * 1000 for p in PERCENTILES},
+        'completado_medio_ms': sum(completados) / len(completados) * 1000 if completados else 0.0,
+        'enlaces': resultados_enlaces,
+        'por_flujo': [{'flujo': f, 'origen': pcs[flujos[f][1]][0], 'destino': pcs[flujos[f][2]][0],
+                       'bytes': flujos[f][3], 'inicio_s': flujos[f][0], 'completado_ms': tiempo * 1000}
+                      for f, tiempo in terminados],
+        'duracion_real_s': time.perf_counter() - inicio_reloj
+    }
+
+def mostrar_resultados(resultados, max_enlaces):
+    print("=" * 60)
+    print(f"🚦 SIMULACIÓN: {resultados['flujos']} FLUJOS, {resultados['segmentos']} SEGMENTOS "
+          f"EN {resultados['duracion_real_s']:.2f} s")
+    print("=" * 60)
+    print(f"✅ Completados: {resultados['completados']} - ❌ sin camino: {resultados['descartados']}")
+    print(f"⏱️ Tiempo simulado: {resultados['duracion_simulada_s']:.2f} s - "
+          f"throughput agregado: {resultados['throughput_bps'] / 1e6:.2f} Mbps")
+    percentiles = ", ".join(f"{nombre} {valor:.1f} ms" for nombre, valor in resultados['completado_ms'].items())
+    print(f"📦 Tiempo de completado por flujo: medio {resultados['completado_medio_ms']:.1f} ms ({percentiles})")
+    print(f"\n🔗 Enlaces más cargados:")
+    for enlace in resultados['enlaces'][:max_enlaces]:
+        print(f"   {enlace['enlace']} ({enlace['bps'] / 1e6:g} Mbps): utilización {enlace['utilizacion']:.1%}, "
+              f"cola media {enlace['espera_media_ms']:.2f} ms, máxima {enlace['espera_maxima_ms']:.2f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simula el tráfico entre los PCs de un plan generado (eventos discretos)")
+    parser.add_argument("especificacion", help="Archivo JSON con la especificación (ver cargar_especificacion en RedesV5.py) "
+                                               "o instantánea .plan de un plan ya generado")
+    parser.add_argument("-s", "--semilla", type=int, default=1, help="Semilla del plan y de los flujos")
+    parser.add_argument("-n", "--flujos", type=int, default=100000, help="Número de flujos a simular")
+    parser.add_argument("--tamano-medio", type=int, default=32 * 1024, help="Tamaño medio de un flujo en bytes")
+    parser.add_argument("--tasa", type=float, default=200.0, help="Llegadas de flujos por segundo")
+    parser.add_argument("--segmento", type=int, default=TAMANO_SEGMENTO_BYTES, help="Bytes por segmento")
+    parser.add_argument("--enlaces", type=int, default=15, help="Enlaces a mostrar en el resumen")
+    parser.add_argument("-o", "--salida", help="Archivo JSON con los resultados por enlace y el resumen")
+    parser.add_argument("--csv-flujos", help="Archivo CSV con el tiempo de completado de cada flujo")
+    argumentos = parser.parse_args()
+
+    if argumentos.especificacion.endswith(".plan"):
+        plan = cargar_instantanea(argumentos.especificacion)
+    else:
+        espec = cargar_especificacion(argumentos.especificacion)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                plan = generar_plan_desde_especificacion(espec, argumentos.semilla)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+
+    pcs = listar_pcs(plan)
+    if len(pcs) < 2:
+        print("❌ El plan necesita al menos dos PCs (routers con VLANs) para simular tráfico")
+        return
+
+    rng = random.Random(argumentos.semilla)
+    flujos = generar_flujos(pcs, argumentos.flujos, argumentos.tamano_medio, argumentos.tasa, rng)
+    resultados = simular(plan, flujos, pcs, argumentos.segmento)
+    mostrar_resultados(resultados, argumentos.enlaces)
+
+    por_flujo = resultados.pop('por_flujo')
+    if argumentos.salida:
+        with open(argumentos.salida, 'w') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"📋 Resultados por enlace: {argumentos.salida}")
+    if argumentos.csv_flujos:
+        with open(argumentos.csv_flujos, 'w', newline='') as f:
+            escritor = csv.DictWriter(f, fieldnames=list(por_flujo[0]) if por_flujo else ['flujo'])
+            escritor.writeheader()
+            escritor.writerows(por_flujo)
+        print(f"📋 Tiempos por flujo: {argumentos.csv_flujos}")
+
+if __name__ == "__main__":
+    main()